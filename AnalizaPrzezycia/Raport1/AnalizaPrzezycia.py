@@ -3,11 +3,23 @@ Generator PDF - Główny plik
 Generuje profesjonalne raporty PDF z wykresami i kodem
 """
 
-from weasyprint import HTML, CSS
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+import itertools
+import json
 import os
-from wykresy import stworz_wykresy
-import matplotlib.pyplot as plt
+import time
+
+import numpy as np
+
+import profilowanie
+from profilowanie import etap
+from szablony import wczytaj_szablon
+
+# weasyprint, matplotlib i moduł wykresy są importowane dopiero w generuj_pdf,
+# więc --help i --sprawdz działają bez ładowania ciężkich bibliotek
 
 
 
@@ -26,46 +38,47 @@ def wczytaj_plik(nazwa_pliku, encoding='utf-8'):
 
 def stworz_html(wykresy):
     """Tworzy kompletny HTML z danymi"""
-    template = wczytaj_plik('szablon.html')
-    if not template:
+    try:
+        szablon = wczytaj_szablon('szablon.html')
+    except FileNotFoundError:
+        print("⚠ Nie znaleziono pliku: szablon.html")
         return None
 
+    dane = wykresy["dane"]
+    wartosci = {
+        'DATA': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'WYKRES1': wykresy['wykres1'],
+        'WYKRES2': wykresy['wykres2'],
+        # Wzory LaTeX jako obrazy base64
+        'WZOR_PDF': wykresy['WZOR_PDF'],
+        'WZOR_CDF': wykresy['WZOR_CDF'],
+        'WZOR_KWANTYL': wykresy['WZOR_KWANTYL'],
+        'WZOR_HAZARD': wykresy['WZOR_HAZARD'],
+    }
+    for nazwa, klucz in (('MEDIAN', 'median'), ('Q1', 'q1'), ('Q3', 'q3'), ('IQR', 'iqr')):
+        wartosci[f'{nazwa}_THEO_1'] = f'{dane["theoretical_EW_1"][klucz]:.4f}'
+        wartosci[f'{nazwa}_THEO_2'] = f'{dane["theoretical_EW_2"][klucz]:.4f}'
 
-    # Zastąp placeholdery danymi
-    html = template.replace('{{DATA}}', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    html = html.replace('{{WYKRES1}}', wykresy['wykres1'])
-    html = html.replace('{{WYKRES2}}', wykresy['wykres2'])
- 
-    # Podmień wzory LaTeX jako obrazy base64
-    html = html.replace('{{WZOR_PDF}}', wykresy['WZOR_PDF'])
-    html = html.replace('{{WZOR_CDF}}', wykresy['WZOR_CDF'])
-    html = html.replace('{{WZOR_KWANTYL}}', wykresy['WZOR_KWANTYL'])
-    html = html.replace('{{WZOR_HAZARD}}', wykresy['WZOR_HAZARD'])
-
-    html = html.replace('{{MEDIAN_THEO_243}}', f'{wykresy["dane"]["theoretical_EW_243"]["median"]:.4f}')
-    html = html.replace('{{MEDIAN_THEO_221}}', f'{wykresy["dane"]["theoretical_EW_221"]["median"]:.4f}')
-    html = html.replace('{{Q1_THEO_243}}', f'{wykresy["dane"]["theoretical_EW_243"]["q1"]:.4f}')
-    html = html.replace('{{Q1_THEO_221}}', f'{wykresy["dane"]["theoretical_EW_221"]["q1"]:.4f}')
-    html = html.replace('{{Q3_THEO_243}}', f'{wykresy["dane"]["theoretical_EW_243"]["q3"]:.4f}')
-    html = html.replace('{{Q3_THEO_221}}', f'{wykresy["dane"]["theoretical_EW_221"]["q3"]:.4f}')
-    html = html.replace('{{IQR_THEO_243}}', f'{wykresy["dane"]["theoretical_EW_243"]["iqr"]:.4f}')
-    html = html.replace('{{IQR_THEO_221}}', f'{wykresy["dane"]["theoretical_EW_221"]["iqr"]:.4f}')
+    for i, (n, alpha, beta, gamma) in enumerate(wykresy['proby'], start=1):
+        wartosci[f'OPIS{i}'] = f'n={n}, α={alpha:g}, β={beta:g}, γ={gamma:g}'
 
     for i in range(1, 5):
-        sample = wykresy["dane"][f"sample{i}"]
-        html = html.replace(f'{{{{MEAN{i}}}}}', f'{sample["mean"]:.4f}')
-        html = html.replace(f'{{{{MEDIAN{i}}}}}', f'{sample["median"]:.4f}')
-        html = html.replace(f'{{{{STD{i}}}}}', f'{sample["std"]:.4f}')
-        html = html.replace(f'{{{{Q1_{i}}}}}', f'{sample["q1"]:.4f}')
-        html = html.replace(f'{{{{Q3_{i}}}}}', f'{sample["q3"]:.4f}')
-        html = html.replace(f'{{{{IQR{i}}}}}', f'{sample["iqr"]:.4f}')
-        html = html.replace(f'{{{{MIN{i}}}}}', f'{sample["min"]:.4f}')
-        html = html.replace(f'{{{{MAX{i}}}}}', f'{sample["max"]:.4f}')
-        html = html.replace(f'{{{{RANGE{i}}}}}', f'{sample["range"]:.4f}')
-
+        sample = dane[f"sample{i}"]
+        wartosci[f'MEAN{i}'] = f'{sample["mean"]:.4f}'
+        wartosci[f'MEDIAN{i}'] = f'{sample["median"]:.4f}'
+        wartosci[f'STD{i}'] = f'{sample["std"]:.4f}'
+        wartosci[f'Q1_{i}'] = f'{sample["q1"]:.4f}'
+        wartosci[f'Q3_{i}'] = f'{sample["q3"]:.4f}'
+        wartosci[f'IQR{i}'] = f'{sample["iqr"]:.4f}'
+        wartosci[f'MIN{i}'] = f'{sample["min"]:.4f}'
+        wartosci[f'MAX{i}'] = f'{sample["max"]:.4f}'
+        wartosci[f'RANGE{i}'] = f'{sample["range"]:.4f}'
 
-    
-    return html
+    try:
+        return szablon.wypelnij(wartosci)
+    except KeyError as e:
+        print(f"❌ Błąd wypełniania szablonu: {e}")
+        return None
 
 def sprawdz_pliki():
     """Sprawdza czy wszystkie wymagane pliki istnieją"""
@@ -84,40 +97,88 @@ def sprawdz_pliki():
     
     return True
 
-def generuj_pdf(nazwa_pliku="raport.pdf"):
-    """Główna funkcja generująca PDF"""
+@lru_cache(maxsize=None)
+def _czcionki():
+    """Konfiguracja czcionek WeasyPrint, wspólna dla wszystkich raportów procesu"""
+    from weasyprint.text.fonts import FontConfiguration
+    return FontConfiguration()
+
+@lru_cache(maxsize=4)
+def _arkusz(css_content):
+    """Sparsowany arkusz stylów; parsowany raz na proces dla danej treści"""
+    from weasyprint import CSS
+    return CSS(string=css_content, font_config=_czcionki())
+
+def _zapisz_pdf(html_content, css_content, nazwa_pliku, base_url=None):
+    with etap('css_parsowanie'):
+        arkusz = _arkusz(css_content)
+    with etap('write_pdf', plik=nazwa_pliku):
+        from weasyprint import HTML
+        HTML(string=html_content, base_url=base_url).write_pdf(
+            nazwa_pliku,
+            stylesheets=[arkusz],
+            font_config=_czcionki()
+        )
+
+def generuj_pdf(nazwa_pliku="raport.pdf", katalog_zasobow=None, format_wykresow='png',
+                rownolegle=False):
+    """
+    Główna funkcja generująca PDF
+    
+    Parametry:
+    ----------
+    nazwa_pliku : str
+        Ścieżka wynikowego pliku PDF
+    katalog_zasobow : str, opcjonalnie
+        Katalog, do którego trafiają obrazy jako pliki oraz kopia HTML;
+        bez niego obrazy są wstawiane do HTML jako base64
+    format_wykresow : str
+        'png' albo 'svg' (wykresy i wzory tylko wektorowo)
+    rownolegle : bool
+        Czy rysować wykresy i wzory w puli procesów
+    """
     print("=" * 60)
     print("  GENERATOR PDF - Raport z wykresami")
     print("=" * 60)
     
     # Sprawdź pliki
-    if not sprawdz_pliki():
+    with etap('sprawdz_pliki'):
+        kompletne = sprawdz_pliki()
+    if not kompletne:
         print("\n💡 Upewnij się, że wszystkie pliki są w tym samym katalogu!")
         return False
     
     print("\n🔧 Generowanie wykresów...")
     try:
-        wykresy = stworz_wykresy()
+        with etap('stworz_wykresy', rownolegle=rownolegle, format=format_wykresow):
+            from wykresy import stworz_wykresy
+            wykresy = stworz_wykresy(rownolegle=rownolegle, format=format_wykresow,
+                                     katalog=katalog_zasobow)
     except Exception as e:
         print(f"❌ Błąd generowania wykresów: {e}")
         return False
     
     print("📄 Ładowanie szablonu HTML...")
-    html_content = stworz_html(wykresy)
+    with etap('szablon'):
+        html_content = stworz_html(wykresy)
     if not html_content:
         return False
     
     print("🎨 Ładowanie stylów CSS...")
-    css_content = wczytaj_plik('style.css')
+    with etap('css'):
+        css_content = wczytaj_plik('style.css')
     if not css_content:
         return False
     
+    if katalog_zasobow is not None:
+        # HTML obok obrazów, do których odwołuje się adresami względnymi
+        nazwa_html = os.path.splitext(os.path.basename(nazwa_pliku))[0] + '.html'
+        with open(os.path.join(katalog_zasobow, nazwa_html), 'w', encoding='utf-8') as f:
+            f.write(html_content)
+    
     print("📊 Generowanie PDF...")
     try:
-        HTML(string=html_content).write_pdf(
-            nazwa_pliku,
-            stylesheets=[CSS(string=css_content)]
-        )
+        _zapisz_pdf(html_content, css_content, nazwa_pliku, katalog_zasobow)
         print(f"\n✅ PDF wygenerowany pomyślnie!")
         print(f"📁 Lokalizacja: {os.path.abspath(nazwa_pliku)}")
         return True
@@ -125,18 +186,221 @@ def generuj_pdf(nazwa_pliku="raport.pdf"):
         print(f"\n❌ Błąd podczas generowania PDF: {e}")
         return False
 
-def main():
+def siatka_konfiguracji(alpha=(2,), beta=(4,), gamma=(3,), n=(50,)):
+    """Wszystkie kombinacje podanych wartości jako lista słowników konfiguracji"""
+    return [{'alpha': a, 'beta': b, 'gamma': g, 'n': k}
+            for a, b, g, k in itertools.product(alpha, beta, gamma, n)]
+
+def _rozgrzej_proces():
+    """
+    Inicjalizacja procesu roboczego serii: backend matplotlib, czcionki
+    i sparsowany style.css są gotowe przed pierwszym raportem
+    """
+    from wykresy import _rozgrzej_backend
+    _rozgrzej_backend()
+    css_content = wczytaj_plik('style.css')
+    if css_content:
+        _arkusz(css_content)
+
+def _raport_konfiguracji(konfiguracja, katalog_wyjsciowy, format_wykresow='png', zgodnosc=0,
+                        ziarno=None, indeks=0):
+    """
+    Tworzy jeden raport serii i zwraca nazwę pliku oraz czasy etapów
+    (a przy zgodnosc > 0 także testy zgodności prób z B = zgodnosc replikacjami);
+    ziarno to SeedSequence konfiguracji - dzielone na strumień prób i bootstrapu;
+    indeks (pozycja w serii) poprzedza parametry w nazwie pliku, więc powtórzone
+    konfiguracje ani wartości zaokrąglone przez :g do tej samej postaci
+    nie nadpisują sobie raportów
+    """
+    from wykresy import generuj_dane, stworz_wykresy, proby_konfiguracji
+    alpha, beta, gamma, n = (konfiguracja[k] for k in ('alpha', 'beta', 'gamma', 'n'))
+    nazwa = f"raport_{indeks:04d}_a{alpha:g}_b{beta:g}_g{gamma:g}_n{n}.pdf"
+    proby = proby_konfiguracji(alpha, beta, gamma, n)
+    if ziarno is None:
+        ziarno = np.random.SeedSequence(42)
+    ziarno_danych, ziarno_testow = ziarno.spawn(2)
+    dane = generuj_dane(seed=ziarno_danych, proby=proby)
+    czasy = {}
+    wynik = {'plik': nazwa, 'czasy': czasy}
+
+    start = time.perf_counter()
+    wykresy = stworz_wykresy(format=format_wykresow, dane=dane, proby=proby,
+                             hazardy=((alpha, beta, gamma), (2, 2, 1)))
+    czasy['wykresy'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    html_content = stworz_html(wykresy)
+    css_content = wczytaj_plik('style.css')
+    if not html_content or not css_content:
+        raise RuntimeError("Nie udało się przygotować HTML lub CSS")
+    czasy['html'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _zapisz_pdf(html_content, css_content, os.path.join(katalog_wyjsciowy, nazwa))
+    czasy['pdf'] = time.perf_counter() - start
+
+    if zgodnosc:
+        from zgodnosc import testy_prob
+        start = time.perf_counter()
+        # Serie już działają w puli procesów, więc bootstrap liczymy w jednym
+        wynik['zgodnosc'] = testy_prob(dane, proby, B=zgodnosc, procesy=1,
+                                       seed=int(ziarno_testow.generate_state(1)[0]))
+        czasy['zgodnosc'] = time.perf_counter() - start
+    czasy['razem'] = sum(czasy.values())
+    return wynik
+
+def generuj_serie(konfiguracje, katalog_wyjsciowy='raporty', procesy=None, format_wykresow='png',
+                  zgodnosc=0, seed=42):
+    """
+    Generuje po jednym raporcie PDF dla każdej konfiguracji (α, β, γ, n)
+
+    Pliki nazywają się raport_<indeks>_a<α>_b<β>_g<γ>_n<n>.pdf, gdzie indeks
+    to pozycja konfiguracji w serii.
+    
+    Parametry:
+    ----------
+    konfiguracje : sekwencja dict
+        Słowniki z kluczami 'alpha', 'beta', 'gamma', 'n' (np. z siatka_konfiguracji)
+    katalog_wyjsciowy : str
+        Katalog na raporty i plik manifest.json
+    procesy : int, opcjonalnie
+        Liczba procesów roboczych (domyślnie liczba rdzeni)
+    format_wykresow : str
+        'png' albo 'svg'
+    zgodnosc : int
+        Liczba replikacji bootstrapu dla testów zgodności KS/CvM/AD prób
+        każdej konfiguracji (wyniki trafiają do manifestu); 0 = bez testów
+    seed : int
+        Ziarno serii; każda konfiguracja dostaje własne ziarno z
+        SeedSequence(seed).spawn, więc próby konfiguracji są niezależne,
+        a wynik nie zależy od liczby procesów
+    
+    Zwraca:
+    -------
+    dict : Manifest (zapisany też jako manifest.json) albo None, gdy brakuje plików
+    """
+    if not sprawdz_pliki():
+        return None
+    os.makedirs(katalog_wyjsciowy, exist_ok=True)
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+
+    print(f"🧵 Seria {len(konfiguracje)} raportów w {procesy} procesach...")
+    start = time.perf_counter()
+    raporty = []
+    ziarna = np.random.SeedSequence(seed).spawn(len(konfiguracje))
+    with ProcessPoolExecutor(max_workers=procesy, initializer=_rozgrzej_proces) as pula:
+        przyszle = [(k, pula.submit(_raport_konfiguracji, k, katalog_wyjsciowy, format_wykresow,
+                                    zgodnosc, z, i))
+                    for i, (k, z) in enumerate(zip(konfiguracje, ziarna))]
+        for konfiguracja, przyszly in przyszle:
+            wpis = {'konfiguracja': konfiguracja}
+            try:
+                wpis.update(przyszly.result(), status='ok')
+            except Exception as e:
+                print(f"❌ Błąd raportu {konfiguracja}: {e}")
+                wpis.update(status='blad', blad=str(e))
+            raporty.append(wpis)
+
+    manifest = {
+        'utworzono': datetime.now().isoformat(timespec='seconds'),
+        'procesy': procesy,
+        'format_wykresow': format_wykresow,
+        'zgodnosc_B': zgodnosc,
+        'seed': seed,
+        'czas_calkowity': time.perf_counter() - start,
+        'udane': sum(r['status'] == 'ok' for r in raporty),
+        'raporty': raporty
+    }
+    with open(os.path.join(katalog_wyjsciowy, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    znak = "✅" if manifest['udane'] == len(raporty) else "⚠"
+    print(f"{znak} Gotowe: {manifest['udane']}/{len(raporty)} raportów "
+          f"w {manifest['czas_calkowity']:.1f} s")
+    print(f"📁 Manifest: {os.path.abspath(os.path.join(katalog_wyjsciowy, 'manifest.json'))}")
+    return manifest
+
+def parsuj_argumenty(argv=None):
+    """Argumenty wiersza poleceń"""
+    parser = argparse.ArgumentParser(description="Generuje raport PDF z analizy rozkładu EW")
+    parser.add_argument('wyjscie', nargs='?', default='moj_raport.pdf',
+                        help="plik wynikowy PDF (domyślnie moj_raport.pdf)")
+    parser.add_argument('--sprawdz', action='store_true',
+                        help="tylko sprawdź, czy wymagane pliki istnieją")
+    parser.add_argument('--katalog-zasobow', default=None,
+                        help="katalog na obrazy jako pliki i kopię HTML")
+    parser.add_argument('--format', choices=('png', 'svg'), default='png',
+                        help="format wykresów i wzorów")
+    parser.add_argument('--rownolegle', action='store_true',
+                        help="rysuj wykresy i wzory w puli procesów")
+    parser.add_argument('--profile', metavar='PLIK', default=None,
+                        help="zapisz czasy, czas procesora i szczyt pamięci etapów do pliku")
+    parser.add_argument('--profile-format', choices=('chrome', 'json'), default='chrome',
+                        help="format śladu: chrome (chrome://tracing, Perfetto) albo json")
+    parser.add_argument('--profile-bez-pamieci', action='store_true',
+                        help="nie mierz pamięci (tracemalloc spowalnia alokacje)")
+
+    seria = parser.add_argument_group("seria raportów",
+                                      "podanie siatki lub pliku konfiguracji włącza tryb serii")
+    seria.add_argument('--alpha', type=float, nargs='+', help="wartości α siatki (domyślnie 2)")
+    seria.add_argument('--beta', type=float, nargs='+', help="wartości β siatki (domyślnie 4)")
+    seria.add_argument('--gamma', type=float, nargs='+', help="wartości γ siatki (domyślnie 3)")
+    seria.add_argument('--n', type=int, nargs='+', help="liczności n siatki (domyślnie 50)")
+    seria.add_argument('--konfiguracje', default=None,
+                       help="plik JSON z listą konfiguracji {alpha, beta, gamma, n}")
+    seria.add_argument('--katalog-serii', default='raporty',
+                       help="katalog na raporty serii i manifest.json")
+    seria.add_argument('--procesy', type=int, default=None,
+                       help="liczba procesów serii (domyślnie liczba rdzeni)")
+    seria.add_argument('--zgodnosc', type=int, default=0, metavar='B',
+                       help="testy zgodności KS/CvM/AD z B replikacjami bootstrapu (domyślnie bez)")
+    seria.add_argument('--seed', type=int, default=42,
+                       help="ziarno serii; konfiguracje dostają niezależne ziarna (domyślnie 42)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Funkcja główna"""
-    sukces = generuj_pdf("moj_raport.pdf")
+    argumenty = parsuj_argumenty(argv)
+    if argumenty.sprawdz:
+        if sprawdz_pliki():
+            print("✅ Wszystkie wymagane pliki są na miejscu")
+            return 0
+        return 1
+
+    if argumenty.konfiguracje is not None:
+        with open(argumenty.konfiguracje, 'r', encoding='utf-8') as f:
+            konfiguracje = json.load(f)
+    elif any(v is not None for v in (argumenty.alpha, argumenty.beta, argumenty.gamma, argumenty.n)):
+        konfiguracje = siatka_konfiguracji(argumenty.alpha or (2,), argumenty.beta or (4,),
+                                           argumenty.gamma or (3,), argumenty.n or (50,))
+    else:
+        konfiguracje = None
+    if konfiguracje is not None:
+        manifest = generuj_serie(konfiguracje, argumenty.katalog_serii, argumenty.procesy,
+                                 argumenty.format, argumenty.zgodnosc, argumenty.seed)
+        return 0 if manifest is not None and manifest['udane'] == len(konfiguracje) else 1
+
+    if argumenty.profile is not None:
+        profilowanie.wlacz(pamiec=not argumenty.profile_bez_pamieci)
+    try:
+        with etap('generuj_pdf', plik=argumenty.wyjscie):
+            sukces = generuj_pdf(argumenty.wyjscie, argumenty.katalog_zasobow,
+                                 argumenty.format, argumenty.rownolegle)
+    finally:
+        profiler = profilowanie.wylacz()
+        if profiler is not None:
+            profiler.zapisz(argumenty.profile, argumenty.profile_format)
+            print(f"⏱ Ślad profilowania: {os.path.abspath(argumenty.profile)}")
     
     if sukces:
         print("\n" + "=" * 60)
-        print("  ✅ Gotowe! Otwórz plik: moj_raport.pdf")
+        print(f"  ✅ Gotowe! Otwórz plik: {argumenty.wyjscie}")
         print("=" * 60)
     else:
         print("\n" + "=" * 60)
         print("  ❌ Wystąpił błąd podczas generowania")
         print("=" * 60)
+    return 0 if sukces else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
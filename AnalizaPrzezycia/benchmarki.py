@@ -0,0 +1,320 @@
+"""
+Benchmarki funkcji rozkładu EW, symulacji cenzurowania i budowy raportu
+Wyniki (najkrótszy i medianowy czas jednego wywołania) można zapisać jako
+bazę w JSON, a kolejne uruchomienia porównać z nią: spowolnienie ponad
+tolerancję kończy program kodem 1.
+
+Przykład:
+---------
+    python benchmarki.py --zapisz-baze baza.json
+    python benchmarki.py --porownaj baza.json --tolerancja 0.25
+"""
+
+import argparse
+import contextlib
+import functools
+import importlib.util
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+import raporcik1
+import raporcik2
+
+
+KATALOG = os.path.dirname(os.path.abspath(__file__))
+
+ROZMIARY_KERNELI = tuple(10**k for k in range(3, 9))
+ROZMIARY_SYMULACJI = (10, 100, 1000)
+
+
+def _zmierz(funkcja, powtorzenia=5):
+    """
+    Czas jednego wywołania: liczba wywołań dobierana tak, by pomiar trwał
+    co najmniej 0.2 s, najlepszy i medianowy wynik z kilku powtórzeń
+    """
+    timer = timeit.Timer(funkcja)
+    liczba, _ = timer.autorange()
+    czasy = [t / liczba for t in timer.repeat(repeat=powtorzenia, number=liczba)]
+    return {
+        'min_s': min(czasy),
+        'mediana_s': statistics.median(czasy),
+        'wywolania': liczba,
+        'powtorzenia': powtorzenia
+    }
+
+
+@contextlib.contextmanager
+def _bez_pamieci():
+    """
+    Wyłącza pamięć podręczną rysunków na czas pomiarów (ANALIZA_PAMIEC="" i
+    wykresy.PAMIEC = None, także gdy moduł był już zaimportowany), żeby
+    mierzone było rysowanie, a nie odczyt z dysku; potem przywraca stan
+    """
+    poprzednia = os.environ.get('ANALIZA_PAMIEC')
+    os.environ['ANALIZA_PAMIEC'] = ''
+    wykresy = sys.modules.get('wykresy')
+    if wykresy is not None:
+        pamiec, wykresy.PAMIEC = wykresy.PAMIEC, None
+    try:
+        yield
+    finally:
+        if poprzednia is None:
+            del os.environ['ANALIZA_PAMIEC']
+        else:
+            os.environ['ANALIZA_PAMIEC'] = poprzednia
+        if wykresy is not None:
+            wykresy.PAMIEC = pamiec
+        elif 'wykresy' in sys.modules:
+            # Zaimportowany w trakcie pomiarów: pamięć według przywróconej zmiennej
+            from pamiec_podreczna import domyslna
+            sys.modules['wykresy'].PAMIEC = domyslna()
+
+
+def _leniwie(utworz):
+    """Funkcja zwracająca wynik utworz(), liczony przy pierwszym wywołaniu"""
+    wynik = []
+
+    def pobierz():
+        if not wynik:
+            wynik.append(utworz())
+        return wynik[0]
+    return pobierz
+
+
+def _dane_kerneli(rozmiar):
+    rng = np.random.default_rng(rozmiar)
+    return {'x': rng.uniform(0.01, 10, rozmiar), 'p': rng.uniform(0, 1, rozmiar)}
+
+
+def _przygotuj(f, nazwa, dane):
+    x = dane()[nazwa]
+    return lambda: f(x, 2, 4, 3)
+
+
+def _przypadki_kerneli(max_rozmiar):
+    for rozmiar in ROZMIARY_KERNELI:
+        if rozmiar > max_rozmiar:
+            break
+        # Tablice powstają dopiero dla pierwszego wybranego przypadku danego rozmiaru
+        dane = _leniwie(functools.partial(_dane_kerneli, rozmiar))
+        for nazwa, funkcja, argument in (('dEW', raporcik1.dEW, 'x'), ('pEW', raporcik1.pEW, 'x'),
+                                         ('qEW', raporcik1.qEW, 'p'),
+                                         ('hazard_EW', raporcik1.hazard_EW, 'x'),
+                                         ('EW_kernel_pdf_cdf', raporcik1.EW_kernel, 'x')):
+            yield f'{nazwa}[{rozmiar}]', functools.partial(_przygotuj, funkcja, argument, dane)
+
+
+def _przypadki_symulacji():
+    lambdaa, alpha = 1.5, 2.0
+    for n in ROZMIARY_SYMULACJI:
+        m = max(1, 6 * n // 10)
+
+        def typ1(n=n):
+            np.random.seed(0)
+            return raporcik2.stats_type1(raporcik2.first_type_error(1.5, n, lambdaa, alpha), 1.5)
+
+        def typ2(n=n, m=m):
+            np.random.seed(0)
+            return raporcik2.stats_type2(raporcik2.second_type_error(m, n, lambdaa, alpha), m)
+
+        def losowe(n=n):
+            np.random.seed(0)
+            return raporcik2.stats_random(raporcik2.random_type_error(1.0, n, lambdaa, alpha))
+
+        yield f'typ1+stats[n={n}]', lambda f=typ1: f
+        yield f'typ2+stats[n={n}]', lambda f=typ2: f
+        yield f'losowe+stats[n={n}]', lambda f=losowe: f
+
+        # Wersje wsadowe: 1000 replikacji naraz
+        def typ1_batch(n=n):
+            czasy, _ = raporcik2.first_type_batch(1.5, n, 1000, lambdaa, alpha, rng=0)
+            return raporcik2.stats_type1_batch(czasy, 1.5)
+
+        def typ2_batch(n=n, m=m):
+            czasy, cenzura = raporcik2.second_type_batch(m, n, 1000, lambdaa, alpha, rng=0)
+            return raporcik2.stats_type2_batch(czasy, cenzura, n)
+
+        def losowe_batch(n=n):
+            czasy, flagi = raporcik2.random_type_batch(1.0, n, 1000, lambdaa, alpha, rng=0)
+            return raporcik2.stats_random_batch(czasy, flagi)
+
+        yield f'typ1_batch+stats[n={n},R=1000]', lambda f=typ1_batch: f
+        yield f'typ2_batch+stats[n={n},R=1000]', lambda f=typ2_batch: f
+        yield f'losowe_batch+stats[n={n},R=1000]', lambda f=losowe_batch: f
+
+
+def _modul_raportu():
+    """Moduł Raport1/AnalizaPrzezycia.py (nie leży w pakiecie, więc ładowany ze ścieżki)"""
+    sciezka = os.path.join(KATALOG, 'Raport1', 'AnalizaPrzezycia.py')
+    spec = importlib.util.spec_from_file_location('raport_pdf', sciezka)
+    modul = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modul)
+    return modul
+
+
+def _przypadki_raportu():
+    def wykres_kolowy():
+        import wykresy
+        dane = wykresy.generuj_dane()
+        return lambda: wykresy.wykres_kolowy(dane)
+
+    def szablon_wypelnij():
+        from szablony import SkompilowanySzablon
+        with open(os.path.join(KATALOG, 'szablon.html'), 'r', encoding='utf-8') as f:
+            szablon = SkompilowanySzablon(f.read())
+        wartosci = {nazwa: 'x' * 64 for nazwa in szablon.nazwy}
+        return lambda: szablon.wypelnij(wartosci)
+
+    def generuj_pdf():
+        if importlib.util.find_spec('weasyprint') is None:
+            print("⚠ Brak weasyprint - pomijam generuj_pdf")
+            return None
+        raport = _modul_raportu()
+        wyjscie = os.path.join(tempfile.mkdtemp(), 'raport.pdf')
+
+        def pomiar():
+            with contextlib.redirect_stdout(io.StringIO()):
+                if not raport.generuj_pdf(wyjscie):
+                    raise RuntimeError("generuj_pdf zwróciło False")
+        return pomiar
+
+    yield 'wykres_kolowy', wykres_kolowy
+    yield 'szablon_wypelnij', szablon_wypelnij
+    yield 'generuj_pdf', generuj_pdf
+
+
+def przypadki(max_rozmiar=10**7):
+    """
+    Iterator par (nazwa, przygotuj): przygotuj() tworzy dane przypadku i zwraca
+    mierzoną funkcję bez argumentów (albo None, gdy przypadek trzeba pominąć),
+    więc dane powstają tylko dla przypadków wybranych filtrem
+    """
+    yield from _przypadki_kerneli(max_rozmiar)
+    yield from _przypadki_symulacji()
+    yield from _przypadki_raportu()
+
+
+def uruchom(filtr=None, max_rozmiar=10**7, powtorzenia=5):
+    """
+    Uruchamia wybrane benchmarki
+
+    Parametry:
+    ----------
+    filtr : str, opcjonalnie
+        Wyrażenie regularne; mierzone są tylko pasujące nazwy
+    max_rozmiar : int
+        Największy rozmiar tablic dla funkcji rozkładu (10^8 wymaga kilku GB)
+    powtorzenia : int
+        Liczba powtórzeń pomiaru
+
+    Zwraca:
+    -------
+    dict : 'srodowisko' i 'wyniki' {nazwa: {'min_s', 'mediana_s', ...}}
+    """
+    wzorzec = re.compile(filtr) if filtr else None
+    wyniki = {}
+    # generuj_pdf i szablon czytają pliki względem katalogu roboczego
+    poprzedni = os.getcwd()
+    os.chdir(KATALOG)
+    try:
+        with _bez_pamieci():
+            for nazwa, przygotuj in przypadki(max_rozmiar):
+                if wzorzec is not None and not wzorzec.search(nazwa):
+                    continue
+                funkcja = przygotuj()
+                if funkcja is None:
+                    continue
+                wyniki[nazwa] = _zmierz(funkcja, powtorzenia)
+                print(f"   {nazwa:<40} {wyniki[nazwa]['min_s'] * 1e3:12.4f} ms")
+                del funkcja
+    finally:
+        os.chdir(poprzedni)
+    return {
+        'srodowisko': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platforma': platform.platform(),
+            'procesor': platform.processor() or platform.machine(),
+            'rdzenie': os.cpu_count()
+        },
+        'wyniki': wyniki
+    }
+
+
+def porownaj(baza, biezace, tolerancja=0.2):
+    """
+    Porównuje najkrótsze czasy z bazą
+
+    Parametry:
+    ----------
+    baza, biezace : dict
+        Wyniki uruchom() (lub wczytane z JSON)
+    tolerancja : float
+        Dopuszczalny względny wzrost czasu (0.2 = 20%); baza może nadpisać
+        go dla pojedynczego przypadku kluczem 'tolerancja'
+
+    Zwraca:
+    -------
+    list : Nazwy przypadków, które zwolniły ponad tolerancję
+    """
+    regresje = []
+    for nazwa, wynik in biezace['wyniki'].items():
+        odniesienie = baza['wyniki'].get(nazwa)
+        if odniesienie is None:
+            print(f"   {nazwa:<40} (brak w bazie)")
+            continue
+        zmiana = wynik['min_s'] / odniesienie['min_s'] - 1
+        dopuszczalna = odniesienie.get('tolerancja', tolerancja)
+        regresja = zmiana > dopuszczalna
+        if regresja:
+            regresje.append(nazwa)
+        print(f"   {nazwa:<40} {odniesienie['min_s'] * 1e3:12.4f} ms -> "
+              f"{wynik['min_s'] * 1e3:12.4f} ms  {zmiana:+7.1%}  {'❌' if regresja else '✅'}")
+    return regresje
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki funkcji EW, symulacji i raportu")
+    parser.add_argument('--filtr', default=None, help="wyrażenie regularne wybierające przypadki")
+    parser.add_argument('--max-rozmiar', type=int, default=10**7,
+                        help="największy rozmiar tablic dla funkcji rozkładu (do 10^8)")
+    parser.add_argument('--powtorzenia', type=int, default=5, help="liczba powtórzeń pomiaru")
+    parser.add_argument('--zapisz-baze', metavar='PLIK', default=None,
+                        help="zapisz wyniki jako bazę w JSON")
+    parser.add_argument('--porownaj', metavar='PLIK', default=None,
+                        help="porównaj z bazą i zakończ kodem 1 przy regresji")
+    parser.add_argument('--tolerancja', type=float, default=0.2,
+                        help="dopuszczalny względny wzrost czasu (domyślnie 0.2)")
+    argumenty = parser.parse_args(argv)
+
+    print("⏱ Pomiary:")
+    biezace = uruchom(argumenty.filtr, argumenty.max_rozmiar, argumenty.powtorzenia)
+
+    if argumenty.zapisz_baze is not None:
+        with open(argumenty.zapisz_baze, 'w', encoding='utf-8') as f:
+            json.dump(biezace, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baza zapisana: {os.path.abspath(argumenty.zapisz_baze)}")
+
+    if argumenty.porownaj is not None:
+        with open(argumenty.porownaj, 'r', encoding='utf-8') as f:
+            baza = json.load(f)
+        print("\n📊 Porównanie z bazą:")
+        regresje = porownaj(baza, biezace, argumenty.tolerancja)
+        if regresje:
+            print(f"\n❌ Regresje ({len(regresje)}): {', '.join(regresje)}")
+            return 1
+        print("\n✅ Brak regresji")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Kolumnowy format danych przeżycia na dysku, czytany przez np.memmap
+Plik to 64-bajtowy nagłówek i trzy ciągłe kolumny: czas (float64),
+status (uint8, 1 = obserwacja cenzurowana, jak w raporcik2) i opcjonalnie
+grupa (int32). Kolumny są wyrównane do 64 bajtów, więc widoki memmap można
+przekazywać wprost do stats_*, kaplan_meier czy dopasuj_EW bez kopiowania
+do list Pythona.
+"""
+
+import argparse
+import itertools
+import os
+import struct
+import warnings
+
+import numpy as np
+
+
+MAGIA = b'ANPRZEZ\x00'
+WERSJA = 1
+# magia, wersja, flagi (bit 0: jest kolumna grupy), n, przesunięcia kolumn
+FORMAT_NAGLOWKA = '<8sHHxxxxQQQQ'
+ROZMIAR_NAGLOWKA = 64
+WYROWNANIE = 64
+
+KOLUMNY = (('czas', np.float64), ('status', np.uint8), ('grupa', np.int32))
+
+
+def _wyrownaj(przesuniecie):
+    return -(-przesuniecie // WYROWNANIE) * WYROWNANIE
+
+
+def _zapisz_naglowek(f, n, przesuniecia, grupy):
+    naglowek = struct.pack(FORMAT_NAGLOWKA, MAGIA, WERSJA, int(grupy), n, *przesuniecia)
+    f.seek(0)
+    f.write(naglowek.ljust(ROZMIAR_NAGLOWKA, b'\x00'))
+
+
+def _czytaj_naglowek(sciezka):
+    with open(sciezka, 'rb') as f:
+        surowy = f.read(ROZMIAR_NAGLOWKA)
+    if len(surowy) < ROZMIAR_NAGLOWKA:
+        raise ValueError(f"{sciezka}: plik jest za krótki na nagłówek")
+    magia, wersja, flagi, n, *przesuniecia = struct.unpack_from(FORMAT_NAGLOWKA, surowy)
+    if magia != MAGIA:
+        raise ValueError(f"{sciezka}: to nie jest plik kolumnowy danych przeżycia")
+    if wersja != WERSJA:
+        raise ValueError(f"{sciezka}: nieobsługiwana wersja formatu {wersja}")
+    return n, przesuniecia, bool(flagi & 1)
+
+
+def utworz_kolumny(sciezka, n, grupy=False):
+    """
+    Tworzy pusty plik na n wierszy i zwraca zapisywalne widoki kolumn
+
+    Parametry:
+    ----------
+    sciezka : str
+        Plik wynikowy
+    n : int
+        Liczba wierszy
+    grupy : bool
+        Czy plik ma kolumnę grupy
+
+    Zwraca:
+    -------
+    dict : 'czas', 'status', 'grupa' (None, gdy bez grup) jako np.memmap w trybie r+
+    """
+    przesuniecia = []
+    koniec = ROZMIAR_NAGLOWKA
+    for _, typ in KOLUMNY:
+        przesuniecia.append(_wyrownaj(koniec))
+        koniec = przesuniecia[-1] + n * np.dtype(typ).itemsize
+    if not grupy:
+        przesuniecia[-1] = 0
+        koniec = przesuniecia[1] + n
+    with open(sciezka, 'wb') as f:
+        _zapisz_naglowek(f, n, przesuniecia, grupy)
+        f.truncate(koniec)
+    return otworz_kolumny(sciezka, tryb='r+')
+
+
+def otworz_kolumny(sciezka, tryb='r'):
+    """
+    Otwiera plik kolumnowy bez wczytywania danych do pamięci
+
+    Parametry:
+    ----------
+    sciezka : str
+        Plik utworzony przez utworz_kolumny / zapisz_kolumny / csv_do_kolumn
+    tryb : str
+        'r' (tylko odczyt), 'r+' (zapis w miejscu) albo 'c' (kopia przy zapisie)
+
+    Zwraca:
+    -------
+    dict : 'czas' (float64), 'status' (uint8), 'grupa' (int32 albo None) - np.memmap
+    """
+    n, przesuniecia, grupy = _czytaj_naglowek(sciezka)
+    kolumny = {}
+    for (nazwa, typ), przesuniecie in zip(KOLUMNY, przesuniecia):
+        if nazwa == 'grupa' and not grupy:
+            kolumny[nazwa] = None
+        elif n == 0:
+            # np.memmap nie obsługuje pustych map
+            kolumny[nazwa] = np.empty(0, dtype=typ)
+        else:
+            kolumny[nazwa] = np.memmap(sciezka, dtype=typ, mode=tryb, offset=przesuniecie, shape=(n,))
+    return kolumny
+
+
+def zapisz_kolumny(sciezka, czasy, status, grupy=None, porcja=1 << 22):
+    """
+    Zapisuje tablice (lub memmapy) czasów, statusów i grup do pliku kolumnowego
+
+    Parametry:
+    ----------
+    sciezka : str
+        Plik wynikowy
+    czasy : array-like
+        Czasy obserwacji
+    status : array-like
+        Flagi cenzurowania (1 = cenzurowana)
+    grupy : array-like, opcjonalnie
+        Numery grup (np. ramion badania)
+    porcja : int
+        Liczba wierszy kopiowanych naraz
+    """
+    n = len(czasy)
+    if len(status) != n or (grupy is not None and len(grupy) != n):
+        raise ValueError("Kolumny muszą mieć tę samą długość")
+    kolumny = utworz_kolumny(sciezka, n, grupy is not None)
+    for s in range(0, n, porcja):
+        kolumny['czas'][s:s + porcja] = czasy[s:s + porcja]
+        kolumny['status'][s:s + porcja] = status[s:s + porcja]
+        if grupy is not None:
+            kolumny['grupa'][s:s + porcja] = grupy[s:s + porcja]
+    for kolumna in kolumny.values():
+        if isinstance(kolumna, np.memmap):
+            kolumna.flush()
+
+
+def porcje_kolumn(zrodlo, rozmiar=1 << 20):
+    """
+    Kolejne porcje wierszy jako widoki (bez kopiowania)
+
+    Parametry:
+    ----------
+    zrodlo : str lub dict
+        Ścieżka do pliku albo wynik otworz_kolumny
+    rozmiar : int
+        Liczba wierszy w porcji
+
+    Zwraca:
+    -------
+    iterator dict : 'czas', 'status', 'grupa' dla kolejnych porcji
+    """
+    kolumny = otworz_kolumny(zrodlo) if isinstance(zrodlo, (str, os.PathLike)) else zrodlo
+    n = len(kolumny['czas'])
+    for s in range(0, n, rozmiar):
+        yield {nazwa: None if k is None else k[s:s + rozmiar] for nazwa, k in kolumny.items()}
+
+
+def _policz_wiersze(sciezka, blok=1 << 24):
+    """Liczba linii pliku (ostatnia linia nie musi kończyć się znakiem nowej linii)"""
+    linie = 0
+    ostatni = b'\n'
+    with open(sciezka, 'rb') as f:
+        while True:
+            dane = f.read(blok)
+            if not dane:
+                break
+            linie += dane.count(b'\n')
+            ostatni = dane[-1:]
+    return linie + (ostatni != b'\n')
+
+
+def csv_do_kolumn(sciezka_csv, sciezka_wyjscia, czas='time', status='status', grupa=None,
+                  separator=',', status_zdarzenie=False, porcja=1 << 20):
+    """
+    Konwertuje CSV z nagłówkiem do pliku kolumnowego, porcja po porcji
+
+    Parametry:
+    ----------
+    sciezka_csv : str
+        Plik wejściowy (pierwsza linia to nazwy kolumn)
+    sciezka_wyjscia : str
+        Plik kolumnowy
+    czas, status, grupa : str
+        Nazwy kolumn CSV; grupa opcjonalna (wartości całkowite)
+    separator : str
+        Separator pól
+    status_zdarzenie : bool
+        Czy w CSV 1 oznacza zdarzenie (wtedy status jest odwracany,
+        bo w pliku kolumnowym 1 = obserwacja cenzurowana)
+    porcja : int
+        Liczba wierszy parsowanych naraz
+
+    Zwraca:
+    -------
+    int : Liczba zapisanych wierszy
+    """
+    # Górne ograniczenie liczby wierszy; puste linie są pomijane przy parsowaniu,
+    # a prawdziwe n trafia na koniec do nagłówka (przesunięcia kolumn się nie zmieniają)
+    n_max = max(_policz_wiersze(sciezka_csv) - 1, 0)
+    kolumny = utworz_kolumny(sciezka_wyjscia, n_max, grupa is not None)
+
+    with open(sciezka_csv, 'r', encoding='utf-8') as f:
+        nazwy = [nazwa.strip() for nazwa in f.readline().rstrip('\r\n').split(separator)]
+        wybrane = [czas, status] + ([grupa] if grupa is not None else [])
+        brakujace = [nazwa for nazwa in wybrane if nazwa not in nazwy]
+        if brakujace:
+            raise ValueError(f"Brak kolumn w {sciezka_csv}: {', '.join(brakujace)}")
+        indeksy = [nazwy.index(nazwa) for nazwa in wybrane]
+
+        n = 0
+        while True:
+            linie = list(itertools.islice(f, porcja))
+            if not linie:
+                break
+            with warnings.catch_warnings():
+                # Porcja złożona z samych pustych linii nie jest błędem
+                warnings.simplefilter('ignore', UserWarning)
+                blok = np.loadtxt(linie, delimiter=separator, usecols=indeksy,
+                                  ndmin=2, dtype=np.float64)
+            k = blok.shape[0] if blok.size else 0
+            if k == 0:
+                # Same puste linie
+                continue
+            flagi = blok[:, 1]
+            if not np.isin(flagi, (0, 1)).all():
+                raise ValueError(f"Status musi być 0 lub 1 (wiersze {n + 1}-{n + k})")
+            kolumny['czas'][n:n + k] = blok[:, 0]
+            kolumny['status'][n:n + k] = 1 - flagi if status_zdarzenie else flagi
+            if grupa is not None:
+                kolumny['grupa'][n:n + k] = blok[:, 2]
+            n += k
+
+    for kolumna in kolumny.values():
+        if isinstance(kolumna, np.memmap):
+            kolumna.flush()
+    del kolumny
+    if n != n_max:
+        _, przesuniecia, grupy = _czytaj_naglowek(sciezka_wyjscia)
+        with open(sciezka_wyjscia, 'r+b') as f:
+            _zapisz_naglowek(f, n, przesuniecia, grupy)
+    return n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konwersja CSV do kolumnowego pliku danych przeżycia")
+    parser.add_argument('csv', help="plik wejściowy CSV z nagłówkiem")
+    parser.add_argument('wyjscie', help="plik kolumnowy")
+    parser.add_argument('--czas', default='time', help="kolumna czasu (domyślnie time)")
+    parser.add_argument('--status', default='status', help="kolumna statusu (domyślnie status)")
+    parser.add_argument('--grupa', default=None, help="kolumna grupy (liczby całkowite)")
+    parser.add_argument('--separator', default=',', help="separator pól")
+    parser.add_argument('--zdarzenie', action='store_true',
+                        help="w CSV status 1 oznacza zdarzenie, a nie cenzurowanie")
+    argumenty = parser.parse_args()
+    n = csv_do_kolumn(argumenty.csv, argumenty.wyjscie, argumenty.czas, argumenty.status,
+                      argumenty.grupa, argumenty.separator, argumenty.zdarzenie)
+    print(f"✅ Zapisano {n} wierszy do {os.path.abspath(argumenty.wyjscie)}")
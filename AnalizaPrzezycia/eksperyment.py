@@ -0,0 +1,152 @@
+"""
+Równoległe uruchamianie eksperymentów Monte Carlo dla danych cenzurowanych
+Replikacje są dzielone na porcje o stałym rozmiarze, a każda porcja dostaje
+własne ziarno z SeedSequence.spawn - wynik nie zależy od liczby procesów
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import raporcik2
+
+
+SCHEMATY = ('type1', 'type2', 'random')
+
+
+def sprawdz_specyfikacje(spec):
+    """
+    Uzupełnia i sprawdza specyfikację eksperymentu
+
+    Parametry:
+    ----------
+    spec : dict
+        Klucze: 'scheme' ('type1', 'type2' lub 'random'), 'n', 'replications',
+        opcjonalnie 'lambdaa', 'alpha', 'seed' oraz parametr schematu:
+        't0' dla 'type1', 'm' dla 'type2', 'eta' dla 'random'
+
+    Zwraca:
+    -------
+    dict : Pełna specyfikacja z wartościami domyślnymi
+    """
+    pelna = {'lambdaa': 1, 'alpha': 1, 'seed': 0}
+    pelna.update(spec)
+    parametr = {'type1': 't0', 'type2': 'm', 'random': 'eta'}
+    if pelna.get('scheme') not in SCHEMATY:
+        raise ValueError(f"Nieznany schemat cenzurowania: {pelna.get('scheme')!r}")
+    for klucz in ('n', 'replications', parametr[pelna['scheme']]):
+        if klucz not in pelna:
+            raise ValueError(f"Brak parametru '{klucz}' w specyfikacji")
+    return pelna
+
+
+def _porcja(spec, ziarno, rozmiar):
+    """Generuje jedną porcję replikacji i zwraca słownik tablic statystyk"""
+    rng = np.random.default_rng(ziarno)
+    wspolne = dict(n=spec['n'], replications=rozmiar,
+                   lambdaa=spec['lambdaa'], alpha=spec['alpha'], rng=rng)
+    if spec['scheme'] == 'type1':
+        times, _ = raporcik2.first_type_batch(spec['t0'], **wspolne)
+        return raporcik2.stats_type1_batch(times, spec['t0'])
+    if spec['scheme'] == 'type2':
+        times, censoring = raporcik2.second_type_batch(spec['m'], **wspolne)
+        return raporcik2.stats_type2_batch(times, censoring, spec['n'])
+    times, flags = raporcik2.random_type_batch(spec['eta'], **wspolne)
+    return raporcik2.stats_random_batch(times, flags)
+
+
+def uruchom_eksperyment(spec, procesy=None, rozmiar_porcji=10000, katalog=None):
+    """
+    Uruchamia eksperyment Monte Carlo w puli procesów
+
+    Parametry:
+    ----------
+    spec : dict
+        Specyfikacja eksperymentu (patrz sprawdz_specyfikacje)
+    procesy : int, opcjonalnie
+        Liczba procesów; domyślnie wszystkie rdzenie, 1 = bez puli
+    rozmiar_porcji : int
+        Liczba replikacji w jednej porcji (wpływa na strumienie losowe,
+        więc przy wznawianiu musi pozostać taki sam)
+    katalog : str, opcjonalnie
+        Katalog na zapisane porcje; gotowe porcje są wczytywane zamiast
+        liczone ponownie, co pozwala wznowić przerwane badanie
+
+    Zwraca:
+    -------
+    dict : Statystyki stats_type1/stats_type2/stats_random jako tablice
+           długości spec['replications']
+    """
+    spec = sprawdz_specyfikacje(spec)
+    liczba = spec['replications']
+    rozmiary = [min(rozmiar_porcji, liczba - start)
+                for start in range(0, liczba, rozmiar_porcji)]
+    ziarna = np.random.SeedSequence(spec['seed']).spawn(len(rozmiary))
+
+    wyniki = [None] * len(rozmiary)
+    if katalog is not None:
+        _przygotuj_katalog(katalog, spec, rozmiar_porcji)
+        for i in range(len(rozmiary)):
+            sciezka = _sciezka_porcji(katalog, i)
+            if os.path.exists(sciezka):
+                with np.load(sciezka) as plik:
+                    wyniki[i] = {k: plik[k] for k in plik.files}
+
+    brakujace = [i for i, w in enumerate(wyniki) if w is None]
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+
+    if procesy == 1 or len(brakujace) <= 1:
+        for i in brakujace:
+            wyniki[i] = _porcja(spec, ziarna[i], rozmiary[i])
+            _zapisz_porcje(katalog, i, wyniki[i])
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesy, len(brakujace))) as pula:
+            zadania = {pula.submit(_porcja, spec, ziarna[i], rozmiary[i]): i
+                       for i in brakujace}
+            for zadanie in as_completed(zadania):
+                i = zadania[zadanie]
+                wyniki[i] = zadanie.result()
+                _zapisz_porcje(katalog, i, wyniki[i])
+
+    if not wyniki:
+        return {}
+    return {k: np.concatenate([w[k] for w in wyniki]) for k in wyniki[0]}
+
+
+def _sciezka_porcji(katalog, i):
+    return os.path.join(katalog, f'porcja_{i:06d}.npz')
+
+
+def _przygotuj_katalog(katalog, spec, rozmiar_porcji):
+    """Zapisuje specyfikację lub sprawdza, czy zgadza się z zapisaną wcześniej"""
+    os.makedirs(katalog, exist_ok=True)
+    opis = dict(spec, rozmiar_porcji=rozmiar_porcji)
+    sciezka = os.path.join(katalog, 'spec.json')
+    if os.path.exists(sciezka):
+        with open(sciezka, 'r', encoding='utf-8') as f:
+            zapisana = json.load(f)
+        if zapisana != json.loads(json.dumps(opis)):
+            raise ValueError(f"Katalog {katalog} zawiera porcje innego eksperymentu")
+    else:
+        with open(sciezka, 'w', encoding='utf-8') as f:
+            json.dump(opis, f, indent=2)
+
+
+def _zapisz_porcje(katalog, i, wynik):
+    if katalog is None:
+        return
+    # Zapis do pliku tymczasowego i podmiana - przerwanie nie zostawi połowy porcji
+    sciezka = _sciezka_porcji(katalog, i)
+    tymczasowa = sciezka + '.tmp.npz'
+    np.savez(tymczasowa, **wynik)
+    os.replace(tymczasowa, sciezka)
+
+
+if __name__ == "__main__":
+    wynik = uruchom_eksperyment({'scheme': 'random', 'n': 20, 'lambdaa': 1.5,
+                                 'alpha': 2.0, 'eta': 1.0,
+                                 'replications': 100000, 'seed': 42})
+    print({k: float(np.nanmean(v)) for k, v in wynik.items()})
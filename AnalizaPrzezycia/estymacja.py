@@ -0,0 +1,243 @@
+"""
+Estymacja parametrów rozkładu EW(α, β, γ) metodą największej wiarygodności
+dla danych cenzurowanych: log-gęstość dla zdarzeń, log-przeżycie dla
+obserwacji cenzurowanych. Wiele replikacji jest dopasowywanych naraz
+jednym, wektorowym BFGS (każda replikacja ma osobną macierz 3x3).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _log_w(z):
+    """log(1 - e^(-z)) liczony stabilnie dla małych i dużych z"""
+    z = np.asarray(z)
+    with np.errstate(divide='ignore'):
+        return np.where(z > np.log(2), np.log1p(-np.exp(-z)), np.log(-np.expm1(-z)))
+
+
+def loglik_EW(theta, czasy, cenzura=None, gradient=True):
+    """
+    Średnia log-wiarygodność EW dla danych cenzurowanych i jej gradient
+
+    Parametry:
+    ----------
+    theta : np.ndarray
+        Macierz (R, 3) parametrów log(α), log(β), log(γ)
+    czasy : np.ndarray
+        Macierz (R, n) czasów (dodatnich)
+    cenzura : np.ndarray, opcjonalnie
+        Macierz (R, n) flag cenzurowania (1 = cenzurowana, jak w raporcik2)
+    gradient : bool
+        Czy liczyć gradient względem theta
+
+    Zwraca:
+    -------
+    np.ndarray lub (np.ndarray, np.ndarray) : wartości (R,) i gradient (R, 3)
+    """
+    alpha, beta, gamma = (np.exp(theta[:, i])[:, None] for i in range(3))
+    L = np.log(czasy / beta)
+    z = np.exp(alpha * L)
+    log_w = _log_w(z)
+    G = gamma * log_w
+    zdarzenie = np.ones(czasy.shape, dtype=bool) if cenzura is None else ~np.asarray(cenzura, dtype=bool)
+
+    with np.errstate(divide='ignore', over='ignore'):
+        log_f = np.log(alpha * gamma / beta) + (alpha - 1) * L - z + (gamma - 1) * log_w
+        log_S = np.log(-np.expm1(G))
+    wartosc = np.where(zdarzenie, log_f, log_S).mean(axis=1)
+    if not gradient:
+        return wartosc
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # r*z = z/(e^z - 1): pochodna log(w) po log(z)
+        rz = np.where(z > 1e-12, z / np.expm1(z), 1.0)
+        # dlog(S)/dG = -F/S = -1/(e^(-G) - 1)
+        q = -1 / np.expm1(-G)
+    aL = alpha * L
+    d_a = np.where(zdarzenie, 1 + aL * (1 - z + (gamma - 1) * rz), q * gamma * rz * aL)
+    d_b = np.where(zdarzenie, alpha * (z - 1 - (gamma - 1) * rz), -q * gamma * rz * alpha)
+    d_c = np.where(zdarzenie, 1 + G, q * G)
+    grad = np.stack([d_a.mean(axis=1), d_b.mean(axis=1), d_c.mean(axis=1)], axis=1)
+    return wartosc, grad
+
+
+def punkt_startowy(czasy):
+    """
+    Start z danych: momenty logarytmów dla rozkładu Weibulla (γ = 1)
+
+    Zwraca:
+    -------
+    np.ndarray : Macierz (R, 3) w parametryzacji log(α), log(β), log(γ)
+    """
+    logi = np.log(czasy)
+    odch = np.std(logi, axis=1)
+    alpha0 = np.pi / (np.sqrt(6) * np.maximum(odch, 1e-8))
+    log_beta0 = logi.mean(axis=1) + np.euler_gamma / alpha0
+    return np.stack([np.log(alpha0), log_beta0, np.zeros_like(alpha0)], axis=1)
+
+
+def _bfgs(czasy, cenzura, theta, tol, max_iter):
+    """Wektorowy BFGS minimalizujący -loglik osobno w każdym wierszu"""
+    R = theta.shape[0]
+    theta = theta.copy()
+    H = np.broadcast_to(np.eye(3), (R, 3, 3)).copy()
+    f, g = loglik_EW(theta, czasy, cenzura)
+    f, g = -f, -g
+    zbiezne = np.max(np.abs(g), axis=1) < tol
+    iteracje = np.zeros(R, dtype=int)
+    pierwszy = np.ones(R, dtype=bool)
+
+    for _ in range(max_iter):
+        akt = np.flatnonzero(~zbiezne & np.isfinite(f))
+        if akt.size == 0:
+            break
+        iteracje[akt] += 1
+        x, c = czasy[akt], None if cenzura is None else cenzura[akt]
+        p = -np.einsum('rij,rj->ri', H[akt], g[akt])
+        # Gdy kierunek nie jest spadkowy, wracamy do gradientu
+        reset = ~(np.sum(p * g[akt], axis=1) < 0)
+        p[reset] = -g[akt][reset]
+        # Krok w skali logarytmicznej nie większy niż 1
+        p /= np.maximum(1, np.max(np.abs(p), axis=1))[:, None]
+        nachylenie = np.sum(p * g[akt], axis=1)
+
+        # Backtracking z warunkiem Armijo, wspólny dla wszystkich wierszy
+        t = np.ones(akt.size)
+        f_nowe = np.empty(akt.size)
+        g_nowe = np.empty((akt.size, 3))
+        czeka = np.ones(akt.size, dtype=bool)
+        for _ in range(40):
+            j = np.flatnonzero(czeka)
+            if j.size == 0:
+                break
+            proba = theta[akt[j]] + t[j, None] * p[j]
+            fj, gj = loglik_EW(proba, x[j], None if c is None else c[j])
+            fj, gj = -fj, -gj
+            ok = np.isfinite(fj) & (fj <= f[akt[j]] + 1e-4 * t[j] * nachylenie[j])
+            f_nowe[j[ok]], g_nowe[j[ok]] = fj[ok], gj[ok]
+            czeka[j[ok]] = False
+            t[j[~ok]] *= 0.5
+        udany = ~czeka
+        if not udany.any():
+            zbiezne[akt] = True
+            break
+
+        a = akt[udany]
+        s = t[udany, None] * p[udany]
+        y = g_nowe[udany] - g[a]
+        sy = np.sum(s * y, axis=1)
+        dobre = sy > 1e-12
+        # Skalowanie Shanno przed pierwszą aktualizacją
+        skala = np.where(pierwszy[a] & dobre, sy / np.maximum(np.sum(y * y, axis=1), 1e-300), 1.0)
+        Ha = H[a] * skala[:, None, None]
+        rho = np.where(dobre, 1 / np.where(dobre, sy, 1), 0.0)
+        I = np.eye(3)
+        A = I - rho[:, None, None] * s[:, :, None] * y[:, None, :]
+        Ha = np.where(dobre[:, None, None],
+                      A @ Ha @ A.transpose(0, 2, 1) + rho[:, None, None] * s[:, :, None] * s[:, None, :],
+                      Ha)
+        H[a] = Ha
+        pierwszy[a] &= ~dobre
+
+        theta[a] += s
+        spadek = f[a] - f_nowe[udany]
+        f[a], g[a] = f_nowe[udany], g_nowe[udany]
+        zbiezne[a] = (np.max(np.abs(g[a]), axis=1) < tol) | (spadek < 1e-15 * np.maximum(1, np.abs(f[a])))
+        # Wiersze, w których nie udał się żaden krok, kończymy
+        zbiezne[akt[~udany]] = True
+
+    zbiezne &= np.max(np.abs(g), axis=1) < np.sqrt(tol)
+    return theta, -f, zbiezne, iteracje
+
+
+def _dopasuj_porcje(czasy, cenzura, start, tol, max_iter):
+    theta0 = punkt_startowy(czasy) if start is None else start
+    theta, ll, zbiezne, iteracje = _bfgs(czasy, cenzura, theta0, tol, max_iter)
+
+    # Ciepły start: niezbieżne replikacje startują jeszcze raz z rozwiązania
+    # najbliższej sąsiedniej replikacji, która się zbiegła
+    zle = np.flatnonzero(~zbiezne)
+    dobre = np.flatnonzero(zbiezne)
+    if zle.size and dobre.size:
+        sasiad = dobre[np.clip(np.searchsorted(dobre, zle), 0, dobre.size - 1)]
+        c = None if cenzura is None else cenzura[zle]
+        t2, ll2, z2, it2 = _bfgs(czasy[zle], c, theta[sasiad], tol, max_iter)
+        lepsze = ll2 > ll[zle]
+        theta[zle[lepsze]], ll[zle[lepsze]] = t2[lepsze], ll2[lepsze]
+        zbiezne[zle] = z2 | zbiezne[zle]
+        iteracje[zle] += it2
+    return theta, ll, zbiezne, iteracje
+
+
+def dopasuj_EW_batch(czasy, cenzura=None, start=None, procesy=1, tol=1e-8, max_iter=500):
+    """
+    Dopasowuje EW(α, β, γ) do wielu replikacji naraz
+
+    Parametry:
+    ----------
+    czasy : np.ndarray
+        Macierz (R, n) czasów, jeden wiersz na replikację
+    cenzura : np.ndarray, opcjonalnie
+        Macierz (R, n) flag cenzurowania (1 = cenzurowana)
+    start : array-like, opcjonalnie
+        Punkt startowy (α, β, γ) wspólny (3,) lub osobny (R, 3), np. wynik
+        dopasowania sąsiedniej konfiguracji; domyślnie start z danych
+    procesy : int
+        Liczba procesów; wiersze są dzielone na równe porcje
+    tol : float
+        Tolerancja normy gradientu średniej log-wiarygodności
+    max_iter : int
+        Maksymalna liczba iteracji BFGS
+
+    Zwraca:
+    -------
+    dict : 'alpha', 'beta', 'gamma', 'loglik' (suma), 'zbiezne', 'iteracje' - tablice (R,)
+    """
+    czasy = np.atleast_2d(np.asarray(czasy, dtype=float))
+    if cenzura is not None:
+        cenzura = np.atleast_2d(np.asarray(cenzura)).astype(bool)
+    R = czasy.shape[0]
+    if start is not None:
+        start = np.log(np.broadcast_to(np.asarray(start, dtype=float), (R, 3)))
+
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+    if procesy > 1 and R > 1:
+        granice = np.linspace(0, R, min(procesy, R) + 1).astype(int)
+        kawalki = [slice(a, b) for a, b in zip(granice[:-1], granice[1:])]
+        with ProcessPoolExecutor(max_workers=len(kawalki)) as pula:
+            zadania = [pula.submit(_dopasuj_porcje, czasy[k],
+                                   None if cenzura is None else cenzura[k],
+                                   None if start is None else start[k], tol, max_iter)
+                       for k in kawalki]
+            czesci = [z.result() for z in zadania]
+        theta, ll, zbiezne, iteracje = (np.concatenate(c) for c in zip(*czesci))
+    else:
+        theta, ll, zbiezne, iteracje = _dopasuj_porcje(czasy, cenzura, start, tol, max_iter)
+
+    parametry = np.exp(theta)
+    return {
+        'alpha': parametry[:, 0],
+        'beta': parametry[:, 1],
+        'gamma': parametry[:, 2],
+        'loglik': ll * czasy.shape[1],
+        'zbiezne': zbiezne,
+        'iteracje': iteracje
+    }
+
+
+def dopasuj_EW(czasy, cenzura=None, start=None):
+    """
+    Dopasowuje EW(α, β, γ) do jednej próby
+
+    Zwraca:
+    -------
+    dict : 'alpha', 'beta', 'gamma', 'loglik', 'zbiezne', 'iteracje' jako skalary
+    """
+    wynik = dopasuj_EW_batch(np.asarray(czasy, dtype=float)[None, :],
+                             None if cenzura is None else np.asarray(cenzura)[None, :],
+                             start)
+    return {k: v[0].item() for k, v in wynik.items()}
@@ -0,0 +1,252 @@
+"""
+Próbnik Gibbsa dla wielu łańcuchów naraz (testy/script3.R)
+K niezależnych łańcuchów jest przesuwanych jednocześnie, a każdy krok to
+operacja na całej macierzy stanów (K, d). Próbki trafiają do bufora
+(iteracje, K, d) zaalokowanego z góry (opcjonalnie np.memmap w pliku .npy).
+Po każdym bloku iteracji zapisywane są tylko skumulowane sumy x i x^2 dla
+każdego łańcucha; z nich R-hat, efektywna liczność próby (batch means)
+i długość burn-in (test Gewekego) są liczone bez ponownego czytania bufora.
+"""
+
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+
+# Najmniejsza liczba łańcuchów: R-hat porównuje łańcuchy, a błędy standardowe
+# burn-in i ESS pochodzą z batch means wewnątrz łańcuchów (K·(paczki - 1)
+# stopni swobody), więc wystarczają dwa
+MIN_LANCUCHOW = 2
+
+# Liczba paczek (batch means) w oknie na łańcuch
+PACZKI = 25
+
+
+def krok_normalny(rho):
+    """
+    Krok Gibbsa dla dwuwymiarowego rozkładu normalnego o standardowych
+    brzegach i korelacji rho: X1 | X2 ~ N(rho·X2, 1 - rho^2) i odwrotnie
+    """
+    odchylenie = np.sqrt(1 - rho**2)
+
+    def krok(stan, rng):
+        szum = rng.standard_normal((2, stan.shape[0]))
+        szum *= odchylenie
+        stan[:, 0] = rho * stan[:, 1] + szum[0]
+        stan[:, 1] = rho * stan[:, 0] + szum[1]
+
+    return krok
+
+
+def _kwantyl_t(p, df):
+    """
+    Kwantyl rozkładu t-Studenta z rozwinięcia Cornisha-Fishera wokół
+    kwantyla normalnego (błąd poniżej 1% dla df >= 10)
+    """
+    z = NormalDist().inv_cdf(p)
+    return (z + (z**3 + z) / (4 * df) + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3))
+
+
+def _batch_means(sumy, granice, od, do):
+    """
+    Wariancja asymptotyczna średniej (σ^2 w var(średnia z N) ≈ σ^2 / N)
+    z batch means w oknie bloków [od, do), wspólna dla wszystkich łańcuchów
+
+    Okno dzielone jest na najwyżej PACZKI paczek kolejnych bloków (nadmiar
+    bloków z początku okna jest pomijany); odchylenia średnich paczek od
+    średniej łańcucha są sumowane po łańcuchach.
+
+    Zwraca:
+    -------
+    tuple : σ^2 (d,) i liczba stopni swobody K·(paczki - 1)
+    """
+    K = sumy.shape[1]
+    liczba = min(PACZKI, do - od)
+    rozmiar = (do - od) // liczba
+    indeksy = do - rozmiar * np.arange(liczba, -1, -1)
+    dlugosci = np.diff(granice[indeksy])[:, None, None]
+    srednie = np.diff(sumy[indeksy], axis=0) / dlugosci
+    srednia = (sumy[do] - sumy[indeksy[0]]) / (granice[do] - granice[indeksy[0]])
+    sigma2 = np.sum(dlugosci * (srednie - srednia)**2, axis=(0, 1)) / (K * (liczba - 1))
+    return sigma2, K * (liczba - 1)
+
+
+def _rhat(sumy, kwadraty, granice, od):
+    """R-hat Gelmana-Rubina i var+ dla bloków od `od` do końca"""
+    N = granice[-1] - granice[od]
+    S1, S2 = sumy[-1] - sumy[od], kwadraty[-1] - kwadraty[od]
+    srednie = S1 / N
+    # Wariancja w łańcuchu z sum: (S2 - N·średnia^2) / (N - 1)
+    W = np.mean((S2 - S1 * srednie) / (N - 1), axis=0)
+    wariancja = (N - 1) / N * W + np.var(srednie, axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(wariancja / W), wariancja
+
+
+def _diagnostyka(sumy, kwadraty, granice, od):
+    """
+    R-hat i efektywna liczność próby dla bloków od `od` do końca
+
+    ESS = K·N·var+ / σ^2, gdzie σ^2 to wariancja asymptotyczna z batch means
+    (najwyżej K·N)
+    """
+    K = sumy.shape[1]
+    N = granice[-1] - granice[od]
+    rhat, wariancja = _rhat(sumy, kwadraty, granice, od)
+    if len(granice) - 1 - od < 2:
+        return rhat, np.full_like(rhat, np.nan)
+    sigma2, _ = _batch_means(sumy, granice, od, len(granice) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rhat, np.minimum(K * N * wariancja / sigma2, K * N)
+
+
+def _burn_in(sumy, kwadraty, granice, poziom):
+    """
+    Numer pierwszego bloku po burn-in (None, gdy nie mieści się w pierwszej
+    połowie łańcucha)
+
+    Dla kolejnych kandydatów b test Gewekego porównuje średnią x i x^2 z
+    pierwszych 10% łańcucha od bloku b ze średnią z ostatnich 50%; średnie
+    są uśredniane po łańcuchach, a błąd standardowy pochodzi z batch means
+    ostatnich 50% (K·(paczki - 1) stopni swobody, kwantyl t). Poprawka
+    Bonferroniego obejmuje 2·d porównań jednego kandydata, więc dla łańcucha
+    już zbieżnego burn-in 0 jest odrzucane z prawdopodobieństwem najwyżej
+    poziom. Działa także wtedy, gdy wszystkie łańcuchy startują z tego
+    samego punktu (wtedy klasyczne R-hat nie widzi okresu przejściowego).
+    """
+    liczba = len(granice) - 1
+    K, d = sumy.shape[1:]
+    for b in range(liczba // 2 + 1):
+        reszta = liczba - b
+        koniec_a = b + max(1, reszta // 10)
+        poczatek_b = liczba - reszta // 2
+        if reszta // 2 < 2 or koniec_a > poczatek_b:
+            break
+        n_a = granice[koniec_a] - granice[b]
+        n_b = granice[-1] - granice[poczatek_b]
+        zbiezny = True
+        for suma in (sumy, kwadraty):
+            roznica = np.mean((suma[koniec_a] - suma[b]) / n_a
+                              - (suma[-1] - suma[poczatek_b]) / n_b, axis=0)
+            sigma2, df = _batch_means(suma, granice, poczatek_b, liczba)
+            prog = _kwantyl_t(1 - poziom / (4 * d), df)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                statystyka = np.abs(roznica) / np.sqrt(sigma2 * (1 / n_a + 1 / n_b) / K)
+            # nan (stała współrzędna, zerowy rozrzut) nie świadczy o braku zbieżności
+            if (statystyka > prog).any():
+                zbiezny = False
+                break
+        if zbiezny:
+            return b
+    return None
+
+
+def gibbs(krok, start, iteracje, K=2, rng=None, sciezka=None, blok=10, poziom=0.05,
+          min_ess=None):
+    """
+    Uruchamia K łańcuchów Gibbsa jednocześnie
+
+    Parametry:
+    ----------
+    krok : callable
+        krok(stan, rng) wykonuje jedną pełną iterację w miejscu na macierzy
+        stanów (K, d), np. krok_normalny(rho)
+    start : array-like
+        Stan początkowy (d,) wspólny dla łańcuchów albo (K, d)
+    iteracje : int
+        Liczba wierszy bufora razem ze stanem początkowym (jak n.samples w script3.R)
+    K : int
+        Liczba łańcuchów (co najmniej MIN_LANCUCHOW = 2)
+    rng : np.random.Generator lub int, opcjonalnie
+        Generator (albo ziarno) liczb losowych
+    sciezka : str, opcjonalnie
+        Plik .npy na bufor próbek (np.memmap); domyślnie bufor w pamięci
+    blok : int
+        Co ile iteracji zapisywane są sumy do diagnostyki
+    poziom : float
+        Poziom testu burn-in dla jednego kandydata (z poprawką na liczbę
+        współrzędnych i momentów)
+    min_ess : float, opcjonalnie
+        Zatrzymuje łańcuchy, gdy po burn-in ESS każdej współrzędnej osiągnie tę wartość
+
+    Zwraca:
+    -------
+    dict : 'proba' (bufor (wykonane iteracje, K, d)), 'burn_in' (liczba
+           iteracji do odrzucenia albo None, gdy łańcuchy się nie zbiegły),
+           'rhat' i 'ess' (po burn-in), 'rhat_historia' (R-hat drugiej połowy
+           łańcucha po każdym bloku), 'iteracje' i 'czas_s'
+    """
+    if K < MIN_LANCUCHOW:
+        raise ValueError(f"Diagnostyka zbieżności wymaga co najmniej {MIN_LANCUCHOW} łańcuchów")
+    rng = np.random.default_rng(rng)
+    start = np.asarray(start, dtype=float)
+    d = start.shape[-1]
+    ksztalt = (iteracje, K, d)
+    if sciezka is None:
+        proba = np.empty(ksztalt)
+    else:
+        proba = np.lib.format.open_memmap(sciezka, mode='w+', dtype=np.float64, shape=ksztalt)
+    proba[0] = start
+
+    # Sumy prefiksowe x i x^2 na granicach bloków (pierwszy wiersz to zera)
+    liczba_blokow = -(-iteracje // blok)
+    granice = np.zeros(liczba_blokow + 1, dtype=np.int64)
+    sumy = np.zeros((liczba_blokow + 1, K, d))
+    kwadraty = np.zeros((liczba_blokow + 1, K, d))
+    historia = []
+    czas = time.perf_counter()
+
+    i = 1
+    j = 0
+    while i < iteracje:
+        # Blok to wiersze granice[j]..koniec-1 (pierwszy zawiera stan początkowy)
+        koniec = min(granice[j] + blok, iteracje)
+        for t in range(i, koniec):
+            proba[t] = proba[t - 1]
+            krok(proba[t], rng)
+        i = koniec
+
+        okno = proba[granice[j]:koniec]
+        sumy[j + 1] = sumy[j] + okno.sum(axis=0)
+        kwadraty[j + 1] = kwadraty[j] + np.einsum('ikd,ikd->kd', okno, okno)
+        granice[j + 1] = koniec
+        j += 1
+        polowa = j // 2
+        if granice[j] - granice[polowa] > 1:
+            historia.append(_rhat(sumy[:j + 1], kwadraty[:j + 1], granice[:j + 1], polowa)[0])
+
+        # Warunek zatrzymania sprawdzany co j/20 bloków (łącznie O(log) razy)
+        if min_ess is not None and j >= 8 and j % max(1, j // 20) == 0:
+            b0 = _burn_in(sumy[:j + 1], kwadraty[:j + 1], granice[:j + 1], poziom)
+            if b0 is not None:
+                _, ess = _diagnostyka(sumy[:j + 1], kwadraty[:j + 1], granice[:j + 1], b0)
+                if np.all(ess >= min_ess):
+                    break
+
+    czas = time.perf_counter() - czas
+    if isinstance(proba, np.memmap):
+        proba.flush()
+    wynik = {'proba': proba[:i], 'iteracje': i, 'czas_s': czas, 'burn_in': None,
+             'rhat': None, 'ess': None, 'rhat_historia': np.array(historia)}
+    b0 = _burn_in(sumy[:j + 1], kwadraty[:j + 1], granice[:j + 1], poziom)
+    if b0 is not None:
+        wynik['burn_in'] = int(granice[b0])
+        wynik['rhat'], wynik['ess'] = _diagnostyka(sumy[:j + 1], kwadraty[:j + 1],
+                                                   granice[:j + 1], b0)
+    return wynik
+
+
+if __name__ == "__main__":
+    # script3.R: rho = 0.5, start (3, 1), 600 iteracji - tu 10^4 łańcuchów naraz
+    rho = 0.5
+    wynik = gibbs(krok_normalny(rho), (3, 1), 600, K=10**4, rng=12387)
+    print(f"✅ {wynik['iteracje']} iteracji × 10^4 łańcuchów w {wynik['czas_s']:.2f} s")
+    if wynik['burn_in'] is None:
+        print("❌ Łańcuchy się nie zbiegły - brak burn-in, R-hat i ESS")
+    else:
+        print(f"   burn-in: {wynik['burn_in']} (script3.R: 300), "
+              f"R-hat: {np.round(wynik['rhat'], 4)}, ESS: {np.round(wynik['ess'])}")
+        proba = wynik['proba'][wynik['burn_in']:].reshape(-1, 2)
+        print(f"   kowariancja:\n{np.cov(proba, rowvar=False)}")
@@ -0,0 +1,159 @@
+"""
+Estymator Kaplana-Meiera dla danych cenzurowanych
+Jeden przebieg: sortowanie, iloczyn skumulowany (przez sumę logarytmów)
+i suma Greenwooda, także dla całej macierzy replikacji naraz
+"""
+
+import numpy as np
+
+
+def _posortuj(czasy, cenzura):
+    """
+    Sortuje każdy wiersz po czasie; przy remisach zdarzenia idą przed
+    obserwacjami cenzurowanymi (konwencja estymatora KM)
+    """
+    czasy = np.atleast_2d(np.asarray(czasy, dtype=float))
+    if cenzura is None:
+        cenzura = np.zeros(czasy.shape, dtype=np.uint8)
+    cenzura = np.atleast_2d(np.asarray(cenzura)).astype(bool)
+    kolejnosc = np.lexsort((cenzura, czasy), axis=-1)
+    czasy = np.take_along_axis(czasy, kolejnosc, axis=1)
+    zdarzenia = ~np.take_along_axis(cenzura, kolejnosc, axis=1)
+    return czasy, zdarzenia
+
+
+def _km_posortowane(czasy, zdarzenia):
+    """
+    Wartości S i wariancji Greenwooda po każdej obserwacji posortowanego wiersza
+
+    Obserwacje z remisem są przetwarzane pojedynczo: iloczyn czynników
+    (1 - 1/r) dla d zdarzeń przy r narażonych daje dokładnie (r - d)/r,
+    a suma 1/(r(r-1)) daje d/(r(r-d)), więc wynik po grupie remisów
+    jest taki sam jak w klasycznym wzorze.
+    """
+    n = czasy.shape[1]
+    narazeni = np.arange(n, 0, -1, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_czynnik = np.where(zdarzenia, np.log1p(-1 / narazeni), 0.0)
+        S = np.exp(np.cumsum(log_czynnik, axis=1))
+        greenwood = np.cumsum(np.where(zdarzenia, 1 / (narazeni * (narazeni - 1)), 0.0), axis=1)
+        var = S**2 * greenwood
+    return S, np.where(S > 0, var, np.nan)
+
+
+def _mediana(czasy, S):
+    """Najmniejszy czas, dla którego S(t) <= 0.5 (nan, jeśli krzywa nie spada do 0.5)"""
+    ponizej = S <= 0.5
+    indeks = np.argmax(ponizej, axis=1)
+    return np.where(ponizej.any(axis=1), czasy[np.arange(czasy.shape[0]), indeks], np.nan)
+
+
+def indeksy_na_siatce(czasy, siatka):
+    """
+    Liczba czasów <= każdy punkt siatki, osobno w każdym wierszu
+
+    Parametry:
+    ----------
+    czasy : np.ndarray
+        Macierz (R, n) czasów posortowanych w każdym wierszu
+    siatka : array-like
+        Punkty siatki (w dowolnej kolejności)
+
+    Zwraca:
+    -------
+    np.ndarray : Macierz (R, len(siatka)) indeksów w zakresie 0..n
+    """
+    siatka = np.asarray(siatka, dtype=float)
+    porzadek = np.argsort(siatka, kind='stable')
+    R, n = czasy.shape
+    G = siatka.size
+    # Stabilne sortowanie złączenia [czasy | siatka]: punkt siatki trafia za
+    # wszystkie czasy <= od niego, więc jego pozycja minus numer punktu to
+    # liczba takich czasów w wierszu
+    zlaczone = np.concatenate([czasy, np.broadcast_to(siatka[porzadek], (R, G))], axis=1)
+    kolejnosc = np.argsort(zlaczone, axis=1, kind='stable')
+    _, pozycje = np.nonzero(kolejnosc >= n)
+    ile = pozycje.reshape(R, G) - np.arange(G)
+    return ile[:, np.argsort(porzadek)]
+
+
+def schodkowa_na_siatce(ile, wartosci, poczatek=1.0):
+    """
+    Wartości funkcji schodkowej prawostronnie ciągłej w punktach siatki
+
+    Parametry:
+    ----------
+    ile : np.ndarray
+        Indeksy z indeksy_na_siatce
+    wartosci : np.ndarray
+        Macierz (R, n) wartości funkcji po każdym posortowanym czasie
+    poczatek : float
+        Wartość przed pierwszym czasem
+
+    Zwraca:
+    -------
+    np.ndarray : Macierz o kształcie ile
+    """
+    z_poczatkiem = np.concatenate([np.full((wartosci.shape[0], 1), poczatek), wartosci], axis=1)
+    return np.take_along_axis(z_poczatkiem, ile, axis=1)
+
+
+def kaplan_meier(czasy, cenzura=None):
+    """
+    Estymator Kaplana-Meiera dla jednej próby
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Zaobserwowane czasy
+    cenzura : array-like, opcjonalnie
+        Flagi cenzurowania (1 = obserwacja cenzurowana, jak w random_type_error);
+        brak oznacza dane pełne
+
+    Zwraca:
+    -------
+    dict : 'czas' (różne czasy zdarzeń), 'S', 'var' (Greenwood), 'mediana'
+    """
+    t, zdarzenia = _posortuj(czasy, cenzura)
+    S, var = _km_posortowane(t, zdarzenia)
+    t, zdarzenia, S, var = t[0], zdarzenia[0], S[0], var[0]
+    # Wartość po grupie remisów: ostatnie zdarzenie o danym czasie
+    nastepny_inny = np.append(t[1:] != t[:-1], True) | np.append(~zdarzenia[1:], True)
+    koniec_grupy = zdarzenia & nastepny_inny
+    return {
+        'czas': t[koniec_grupy],
+        'S': S[koniec_grupy],
+        'var': var[koniec_grupy],
+        'mediana': _mediana(t[None], S[None])[0]
+    }
+
+
+def kaplan_meier_batch(czasy, cenzura=None, siatka=None):
+    """
+    Estymator Kaplana-Meiera dla wielu replikacji naraz
+
+    Parametry:
+    ----------
+    czasy : np.ndarray
+        Macierz (R, n) czasów, jeden wiersz na replikację
+    cenzura : np.ndarray, opcjonalnie
+        Macierz (R, n) flag cenzurowania (1 = cenzurowana)
+    siatka : array-like, opcjonalnie
+        Wspólna siatka czasów; domyślnie 100 punktów od 0 do największego czasu
+
+    Zwraca:
+    -------
+    dict : 'siatka', 'S' i 'var' jako macierze (R, len(siatka)), 'mediana' (R,)
+    """
+    t, zdarzenia = _posortuj(czasy, cenzura)
+    S, var = _km_posortowane(t, zdarzenia)
+    if siatka is None:
+        siatka = np.linspace(0, t[:, -1].max(), 100)
+    siatka = np.asarray(siatka, dtype=float)
+    ile = indeksy_na_siatce(t, siatka)
+    return {
+        'siatka': siatka,
+        'S': schodkowa_na_siatce(ile, S, 1.0),
+        'var': schodkowa_na_siatce(ile, var, 0.0),
+        'mediana': _mediana(t, S)
+    }
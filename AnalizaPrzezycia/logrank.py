@@ -0,0 +1,348 @@
+"""
+Porównanie przeżycia w dwóch grupach: ważone testy log-rank
+(Mantel-Haenszel, Gehan-Wilcoxon, Fleming-Harrington) i test permutacyjny
+Wszystkie statystyki powstają z jednego przebiegu po połączonej, posortowanej
+próbie (w warstwach). Statystyka U to suma po obserwacjach grupy 1
+wyników a_i, które zależą tylko od połączonej próby, więc U dla paczki
+przetasowań etykiet to jedno mnożenie macierzy (P, N) @ (N, liczba wag).
+"""
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# Wagi: nazwa -> ('MH',), ('Gehan',) albo ('FH', p, q) dla S(t-)^p (1 - S(t-))^q
+WAGI_DOMYSLNE = {
+    'MH': ('MH',),
+    'Gehan': ('Gehan',),
+    'FH(0,1)': ('FH', 0, 1),
+    'FH(1,0)': ('FH', 1, 0),
+}
+
+# Najmniejszy logarytm czynnika KM (d = n daje log(0))
+_LOG_MIN = np.log(np.finfo(float).tiny)
+
+_p_chi2 = np.frompyfunc(lambda x: math.erfc(math.sqrt(x / 2)), 1, 1)
+
+
+def p_chi2_1(chi2):
+    """
+    P(χ²(1) >= chi2), czyli dwustronna p-wartość statystyki Z = U/sqrt(V);
+    nan (V = 0, np. brak zdarzeń w porównaniu) daje nan bez ostrzeżeń
+    """
+    chi2 = np.asarray(chi2, dtype=float)
+    p = np.full(chi2.shape, np.nan)
+    okreslone = chi2 >= 0
+    with np.errstate(invalid='ignore'):
+        p[okreslone] = _p_chi2(chi2[okreslone]).astype(float)
+    return p
+
+
+def _macierze(czasy, cenzura, grupy, warstwy):
+    """Sprowadza dane do macierzy (R, N); grupy i warstwy mogą być wspólne (N,)"""
+    czasy = np.atleast_2d(np.asarray(czasy, dtype=float))
+    ksztalt = czasy.shape
+    cenzura = (np.zeros(ksztalt, dtype=bool) if cenzura is None
+               else np.broadcast_to(np.asarray(cenzura).astype(bool), ksztalt))
+    grupy = np.broadcast_to(np.asarray(grupy).astype(bool), ksztalt)
+    warstwy = (np.zeros(ksztalt, dtype=np.intp) if warstwy is None
+               else np.broadcast_to(np.asarray(warstwy), ksztalt))
+    return czasy, cenzura, grupy, warstwy
+
+
+def _przebieg(czasy, cenzura, grupy, warstwy, wagi, wyniki=True):
+    """
+    Jeden przebieg po połączonej próbie posortowanej w warstwach (R, N)
+
+    Dla każdej obserwacji liczone są wielkości jej grupy remisów: początek
+    i koniec (skumulowane maksimum/minimum pozycji), liczba narażonych n,
+    zdarzenia d, narażeni z grupy 1 (n1) i zdarzenia w grupie 1 (d1);
+    zdarzenia są w grupie remisów przed obserwacjami cenzurowanymi.
+
+    Zwraca:
+    -------
+    tuple : U i V (liczba wag, R), wyniki a (liczba wag, R, N) w kolejności
+            posortowanej (None, gdy wyniki=False) oraz kolejność sortowania (R, N)
+    """
+    kolejnosc = np.lexsort((cenzura, czasy, warstwy), axis=-1)
+    t = np.take_along_axis(czasy, kolejnosc, axis=1)
+    e = ~np.take_along_axis(cenzura, kolejnosc, axis=1)
+    g = np.take_along_axis(grupy, kolejnosc, axis=1)
+    s = np.take_along_axis(warstwy, kolejnosc, axis=1)
+    R, N = t.shape
+    pozycje = np.broadcast_to(np.arange(N), (R, N))
+    prawda = np.ones((R, 1), dtype=bool)
+
+    nowa_warstwa = np.concatenate([prawda, s[:, 1:] != s[:, :-1]], axis=1)
+    nowy_czas = nowa_warstwa | np.concatenate([prawda, t[:, 1:] != t[:, :-1]], axis=1)
+    start = np.maximum.accumulate(np.where(nowy_czas, pozycje, 0), axis=1)
+    poczatek_warstwy = np.maximum.accumulate(np.where(nowa_warstwa, pozycje, 0), axis=1)
+    ostatni = np.concatenate([nowy_czas[:, 1:], prawda], axis=1)
+    koniec = np.minimum.accumulate(np.where(ostatni, pozycje, N)[:, ::-1], axis=1)[:, ::-1]
+    ostatni_w_warstwie = np.concatenate([nowa_warstwa[:, 1:], prawda], axis=1)
+    koniec_warstwy = np.minimum.accumulate(np.where(ostatni_w_warstwie, pozycje, N)[:, ::-1],
+                                           axis=1)[:, ::-1]
+
+    def skumulowana(x):
+        # Sumy prefiksowe z zerem na początku: suma pozycji [a, b) to z[b] - z[a]
+        z = np.zeros((R, N + 1))
+        np.cumsum(x, axis=1, out=z[:, 1:])
+        return z
+
+    def przedzial(z, a, b):
+        return np.take_along_axis(z, b, axis=1) - np.take_along_axis(z, a, axis=1)
+
+    n = (koniec_warstwy + 1 - start).astype(float)
+    d = przedzial(skumulowana(e), start, koniec + 1)
+    n1 = przedzial(skumulowana(g), start, koniec_warstwy + 1)
+    d1 = przedzial(skumulowana(g & e), start, koniec + 1)
+    # Jedna pozycja na każdy czas zdarzenia w warstwie
+    glowa = nowy_czas & (d > 0)
+
+    S_przed = None
+    wartosci_wag = []
+    for waga in wagi:
+        if waga[0] == 'MH':
+            w = np.ones((R, N))
+        elif waga[0] == 'Gehan':
+            w = n
+        elif waga[0] == 'FH':
+            if S_przed is None:
+                # KM połączonej próby tuż przed czasem grupy, osobno w każdej warstwie;
+                # log(0) przycięty, żeby -inf nie przeszedł do kolejnych warstw
+                with np.errstate(divide='ignore'):
+                    log_czynnik = np.where(glowa, np.maximum(np.log1p(-d / n), _LOG_MIN), 0.0)
+                z = skumulowana(log_czynnik)
+                S_przed = np.exp(np.take_along_axis(z, start, axis=1)
+                                 - np.take_along_axis(z, poczatek_warstwy, axis=1))
+            _, p, q = waga
+            w = S_przed**p * (1 - S_przed)**q
+        else:
+            raise ValueError(f"Nieznana waga: {waga!r}")
+        wartosci_wag.append(w)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        oczekiwane = d / n
+        wariancja = np.where(glowa & (n > 1), d * (n - d) * n1 * (n - n1) / (n**2 * (n - 1)), 0.0)
+    U, V, a = [], [], []
+    for w in wartosci_wag:
+        U.append(np.sum(np.where(glowa, w * (d1 - oczekiwane * n1), 0.0), axis=1))
+        V.append(np.sum(w**2 * wariancja, axis=1))
+        if not wyniki:
+            continue
+        # a_i = e_i·w(t_i) - suma w_j·d_j/n_j po czasach zdarzeń t_j <= t_i w warstwie
+        z = skumulowana(np.where(glowa, w * oczekiwane, 0.0))
+        a.append(np.where(e, w, 0.0) - przedzial(z, poczatek_warstwy, koniec + 1))
+    return np.array(U), np.array(V), np.array(a) if wyniki else None, kolejnosc
+
+
+def logrank_batch(czasy, cenzura, grupy, warstwy=None, wagi=WAGI_DOMYSLNE,
+                  budzet_pamieci=16 * 2**20):
+    """
+    Ważone testy log-rank dla wielu replikacji naraz (badania mocy)
+
+    Parametry:
+    ----------
+    czasy : np.ndarray
+        Macierz (R, N) czasów połączonych grup, jeden wiersz na replikację
+    cenzura : np.ndarray
+        Flagi cenzurowania (1 = cenzurowana), (R, N) albo wspólne (N,)
+    grupy : np.ndarray
+        Przynależność do grupy 1 (True/1) albo 0, (R, N) albo wspólna (N,)
+    warstwy : np.ndarray, opcjonalnie
+        Numery warstw (test stratyfikowany), (R, N) albo (N,)
+    wagi : dict
+        Nazwa -> ('MH',), ('Gehan',) albo ('FH', p, q)
+    budzet_pamieci : int
+        Przybliżona pamięć na jedną porcję wierszy w bajtach; małe porcje
+        mieszczą się w pamięci podręcznej procesora
+
+    Zwraca:
+    -------
+    dict : Dla każdej wagi słownik 'U' (obserwowane minus oczekiwane zdarzenia
+           grupy 1, ważone), 'V', 'chi2' i 'p' - tablice (R,)
+    """
+    czasy, cenzura, grupy, warstwy = _macierze(czasy, cenzura, grupy, warstwy)
+    R, N = czasy.shape
+    # Przebieg trzyma naraz kilkanaście tablic (R, N) po 8 bajtów
+    rozmiar = int(max(1, budzet_pamieci // (160 * N)))
+    U, V = np.empty((2, len(wagi), R))
+    for s in range(0, R, rozmiar):
+        wiersze = slice(s, s + rozmiar)
+        U[:, wiersze], V[:, wiersze], _, _ = _przebieg(czasy[wiersze], cenzura[wiersze], grupy[wiersze],
+                                                       warstwy[wiersze], list(wagi.values()), False)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = U**2 / V
+    return {nazwa: {'U': U[i], 'V': V[i], 'chi2': chi2[i], 'p': p_chi2_1(chi2[i])}
+            for i, nazwa in enumerate(wagi)}
+
+
+def _sumy_permutacji(wyniki_warstw, liczebnosci, P, ziarno):
+    """
+    U dla P losowych przypisań etykiet (w każdej warstwie tyle samo obserwacji
+    grupy 1 co w danych): macierz etykiet (P, N_s) razy wyniki (N_s, liczba wag)
+    """
+    rng = np.random.default_rng(ziarno)
+    U = 0.0
+    for a, k in zip(wyniki_warstw, liczebnosci):
+        N = a.shape[0]
+        if k == 0 or k == N:
+            U = U + a.sum(axis=0) * (k == N)
+            continue
+        klucze = rng.random((P, N))
+        # k najmniejszych kluczy w wierszu to losowy k-elementowy podzbiór
+        prog = np.partition(klucze, k - 1, axis=1)[:, k - 1:k]
+        U = U + (klucze <= prog).astype(float) @ a
+    return np.broadcast_to(U, (P, wyniki_warstw[0].shape[1]))
+
+
+def _sumy_dokladne(wyniki_warstw, liczebnosci):
+    """U dla wszystkich przypisań etykiet (iloczyn kombinacji w warstwach)"""
+    U = np.zeros((1, wyniki_warstw[0].shape[1]))
+    for a, k in zip(wyniki_warstw, liczebnosci):
+        indeksy = np.array(list(itertools.combinations(range(a.shape[0]), k)), dtype=np.intp)
+        sumy = a[indeksy].sum(axis=1) if k else np.zeros((1, a.shape[1]))
+        U = (U[:, None, :] + sumy[None, :, :]).reshape(-1, a.shape[1])
+    return U
+
+
+def test_permutacyjny(czasy, cenzura, grupy, warstwy=None, wagi=WAGI_DOMYSLNE, P=10**5,
+                      seed=None, procesy=1, maks_dokladny=2 * 10**5, budzet_pamieci=64 * 2**20):
+    """
+    Ważone testy log-rank z p-wartościami asymptotycznymi i permutacyjnymi
+
+    Etykiety są tasowane wewnątrz warstw. Gdy liczba wszystkich przypisań
+    nie przekracza maks_dokladny, rozkład permutacyjny jest wyliczany
+    dokładnie; inaczej z P losowych przetasowań.
+
+    Parametry:
+    ----------
+    czasy, cenzura, grupy, warstwy : array-like
+        Jedna próba (N,), jak w logrank_batch
+    wagi : dict
+        Nazwa -> ('MH',), ('Gehan',) albo ('FH', p, q)
+    P : int
+        Liczba losowych przetasowań
+    seed : int, opcjonalnie
+        Ziarno; porcje mają stały rozmiar i osobne ziarna (SeedSequence.spawn),
+        więc wynik nie zależy od liczby procesów
+    procesy : int, opcjonalnie
+        Liczba procesów; None = liczba rdzeni, 1 = bez puli
+    maks_dokladny : int
+        Największa liczba przypisań liczona dokładnie
+    budzet_pamieci : int
+        Przybliżona pamięć na jedną porcję przetasowań w bajtach
+
+    Zwraca:
+    -------
+    dict : Dla każdej wagi 'U', 'V', 'chi2', 'p' (asymptotyczna) i 'p_perm';
+           klucze 'dokladny' (czy rozkład był wyliczony dokładnie) i 'permutacje'
+    """
+    czasy, cenzura, grupy, warstwy = _macierze(czasy, cenzura, grupy, warstwy)
+    if czasy.shape[0] != 1:
+        raise ValueError("test_permutacyjny przyjmuje jedną próbę; dla wielu użyj logrank_batch")
+    U, V, a, kolejnosc = _przebieg(czasy, cenzura, grupy, warstwy, list(wagi.values()))
+    U, V = U[:, 0], V[:, 0]
+    a = a[:, 0].T  # (N, liczba wag) w kolejności posortowanej
+    g = grupy[0][kolejnosc[0]]
+    s = warstwy[0][kolejnosc[0]]
+    wyniki_warstw, liczebnosci = [], []
+    for warstwa in np.unique(s):
+        w = s == warstwa
+        wyniki_warstw.append(a[w])
+        liczebnosci.append(int(g[w].sum()))
+
+    # Porównania z tolerancją: te same sumy w innej kolejności różnią się o ulp
+    prog = np.abs(U) * (1 - 1e-10) - 1e-12
+    przypisania = math.prod(math.comb(x.shape[0], k) for x, k in zip(wyniki_warstw, liczebnosci))
+    if przypisania <= maks_dokladny:
+        Uperm = _sumy_dokladne(wyniki_warstw, liczebnosci)
+        p_perm = np.mean(np.abs(Uperm) >= prog, axis=0)
+        permutacje, dokladny = przypisania, True
+    else:
+        N = czasy.shape[1]
+        rozmiar = int(max(1, min(P, budzet_pamieci // (16 * N))))
+        porcje = [min(rozmiar, P - s) for s in range(0, P, rozmiar)]
+        ziarna = np.random.SeedSequence(seed).spawn(len(porcje))
+        if procesy is None:
+            procesy = os.cpu_count() or 1
+        if procesy > 1 and len(porcje) > 1:
+            with ProcessPoolExecutor(max_workers=min(procesy, len(porcje))) as pula:
+                zadania = [pula.submit(_sumy_permutacji, wyniki_warstw, liczebnosci, m, z)
+                           for m, z in zip(porcje, ziarna)]
+                przekroczenia = sum(np.sum(np.abs(z.result()) >= prog, axis=0) for z in zadania)
+        else:
+            przekroczenia = sum(np.sum(np.abs(_sumy_permutacji(wyniki_warstw, liczebnosci, m, z))
+                                       >= prog, axis=0) for m, z in zip(porcje, ziarna))
+        p_perm = (przekroczenia + 1) / (P + 1)
+        permutacje, dokladny = P, False
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = U**2 / V
+    p = p_chi2_1(chi2)
+    wynik = {nazwa: {'U': float(U[i]), 'V': float(V[i]), 'chi2': float(chi2[i]),
+                     'p': float(p[i]), 'p_perm': float(p_perm[i])}
+             for i, nazwa in enumerate(wagi)}
+    wynik.update(dokladny=dokladny, permutacje=permutacje)
+    return wynik
+
+
+def porownaj_ramiona(ramiona, wagi=WAGI_DOMYSLNE, **opcje):
+    """
+    Testy dla każdej pary ramion z poprawką Holma na wielokrotne porównania
+
+    Parametry:
+    ----------
+    ramiona : dict
+        Nazwa -> (czasy, cenzura) albo (czasy, cenzura, warstwy)
+    **opcje
+        Przekazywane do test_permutacyjny (P, seed, procesy, ...)
+
+    Zwraca:
+    -------
+    dict : (nazwa1, nazwa2) -> wynik test_permutacyjny; dla każdej wagi
+           dodatkowo 'p_perm_holm'
+    """
+    wyniki = {}
+    for (nazwa1, dane1), (nazwa2, dane2) in itertools.combinations(ramiona.items(), 2):
+        czasy = np.concatenate([dane1[0], dane2[0]])
+        cenzura = np.concatenate([dane1[1], dane2[1]])
+        grupy = np.r_[np.ones(len(dane1[0]), dtype=bool), np.zeros(len(dane2[0]), dtype=bool)]
+        warstwy = np.concatenate([dane1[2], dane2[2]]) if len(dane1) > 2 else None
+        wyniki[(nazwa1, nazwa2)] = test_permutacyjny(czasy, cenzura, grupy, warstwy, wagi, **opcje)
+
+    # Holm: i-ta najmniejsza p-wartość razy (liczba porównań - i), z monotonicznością
+    pary = list(wyniki)
+    for nazwa in wagi:
+        p = np.array([wyniki[para][nazwa]['p_perm'] for para in pary])
+        porzadek = np.argsort(p)
+        skorygowane = np.maximum.accumulate(np.minimum(1, p[porzadek] * (len(p) - np.arange(len(p)))))
+        for para, wartosc in zip(np.array(pary, dtype=object)[porzadek], skorygowane):
+            wyniki[tuple(para)][nazwa]['p_perm_holm'] = float(wartosc)
+    return wyniki
+
+
+def ramiona_raporcik2():
+    """Ramiona A i B z raporcik2: remisja jako zdarzenie, bez remisji cenzurowane w 1.0"""
+    import raporcik2
+    ramiona = {}
+    for nazwa in ('A', 'B'):
+        remisja = getattr(raporcik2, f'remisja_{nazwa}')
+        bez = getattr(raporcik2, f'bez_remisji_{nazwa}')
+        ramiona[nazwa] = (np.concatenate([remisja, bez]),
+                          np.r_[np.zeros(len(remisja), dtype=np.uint8), np.ones(len(bez), dtype=np.uint8)])
+    return ramiona
+
+
+if __name__ == "__main__":
+    wyniki = porownaj_ramiona(ramiona_raporcik2(), P=10**5, seed=2024, procesy=None)
+    for (nazwa1, nazwa2), wynik in wyniki.items():
+        print(f"Lek {nazwa1} vs lek {nazwa2} ({wynik['permutacje']} permutacji"
+              f"{', rozkład dokładny' if wynik['dokladny'] else ''}):")
+        for nazwa in WAGI_DOMYSLNE:
+            w = wynik[nazwa]
+            print(f"   {nazwa:<8} χ² = {w['chi2']:6.3f}  p = {w['p']:.4f}  p_perm = {w['p_perm']:.4f}")
@@ -0,0 +1,298 @@
+"""
+Estymator Nelsona-Aalena skumulowanego hazardu, wygładzony hazard (jądro
+Epanechnikova, szerokość z kroswalidacji) i bootstrapowe pasma ufności
+Replikacja bootstrapowa nie jest sortowana: to wektor krotności obserwacji
+(bincount macierzy losowych indeksów), a skoki estymatora leżą w tych samych
+czasach co w próbie, więc cała porcja replikacji jest liczona macierzowo.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from kaplan_meier import _posortuj
+
+
+# Powyżej tylu czasów zdarzeń przyrosty są sumowane w binach przed wygładzaniem
+MAKS_BINOW = 1024
+
+
+def _grupy(czasy, cenzura):
+    """
+    Posortowane dane i grupy remisów: początek każdej grupy i liczba zdarzeń
+    w niej (zdarzenia są w grupie przed obserwacjami cenzurowanymi)
+    """
+    t, zdarzenia = _posortuj(czasy, cenzura)
+    t, zdarzenia = t[0], zdarzenia[0]
+    if t.size == 0:
+        return t, np.empty(0, dtype=int), np.empty(0)
+    starty = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+    d = np.add.reduceat(zdarzenia.astype(float), starty)
+    return t, starty, d
+
+
+def nelson_aalen(czasy, cenzura=None):
+    """
+    Estymator Nelsona-Aalena skumulowanego hazardu
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Zaobserwowane czasy
+    cenzura : array-like, opcjonalnie
+        Flagi cenzurowania (1 = obserwacja cenzurowana, jak w random_type_error)
+
+    Zwraca:
+    -------
+    dict : 'czas' (różne czasy zdarzeń), 'H', 'var' (Aalen, suma d/Y^2),
+           'zdarzenia' (d) i 'narazeni' (Y) w tych czasach
+    """
+    t, starty, d = _grupy(czasy, cenzura)
+    jest = d > 0
+    d = d[jest]
+    Y = (t.size - starty[jest]).astype(float)
+    return {
+        'czas': t[starty[jest]],
+        'H': np.cumsum(d / Y),
+        'var': np.cumsum(d / Y**2),
+        'zdarzenia': d,
+        'narazeni': Y
+    }
+
+
+def _biny(czasy_zdarzen, maks=MAKS_BINOW):
+    """
+    Środki niepustych binów i indeksy, od których zaczynają się one
+    w posortowanych czasach zdarzeń; przy niewielu czasach - każdy osobno
+    """
+    m = czasy_zdarzen.size
+    if m <= maks:
+        return czasy_zdarzen, np.arange(m)
+    lewy, prawy = czasy_zdarzen[0], czasy_zdarzen[-1]
+    szerokosc = (prawy - lewy) / maks
+    numer = np.minimum(((czasy_zdarzen - lewy) / szerokosc).astype(int), maks - 1)
+    numery, starty = np.unique(numer, return_index=True)
+    return lewy + (numery + 0.5) * szerokosc, starty
+
+
+def _macierz_jadra(punkty, centra, szerokosc):
+    """Macierz (len(punkty), len(centra)) wartości K((x - c)/b)/b, K - jądro Epanechnikova"""
+    u = (punkty[:, None] - centra[None, :]) / szerokosc
+    return np.where(np.abs(u) <= 1, 0.75 * (1 - u**2), 0.0) / szerokosc
+
+
+def wybierz_szerokosc(czasy, cenzura=None, kandydaci=None, min_narazonych=0.1):
+    """
+    Szerokość jądra minimalizująca kryterium kroswalidacji (LSCV) dla hazardu:
+    całka z h(t)^2 minus podwójna suma K_b(t_i - t_j) dH_i dH_j po i != j
+    Kryterium liczymy tylko tam, gdzie narażonych jest co najmniej
+    min_narazonych próby: przyrosty z kilkoma narażonymi w ogonie są tak
+    zaszumione, że inaczej wybierana jest zawsze największa szerokość.
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Zaobserwowane czasy
+    cenzura : array-like, opcjonalnie
+        Flagi cenzurowania (1 = cenzurowana)
+    kandydaci : array-like, opcjonalnie
+        Rozważane szerokości; domyślnie 40 wartości od 1% do 50% zakresu czasów zdarzeń
+    min_narazonych : float
+        Najmniejszy ułamek próby w zbiorze ryzyka dla czasów branych pod uwagę
+
+    Zwraca:
+    -------
+    float : Wybrana szerokość
+    """
+    na = nelson_aalen(czasy, cenzura)
+    n = np.size(czasy)
+    uwzglednione = na['narazeni'] >= min_narazonych * n
+    t, dH = na['czas'][uwzglednione], (na['zdarzenia'] / na['narazeni'])[uwzglednione]
+    if t.size < 2:
+        raise ValueError("Do wyboru szerokości potrzebne są co najmniej dwa różne czasy zdarzeń")
+    centra, starty = _biny(t)
+    A = np.add.reduceat(dH, starty)
+    if kandydaci is None:
+        kandydaci = (t[-1] - t[0]) * np.geomspace(0.01, 0.5, 40)
+    kandydaci = np.asarray(kandydaci, dtype=float)
+    # Wyrazy i == j: K(0) = 3/4
+    samo = 0.75 * np.sum(dH**2)
+    odleglosci = centra[:, None] - centra[None, :]
+
+    kryterium = np.empty(kandydaci.size)
+    for i, b in enumerate(kandydaci):
+        x = np.linspace(t[0] - b, t[-1] + b, 512)
+        h = _macierz_jadra(x, centra, b) @ A
+        calka = np.sum(h**2) * (x[1] - x[0])
+        u = odleglosci / b
+        K = np.where(np.abs(u) <= 1, 0.75 * (1 - u**2), 0.0) / b
+        pary = A @ K @ A - samo / b
+        kryterium[i] = calka - 2 * pary
+    return float(kandydaci[np.argmin(kryterium)])
+
+
+def wygladzony_hazard(czasy, cenzura=None, siatka=None, szerokosc=None):
+    """
+    Jądrowy estymator hazardu: h(t) = suma K_b(t - t_i) dH_i
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Zaobserwowane czasy
+    cenzura : array-like, opcjonalnie
+        Flagi cenzurowania (1 = cenzurowana)
+    siatka : array-like, opcjonalnie
+        Punkty, w których liczymy hazard; domyślnie 100 punktów do ostatniego zdarzenia
+    szerokosc : float, opcjonalnie
+        Szerokość jądra; domyślnie z wybierz_szerokosc
+
+    Zwraca:
+    -------
+    dict : 'siatka', 'hazard', 'szerokosc'
+    """
+    na = nelson_aalen(czasy, cenzura)
+    if szerokosc is None:
+        szerokosc = wybierz_szerokosc(czasy, cenzura)
+    if siatka is None:
+        siatka = np.linspace(0, na['czas'][-1], 100)
+    siatka = np.asarray(siatka, dtype=float)
+    centra, starty = _biny(na['czas'])
+    A = np.add.reduceat(na['zdarzenia'] / na['narazeni'], starty)
+    return {'siatka': siatka, 'hazard': _macierz_jadra(siatka, centra, szerokosc) @ A,
+            'szerokosc': szerokosc}
+
+
+def _porcja_bootstrap(n, starty, liczby_zdarzen, indeks_siatki, starty_binow, jadro, B, ziarno):
+    """
+    B replikacji: skumulowany hazard (B, G) i wygładzony hazard (B, G) na siatce
+
+    Krotności obserwacji W to bincount losowych indeksów; po cumsum C
+    liczba narażonych w grupie remisów o początku s to n - C[s - 1],
+    a liczba zdarzeń to C[s + d - 1] - C[s - 1] (zdarzenia są na początku grupy).
+    """
+    rng = np.random.default_rng(ziarno)
+    indeksy = rng.integers(0, n, size=(B, n))
+    indeksy += (np.arange(B) * n)[:, None]
+    C = np.bincount(indeksy.ravel(), minlength=B * n).reshape(B, n)
+    del indeksy
+    np.cumsum(C, axis=1, out=C)
+
+    # Operacje w miejscu: każda tablica (B, liczba grup) powstaje tylko raz
+    przed = C[:, np.maximum(starty - 1, 0)]
+    if starty[0] == 0:
+        przed[:, 0] = 0
+    d = C[:, starty + liczby_zdarzen - 1]
+    del C
+    d -= przed
+    Y = np.subtract(n, przed, out=przed)
+    # Y = 0 tylko wtedy, gdy d = 0, więc wystarczy nie dzielić przez zero
+    np.maximum(Y, 1, out=Y)
+    dH = np.divide(d, Y)
+    del d, Y
+
+    H = np.cumsum(dH, axis=1, out=dH)
+    # Sumy przyrostów w binach jako różnice H na granicach binów (zamiast reduceat)
+    granice = H[:, np.r_[starty_binow[1:] - 1, H.shape[1] - 1]]
+    granice[:, 1:] -= granice[:, :-1].copy()
+    hazard = granice @ jadro.T
+    H_siatka = H[:, np.maximum(indeks_siatki - 1, 0)]
+    H_siatka[:, indeks_siatki == 0] = 0.0
+    return H_siatka, hazard
+
+
+def _pasma(estymator, replikacje, poziom):
+    """Pasma punktowe (percentylowe) i jednoczesne (maksimum studentyzowanych odchyleń)"""
+    ogon = (1 - poziom) / 2
+    dolna, gorna = np.percentile(replikacje, [100 * ogon, 100 * (1 - ogon)], axis=0)
+    odch = replikacje.std(axis=0, ddof=1)
+    dodatnie = odch > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statystyka = np.max(np.abs(replikacje[:, dodatnie] - estymator[dodatnie]) / odch[dodatnie],
+                            axis=1, initial=0.0)
+    c = np.quantile(statystyka, poziom)
+    return {
+        'dolna': dolna,
+        'gorna': gorna,
+        'dolna_jednoczesna': np.maximum(estymator - c * odch, 0.0),
+        'gorna_jednoczesna': estymator + c * odch
+    }
+
+
+def bootstrap_nelson_aalen(czasy, cenzura=None, siatka=None, B=1000, poziom=0.95,
+                           szerokosc=None, seed=None, procesy=1, budzet_pamieci=256 * 2**20):
+    """
+    Nelson-Aalen i wygładzony hazard z bootstrapowymi pasmami ufności
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Zaobserwowane czasy
+    cenzura : array-like, opcjonalnie
+        Flagi cenzurowania (1 = cenzurowana)
+    siatka : array-like, opcjonalnie
+        Punkty wyników; domyślnie 100 punktów do ostatniego zdarzenia, więc
+        hazard_EW(wynik['siatka'], ...) można narysować na tych samych osiach
+    B : int
+        Liczba replikacji bootstrapowych
+    poziom : float
+        Poziom ufności pasm
+    szerokosc : float, opcjonalnie
+        Szerokość jądra; domyślnie z wybierz_szerokosc dla oryginalnej próby
+    seed : int, opcjonalnie
+        Ziarno; replikacje są dzielone na porcje o stałym rozmiarze z osobnymi
+        ziarnami (SeedSequence.spawn), więc wynik nie zależy od liczby procesów
+    procesy : int
+        Liczba procesów (None = liczba rdzeni)
+    budzet_pamieci : int
+        Przybliżona pamięć na jedną porcję replikacji w bajtach
+
+    Zwraca:
+    -------
+    dict : 'siatka', 'szerokosc', 'B', 'H' i 'hazard' (estymatory) oraz pasma
+           'H_dolna', 'H_gorna', 'H_dolna_jednoczesna', 'H_gorna_jednoczesna'
+           i analogiczne 'hazard_*'
+    """
+    t, starty, d = _grupy(czasy, cenzura)
+    n = t.size
+    jest = d > 0
+    if not jest.any():
+        raise ValueError("Próba nie zawiera żadnego zdarzenia")
+    starty, liczby_zdarzen = starty[jest], d[jest].astype(int)
+    czasy_zdarzen = t[starty]
+    if siatka is None:
+        siatka = np.linspace(0, czasy_zdarzen[-1], 100)
+    siatka = np.asarray(siatka, dtype=float)
+    if szerokosc is None:
+        szerokosc = wybierz_szerokosc(czasy, cenzura)
+
+    indeks_siatki = np.searchsorted(czasy_zdarzen, siatka, side='right')
+    centra, starty_binow = _biny(czasy_zdarzen)
+    jadro = _macierz_jadra(siatka, centra, szerokosc)
+
+    dH = liczby_zdarzen / (n - starty)
+    H = np.r_[0.0, np.cumsum(dH)][indeks_siatki]
+    hazard = jadro @ np.add.reduceat(dH, starty_binow)
+
+    # Najwyżej dwie tablice (B, n) po 8 bajtów naraz w jednej porcji
+    rozmiar = int(max(1, min(B, budzet_pamieci // (16 * n))))
+    porcje = [min(rozmiar, B - s) for s in range(0, B, rozmiar)]
+    ziarna = np.random.SeedSequence(seed).spawn(len(porcje))
+    argumenty = (n, starty, liczby_zdarzen, indeks_siatki, starty_binow, jadro)
+
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+    if procesy > 1 and len(porcje) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesy, len(porcje))) as pula:
+            wyniki = list(pula.map(_porcja_bootstrap, *zip(*[argumenty] * len(porcje)),
+                                   porcje, ziarna))
+    else:
+        wyniki = [_porcja_bootstrap(*argumenty, b, z) for b, z in zip(porcje, ziarna)]
+    H_rep = np.concatenate([w[0] for w in wyniki])
+    hazard_rep = np.concatenate([w[1] for w in wyniki])
+
+    wynik = {'siatka': siatka, 'szerokosc': szerokosc, 'B': B, 'H': H, 'hazard': hazard}
+    for nazwa, estymator, replikacje in (('H', H, H_rep), ('hazard', hazard, hazard_rep)):
+        for klucz, pasmo in _pasma(estymator, replikacje, poziom).items():
+            wynik[f'{nazwa}_{klucz}'] = pasmo
+    return wynik
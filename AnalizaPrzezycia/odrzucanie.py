@@ -0,0 +1,111 @@
+"""
+Losowanie metodą akceptacji-odrzucenia (testy/Script.R)
+Propozycje są losowane partiami, których rozmiar wynika z dotychczasowego
+odsetka akceptacji, a przyjęte punkty trafiają do bufora zaalokowanego
+z góry na dokładnie n wartości - bez doklejania do wyniku.
+"""
+
+import time
+
+import numpy as np
+
+
+def losuj_z_odrzucaniem(n, gestosc, proponuj, M=1.0, gestosc_propozycji=None, rng=None,
+                        min_partia=64, maks_partia=1 << 20, maks_propozycji=None):
+    """
+    Próba z gęstości f przy obwiedni M·g, f(x) <= M·g(x)
+
+    Parametry:
+    ----------
+    n : int
+        Liczba punktów do wylosowania
+    gestosc : callable
+        Wektorowa gęstość docelowa f (może być nieunormowana); dostaje tablicę
+        propozycji (k,) albo (k, d) i zwraca k wartości
+    proponuj : callable
+        proponuj(rng, k) zwraca k propozycji z rozkładu g
+    M : float
+        Stała obwiedni
+    gestosc_propozycji : callable, opcjonalnie
+        Wektorowa gęstość g; domyślnie 1 (np. rozkład jednostajny na kostce)
+    rng : np.random.Generator lub int, opcjonalnie
+        Generator (albo ziarno) liczb losowych
+    min_partia, maks_partia : int
+        Granice rozmiaru jednej partii propozycji
+    maks_propozycji : int, opcjonalnie
+        Limit wszystkich propozycji; po jego przekroczeniu RuntimeError
+
+    Zwraca:
+    -------
+    dict : 'proba' (n punktów), 'akceptacja' (odsetek przyjętych propozycji),
+           'propozycje', 'partie', 'przekroczenia' (propozycje z f > M·g, czyli
+           za mała obwiednia), 'czas_s' i 'na_sekunde' (punkty na sekundę)
+    """
+    rng = np.random.default_rng(rng)
+    start = time.perf_counter()
+    proba = None
+    przyjete = propozycje = partie = przekroczenia = 0
+
+    while przyjete < n:
+        pozostalo = n - przyjete
+        # Oczekiwana liczba propozycji na brakujące punkty z zapasem; przed
+        # pierwszą partią zakładamy akceptację 1/M (dokładną dla unormowanych f i g)
+        akceptacja = przyjete / propozycje if propozycje else 1 / max(M, 1.0)
+        k = int(pozostalo / max(akceptacja, 1e-6) * 1.1) + 1
+        k = min(max(k, min_partia), maks_partia)
+        if maks_propozycji is not None and propozycje + k > maks_propozycji:
+            k = maks_propozycji - propozycje
+            if k <= 0:
+                raise RuntimeError(f"Przekroczono limit {maks_propozycji} propozycji "
+                                   f"(przyjęto {przyjete} z {n})")
+
+        x = np.asarray(proponuj(rng, k))
+        f = np.asarray(gestosc(x), dtype=float)
+        obwiednia = M if gestosc_propozycji is None else M * np.asarray(gestosc_propozycji(x))
+        przekroczenia += int(np.count_nonzero(f > obwiednia))
+        wybrane = x[rng.random(k) * obwiednia < f]
+
+        if proba is None:
+            proba = np.empty((n,) + x.shape[1:], dtype=x.dtype)
+        ile = min(len(wybrane), pozostalo)
+        proba[przyjete:przyjete + ile] = wybrane[:ile]
+        przyjete += ile
+        propozycje += k
+        partie += 1
+
+    czas = time.perf_counter() - start
+    if proba is None:
+        proba = np.empty(0)
+    return {
+        'proba': proba,
+        'akceptacja': przyjete / propozycje if propozycje else np.nan,
+        'propozycje': propozycje,
+        'partie': partie,
+        'przekroczenia': przekroczenia,
+        'czas_s': czas,
+        'na_sekunde': n / czas if czas > 0 else np.inf
+    }
+
+
+def przyklad_trojkat(n=1000, seed=131311):
+    """
+    Gęstość proporcjonalna do 20·x·y^2 na trójkącie x + y < 1 (testy/Script.R)
+
+    Propozycje są jednostajne na kwadracie [0, 1]^2, a maksimum 20·x·y^2
+    na trójkącie to 80/27 w punkcie (1/3, 2/3) - ze stałą 1, jak w skrypcie R,
+    część obszaru byłaby losowana ze zbyt małym prawdopodobieństwem.
+    """
+    def gestosc(xy):
+        x, y = xy[:, 0], xy[:, 1]
+        return np.where(x + y < 1, 20 * x * y**2, 0.0)
+
+    return losuj_z_odrzucaniem(n, gestosc, lambda rng, k: rng.random((k, 2)), M=80 / 27, rng=seed)
+
+
+if __name__ == "__main__":
+    wynik = przyklad_trojkat(10**6)
+    proba = wynik['proba']
+    print(f"✅ {len(proba)} punktów, akceptacja {wynik['akceptacja']:.3f}, "
+          f"{wynik['partie']} partii, {wynik['na_sekunde']:.3g} punktów/s")
+    # (X, Y, 1 - X - Y) ma rozkład Dirichleta(2, 3, 1): E[X] = 1/3, E[Y] = 1/2
+    print(f"   średnie: x = {proba[:, 0].mean():.4f} (1/3), y = {proba[:, 1].mean():.4f} (1/2)")
@@ -0,0 +1,184 @@
+"""
+Pamięć podręczna na dysku dla wyrenderowanych wzorów i wykresów
+Klucz to skrót SHA-256 danych wejściowych (wraz z dpi, wersją matplotlib
+i skrótem źródła modułu z funkcją rysującą),
+pliki są zapisywane atomowo, a po przekroczeniu limitu rozmiaru usuwane
+są najdawniej używane (LRU według czasu modyfikacji)
+"""
+
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from importlib import metadata
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def wersja_matplotlib():
+    """Wersja matplotlib odczytana z metadanych pakietu, bez importowania go"""
+    try:
+        return metadata.version('matplotlib')
+    except metadata.PackageNotFoundError:
+        return 'brak'
+
+
+@lru_cache(maxsize=None)
+def wersja_kodu(sciezka):
+    """
+    Skrót pliku źródłowego modułu
+
+    Bajtkod funkcji nie obejmuje wywoływanych przez nią funkcji pomocniczych
+    ani ustawień modułu, więc każda zmiana pliku unieważnia jego rysunki.
+    """
+    try:
+        with open(sciezka, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return 'brak'
+
+
+def _aktualizuj(skrot, obiekt):
+    """Dopisuje obiekt do skrótu w sposób deterministyczny"""
+    if isinstance(obiekt, np.ndarray):
+        skrot.update(f'nd{obiekt.dtype.str}{obiekt.shape}'.encode())
+        skrot.update(np.ascontiguousarray(obiekt).tobytes())
+    elif isinstance(obiekt, (bytes, bytearray)):
+        skrot.update(b'b%d:' % len(obiekt))
+        skrot.update(obiekt)
+    elif isinstance(obiekt, (list, tuple)):
+        skrot.update(b'(%d' % len(obiekt))
+        for element in obiekt:
+            _aktualizuj(skrot, element)
+        skrot.update(b')')
+    elif isinstance(obiekt, (set, frozenset)):
+        # Kolejność elementów zbioru zależy od PYTHONHASHSEED
+        _aktualizuj(skrot, sorted(repr(element) for element in obiekt))
+    elif hasattr(obiekt, '__code__'):
+        _aktualizuj(skrot, wersja_kodu(obiekt.__code__.co_filename))
+        _aktualizuj_kod(skrot, obiekt.__code__)
+    else:
+        tekst = repr(obiekt).encode()
+        skrot.update(b's%d:' % len(tekst))
+        skrot.update(tekst)
+
+
+def _aktualizuj_kod(skrot, kod):
+    # Bajtkod funkcji rysującej: zmiana kodu unieważnia zapisane rysunki
+    skrot.update(kod.co_code)
+    for stala in kod.co_consts:
+        if hasattr(stala, 'co_code'):
+            _aktualizuj_kod(skrot, stala)
+        else:
+            _aktualizuj(skrot, stala)
+
+
+def klucz(*czesci):
+    """
+    Skrót SHA-256 z części klucza i wersji matplotlib
+
+    Parametry:
+    ----------
+    *czesci : dowolne
+        Napisy, liczby, tablice NumPy, krotki/listy lub funkcje (bajtkod
+        i skrót pliku, w którym są zdefiniowane)
+
+    Zwraca:
+    -------
+    str : Skrót szesnastkowy
+    """
+    skrot = hashlib.sha256()
+    _aktualizuj(skrot, (wersja_matplotlib(),) + czesci)
+    return skrot.hexdigest()
+
+
+class PamiecPodreczna:
+    """
+    Katalog z plikami <klucz>.bin i limitem łącznego rozmiaru
+
+    Bezpieczna dla wielu procesów: zapis idzie do pliku tymczasowego
+    i jest podmieniany przez os.replace, a plik usunięty przez inny proces
+    w trakcie odczytu traktujemy jak brak wpisu.
+    """
+
+    __slots__ = ('katalog', 'limit_bajtow')
+
+    def __init__(self, katalog, limit_bajtow=256 * 2**20):
+        self.katalog = katalog
+        self.limit_bajtow = limit_bajtow
+
+    def _sciezka(self, klucz):
+        return os.path.join(self.katalog, klucz + '.bin')
+
+    def pobierz(self, klucz):
+        """Zwraca zapisane bajty albo None"""
+        sciezka = self._sciezka(klucz)
+        try:
+            with open(sciezka, 'rb') as f:
+                dane = f.read()
+            # Odświeżenie czasu modyfikacji to "ostatnie użycie" dla LRU
+            os.utime(sciezka)
+        except FileNotFoundError:
+            return None
+        return dane
+
+    def zapisz(self, klucz, dane):
+        os.makedirs(self.katalog, exist_ok=True)
+        deskryptor, tymczasowy = tempfile.mkstemp(dir=self.katalog, suffix='.tmp')
+        try:
+            with os.fdopen(deskryptor, 'wb') as f:
+                f.write(dane)
+            os.replace(tymczasowy, self._sciezka(klucz))
+        except BaseException:
+            if os.path.exists(tymczasowy):
+                os.remove(tymczasowy)
+            raise
+        self.przytnij()
+
+    def przytnij(self):
+        """Usuwa najdawniej używane wpisy, aż rozmiar zmieści się w limicie"""
+        wpisy = []
+        for wpis in os.scandir(self.katalog):
+            if wpis.name.endswith('.bin'):
+                try:
+                    stat = wpis.stat()
+                except FileNotFoundError:
+                    continue
+                wpisy.append((stat.st_mtime_ns, stat.st_size, wpis.path))
+        razem = sum(rozmiar for _, rozmiar, _ in wpisy)
+        for _, rozmiar, sciezka in sorted(wpisy):
+            if razem <= self.limit_bajtow:
+                break
+            try:
+                os.remove(sciezka)
+            except FileNotFoundError:
+                pass
+            razem -= rozmiar
+
+    def pobierz_lub_utworz(self, klucz, utworz):
+        """
+        Zwraca zapisane bajty albo wynik utworz(), który zapisuje
+
+        Parametry:
+        ----------
+        klucz : str
+            Klucz z funkcji klucz()
+        utworz : callable
+            Funkcja bez argumentów zwracająca bajty
+        """
+        dane = self.pobierz(klucz)
+        if dane is None:
+            dane = utworz()
+            self.zapisz(klucz, dane)
+        return dane
+
+
+def domyslna():
+    """
+    Pamięć w katalogu ze zmiennej ANALIZA_PAMIEC (domyślnie ~/.cache/analiza_przezycia);
+    pusta wartość zmiennej wyłącza pamięć (zwraca None)
+    """
+    katalog = os.environ.get('ANALIZA_PAMIEC',
+                             os.path.join(os.path.expanduser('~'), '.cache', 'analiza_przezycia'))
+    return PamiecPodreczna(katalog) if katalog else None
@@ -0,0 +1,200 @@
+"""
+Symulacja pokrycia pasma Dvoretzky'ego-Kiefera-Wolfowitza (testy/script1.R)
+Pasmo F_n(t) ± epsilon_n, epsilon_n = sqrt(log(2/alpha)/(2n)), powinno zawierać
+prawdziwą dystrybuantę z prawdopodobieństwem co najmniej 1 - alpha.
+Porcja M replikacji to jedna macierz (M, n) posortowanych prób: statystyki
+pozycyjne rozkładu jednostajnego powstają bez sortowania z odstępów
+wykładniczych, a naruszenia pasma liczą porównania całych macierzy.
+Dla prób cenzurowanych zamiast dystrybuanty empirycznej jest krzywa KM.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from kaplan_meier import _km_posortowane
+from raporcik1 import _qEW_w_miejscu, pEW
+
+
+ROZKLADY = ('exp', 'EW')
+
+
+def epsilon_dkw(n, alpha=0.05):
+    """Połowa szerokości pasma DKW dla próby n-elementowej"""
+    return np.sqrt(np.log(2 / alpha) / (2 * n))
+
+
+def _kwantyl(p, rozklad, parametry):
+    """Funkcja kwantylowa liczona w buforze p (zachowuje kolejność)"""
+    if rozklad == 'exp':
+        (lambdaa,) = parametry
+        np.negative(p, out=p)
+        np.log1p(p, out=p)
+        p /= -lambdaa
+        return p
+    return _qEW_w_miejscu(p, *parametry)
+
+
+def _dystrybuanta(x, rozklad, parametry):
+    if rozklad == 'exp':
+        (lambdaa,) = parametry
+        return -np.expm1(-lambdaa * x)
+    return pEW(x, *parametry)
+
+
+def _porcja_pelna(n, M, epsilon, rozklad, parametry, ziarno):
+    """
+    M prób pełnych: maksymalne odchylenie D i liczba naruszonych punktów
+
+    U_(i) = S_i / S_(n+1), gdzie S to skumulowane sumy n + 1 zmiennych Exp(1),
+    ma rozkład i-tej statystyki pozycyjnej z U(0, 1); funkcja kwantylowa jest
+    rosnąca, więc próba po przekształceniu jest od razu posortowana.
+    """
+    rng = np.random.default_rng(ziarno)
+    S = rng.standard_exponential((M, n + 1))
+    np.cumsum(S, axis=1, out=S)
+    x = np.divide(S[:, :n], S[:, n:], out=S[:, :n])
+    x = _kwantyl(x, rozklad, parametry)
+    F = _dystrybuanta(x, rozklad, parametry)
+    del S, x
+
+    # Dystrybuanta empiryczna w i-tym punkcie to i/n, tuż przed nim (i-1)/n
+    po = np.arange(1, n + 1) / n
+    przed = np.arange(n) / n
+    gora = np.subtract(po, F)
+    dol = np.subtract(F, przed, out=F)
+    D = np.maximum(gora.max(axis=1), dol.max(axis=1))
+    naruszone = np.count_nonzero((gora > epsilon) | (dol > epsilon), axis=1)
+    return D, naruszone, np.zeros(M)
+
+
+def _porcja_cenzurowana(n, M, epsilon, rozklad, parametry, eta, ziarno):
+    """
+    M prób z cenzurowaniem losowym C ~ Exp(skala eta): odchylenia krzywej KM
+    od prawdziwej funkcji przeżycia na przedziale [0, największy czas]
+    """
+    rng = np.random.default_rng(ziarno)
+    x = _kwantyl(rng.random((M, n)), rozklad, parametry)
+    c = rng.exponential(scale=eta, size=(M, n))
+    zdarzenia = x <= c
+    np.minimum(x, c, out=x)
+    del c
+    # Czasy są ciągłe, więc remisów nie ma i wystarczy zwykłe sortowanie
+    kolejnosc = np.argsort(x, axis=1)
+    t = np.take_along_axis(x, kolejnosc, axis=1)
+    zdarzenia = np.take_along_axis(zdarzenia, kolejnosc, axis=1)
+    del x, kolejnosc
+
+    S_km, _ = _km_posortowane(t, zdarzenia)
+    S = 1 - _dystrybuanta(t, rozklad, parametry)
+    # KM tuż przed i-tym czasem to wartość po poprzednim (1 przed pierwszym)
+    przed = np.concatenate([np.ones((M, 1)), S_km[:, :-1]], axis=1)
+    po = np.abs(S_km - S)
+    np.subtract(przed, S, out=przed)
+    np.abs(przed, out=przed)
+    D = np.maximum(po.max(axis=1), przed.max(axis=1))
+    naruszone = np.count_nonzero((po > epsilon) | (przed > epsilon), axis=1)
+    return D, naruszone, 1 - zdarzenia.mean(axis=1)
+
+
+def pokrycie_dkw(n, M=10**6, alpha=0.05, rozklad='exp', parametry=(1.0,), eta=None,
+                 seed=None, procesy=None, budzet_pamieci=256 * 2**20):
+    """
+    Empiryczne pokrycie pasma DKW
+
+    Parametry:
+    ----------
+    n : int
+        Rozmiar próby
+    M : int
+        Liczba replikacji (pokrycie z dokładnością do 0.001 wymaga około 10^6)
+    alpha : float
+        Poziom istotności pasma
+    rozklad : str
+        'exp' (parametry = (λ,)) albo 'EW' (parametry = (α, β, γ), pEW z raporcik1)
+    parametry : tuple
+        Parametry rozkładu
+    eta : float, opcjonalnie
+        Skala wykładniczego czasu cenzurowania; wtedy zamiast dystrybuanty
+        empirycznej porównywana jest krzywa KM z prawdziwą funkcją przeżycia
+    seed : int, opcjonalnie
+        Ziarno; porcje mają stały rozmiar i osobne ziarna (SeedSequence.spawn),
+        więc wynik nie zależy od liczby procesów
+    procesy : int, opcjonalnie
+        Liczba procesów; domyślnie wszystkie rdzenie, 1 = bez puli
+    budzet_pamieci : int
+        Przybliżona pamięć na jedną porcję replikacji w bajtach
+
+    Zwraca:
+    -------
+    dict : 'epsilon', 'pokrycie' (ułamek replikacji bez naruszenia),
+           'blad_standardowy', 'naruszenia' (liczba replikacji z naruszeniem),
+           'naruszone_punkty' (łączna liczba punktów poza pasmem, jak licznik
+           error w script1.R), 'D' (średnie maksymalne odchylenie) i 'cenzura'
+           (średni ułamek obserwacji cenzurowanych)
+    """
+    if rozklad not in ROZKLADY:
+        raise ValueError(f"Nieznany rozkład: {rozklad!r}")
+    epsilon = float(epsilon_dkw(n, alpha))
+    # Próba cenzurowana potrzebuje kilku tablic (M, n) naraz
+    rozmiar = int(max(1, min(M, budzet_pamieci // ((48 if eta is not None else 24) * (n + 1)))))
+    porcje = [min(rozmiar, M - s) for s in range(0, M, rozmiar)]
+    ziarna = np.random.SeedSequence(seed).spawn(len(porcje))
+    if eta is None:
+        funkcja, argumenty = _porcja_pelna, (n, epsilon, rozklad, tuple(parametry))
+    else:
+        funkcja, argumenty = _porcja_cenzurowana, (n, epsilon, rozklad, tuple(parametry), eta)
+
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+    if procesy > 1 and len(porcje) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesy, len(porcje))) as pula:
+            zadania = [pula.submit(funkcja, argumenty[0], m, *argumenty[1:], z)
+                       for m, z in zip(porcje, ziarna)]
+            wyniki = [zadanie.result() for zadanie in zadania]
+    else:
+        wyniki = [funkcja(argumenty[0], m, *argumenty[1:], z) for m, z in zip(porcje, ziarna)]
+
+    D = np.concatenate([w[0] for w in wyniki])
+    naruszone = np.concatenate([w[1] for w in wyniki])
+    cenzura = np.concatenate([w[2] for w in wyniki])
+    pokrycie = float(np.mean(D <= epsilon))
+    return {
+        'n': n,
+        'M': M,
+        'alpha': alpha,
+        'epsilon': epsilon,
+        'pokrycie': pokrycie,
+        'blad_standardowy': float(np.sqrt(pokrycie * (1 - pokrycie) / M)),
+        'naruszenia': int(np.count_nonzero(D > epsilon)),
+        'naruszone_punkty': int(naruszone.sum()),
+        'D': float(D.mean()),
+        'cenzura': float(cenzura.mean())
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pokrycie pasma DKW (port testy/script1.R)")
+    parser.add_argument('--n', type=int, default=100, help="rozmiar próby (domyślnie 100)")
+    parser.add_argument('--M', type=int, default=10**6, help="liczba replikacji (domyślnie 10^6)")
+    parser.add_argument('--alpha', type=float, default=0.05, help="poziom istotności pasma")
+    parser.add_argument('--rozklad', choices=ROZKLADY, default='exp', help="rozkład próby")
+    parser.add_argument('--parametry', type=float, nargs='+', default=None,
+                        help="parametry rozkładu: λ dla exp, α β γ dla EW")
+    parser.add_argument('--eta', type=float, default=None,
+                        help="skala wykładniczego cenzurowania (krzywa KM zamiast F_n)")
+    parser.add_argument('--seed', type=int, default=131131, help="ziarno (jak set.seed w script1.R)")
+    parser.add_argument('--procesy', type=int, default=None, help="liczba procesów")
+    argumenty = parser.parse_args()
+    parametry = argumenty.parametry or ((1.0,) if argumenty.rozklad == 'exp' else (2, 4, 3))
+    wynik = pokrycie_dkw(argumenty.n, argumenty.M, argumenty.alpha, argumenty.rozklad, parametry,
+                         argumenty.eta, argumenty.seed, argumenty.procesy)
+    print(f"ε_n = {wynik['epsilon']:.5f}")
+    print(f"Pokrycie: {wynik['pokrycie']:.4f} ± {wynik['blad_standardowy']:.4f} "
+          f"(nominalnie >= {1 - argumenty.alpha:g})")
+    print(f"Replikacje z naruszeniem: {wynik['naruszenia']} z {wynik['M']}, "
+          f"punkty poza pasmem: {wynik['naruszone_punkty']}")
+    if argumenty.eta is not None:
+        print(f"Średni udział cenzurowanych: {wynik['cenzura']:.3f}")
@@ -0,0 +1,211 @@
+"""
+Profilowanie etapów tworzenia raportu
+Dla każdego etapu zapisywany jest czas rzeczywisty, czas procesora i szczyt
+pamięci (tracemalloc); wynik można zapisać jako JSON albo plik Chrome trace
+(chrome://tracing, Perfetto). Gdy profilowanie jest wyłączone, etap() zwraca
+gotowy, pusty kontekst, więc koszt instrumentacji jest pomijalny.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Aktywny profiler procesu (None = profilowanie wyłączone)
+_profiler = None
+
+_NIC = contextlib.nullcontext()
+
+
+class _Etap:
+    """Kontekst mierzący jeden etap i dopisujący zdarzenie do profilera"""
+
+    __slots__ = ('profiler', 'nazwa', 'atrybuty', 'start', 'cpu', 'pamiec')
+
+    def __init__(self, profiler, nazwa, atrybuty):
+        self.profiler = profiler
+        self.nazwa = nazwa
+        self.atrybuty = atrybuty
+
+    def __enter__(self):
+        self.pamiec = self.profiler._otworz()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, typ, wyjatek, slad):
+        koniec = time.perf_counter_ns()
+        cpu = time.process_time() - self.cpu
+        szczyt = self.profiler._zamknij()
+        zdarzenie = {
+            'nazwa': self.nazwa,
+            'poczatek_us': self.start / 1000,
+            'czas_s': (koniec - self.start) / 1e9,
+            'cpu_s': cpu,
+            'glebokosc': len(self.profiler._szczyty),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if self.pamiec is not None:
+            zdarzenie['pamiec_start_B'] = self.pamiec
+            zdarzenie['pamiec_szczyt_B'] = szczyt
+        if typ is not None:
+            # Błąd jest zapisywany w śladzie, ale dalej propagowany
+            zdarzenie['blad'] = f'{typ.__name__}: {wyjatek}'
+        if self.atrybuty:
+            zdarzenie['atrybuty'] = self.atrybuty
+        self.profiler.zdarzenia.append(zdarzenie)
+        return False
+
+
+class Profiler:
+    """
+    Zbiór zmierzonych etapów jednego procesu
+
+    Parametry:
+    ----------
+    pamiec : bool
+        Czy mierzyć szczyt pamięci przez tracemalloc (spowalnia alokacje)
+    """
+
+    __slots__ = ('zdarzenia', 'pamiec', '_szczyty', '_wlaczyl_tracemalloc')
+
+    def __init__(self, pamiec=True):
+        self.zdarzenia = []
+        self.pamiec = pamiec
+        # Szczyty pamięci otwartych etapów (stos), bo tracemalloc ma jeden licznik
+        self._szczyty = []
+        self._wlaczyl_tracemalloc = False
+        if pamiec and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._wlaczyl_tracemalloc = True
+
+    def etap(self, nazwa, **atrybuty):
+        return _Etap(self, nazwa, atrybuty)
+
+    def _otworz(self):
+        if not self.pamiec:
+            self._szczyty.append(None)
+            return None
+        obecna, szczyt = tracemalloc.get_traced_memory()
+        if self._szczyty:
+            self._szczyty[-1] = max(self._szczyty[-1], szczyt)
+        tracemalloc.reset_peak()
+        self._szczyty.append(obecna)
+        return obecna
+
+    def _zamknij(self):
+        szczyt_etapu = self._szczyty.pop()
+        if not self.pamiec:
+            return None
+        szczyt = max(szczyt_etapu, tracemalloc.get_traced_memory()[1])
+        # Szczyt etapu wewnętrznego jest też szczytem etapu nadrzędnego
+        if self._szczyty:
+            self._szczyty[-1] = max(self._szczyty[-1], szczyt)
+        return szczyt
+
+    def dolacz(self, zdarzenia):
+        """Dołącza zdarzenia zmierzone w innym procesie (np. w puli)"""
+        # Zagnieżdżone w etapie, który jest teraz otwarty w tym procesie
+        for z in zdarzenia:
+            z['glebokosc'] += len(self._szczyty)
+        self.zdarzenia.extend(zdarzenia)
+
+    def zakoncz(self):
+        if self._wlaczyl_tracemalloc:
+            tracemalloc.stop()
+            self._wlaczyl_tracemalloc = False
+
+    def podsumowanie(self):
+        """
+        Zwraca:
+        -------
+        dict : Zdarzenia i dane procesu (maksymalny RSS w kB, jeśli dostępny)
+        """
+        proces = {'pid': os.getpid()}
+        if resource is not None:
+            proces['maxrss_kB'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'proces': proces, 'zdarzenia': sorted(self.zdarzenia, key=lambda z: z['poczatek_us'])}
+
+    def chrome_trace(self):
+        """Zdarzenia w formacie Chrome trace (zdarzenia kompletne, ph='X')"""
+        zdarzenia = []
+        for z in self.zdarzenia:
+            argumenty = {k: v for k, v in z.items()
+                         if k not in ('nazwa', 'poczatek_us', 'czas_s', 'pid', 'tid', 'glebokosc')}
+            zdarzenia.append({
+                'name': z['nazwa'], 'cat': 'raport', 'ph': 'X',
+                'ts': z['poczatek_us'], 'dur': z['czas_s'] * 1e6,
+                'pid': z['pid'], 'tid': z['tid'], 'args': argumenty
+            })
+        return {'traceEvents': zdarzenia, 'displayTimeUnit': 'ms'}
+
+    def zapisz(self, sciezka, format='chrome'):
+        """
+        Zapisuje ślad do pliku
+
+        Parametry:
+        ----------
+        sciezka : str
+            Plik wynikowy
+        format : str
+            'chrome' (chrome://tracing, Perfetto) albo 'json' (podsumowanie())
+        """
+        if format not in ('chrome', 'json'):
+            raise ValueError(f"Nieznany format śladu: {format}")
+        dane = self.chrome_trace() if format == 'chrome' else self.podsumowanie()
+        with open(sciezka, 'w', encoding='utf-8') as f:
+            json.dump(dane, f, ensure_ascii=False, indent=1)
+
+
+def wlacz(pamiec=True):
+    """Włącza profilowanie w tym procesie i zwraca profiler"""
+    global _profiler
+    _profiler = Profiler(pamiec)
+    return _profiler
+
+
+def wylacz():
+    """Wyłącza profilowanie i zwraca profiler z zebranymi zdarzeniami (albo None)"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.zakoncz()
+    return profiler
+
+
+def aktywny():
+    return _profiler
+
+
+def etap(nazwa, **atrybuty):
+    """
+    Kontekst mierzący etap, np. ``with etap('szablon'): ...``
+
+    Przy wyłączonym profilowaniu zwraca wspólny, pusty kontekst.
+    """
+    if _profiler is None:
+        return _NIC
+    return _profiler.etap(nazwa, **atrybuty)
+
+
+def profiluj_zadanie(pamiec, nazwa, funkcja, *argumenty):
+    """
+    Wykonuje funkcję w procesie roboczym jako etap i zwraca (wynik, zdarzenia),
+    żeby proces główny mógł dołączyć zdarzenia do swojego śladu
+    """
+    profiler = wlacz(pamiec)
+    try:
+        with profiler.etap(nazwa):
+            wynik = funkcja(*argumenty)
+    finally:
+        wylacz()
+    return wynik, profiler.zdarzenia
@@ -1,4 +1,7 @@
-﻿import numpy as np
+﻿import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import random
 
 
@@ -18,13 +21,307 @@ def qEW(p, alpha, beta, gamma):
 
 
 def hazard_EW(x, alpha, beta, gamma):
-    f = dEW(x, alpha, beta, gamma)
-    F = pEW(x, alpha, beta, gamma)
-    
-    # Unikanie dzielenia przez zero
-    survival = 1 - F
-    return np.where(survival > 1e-10, f / survival, np.inf)
+    # Hazard liczony jako exp(log f - log S), bez dzielenia przez zero
+    # i bez obcinania do np.inf, gdy przeżycie jest bardzo małe
+    return EW_kernel(x, alpha, beta, gamma, wyjscia=('hazard',))['hazard']
+
+
+WYJSCIA_EW = ('pdf', 'cdf', 'sf', 'hazard', 'logpdf', 'logcdf', 'logsf', 'loghazard')
+
+
+def EW_kernel(x, alpha, beta, gamma, wyjscia=('pdf', 'cdf'), out=None, dtype=None,
+              porcja=1 << 13, watki=None):
+    """
+    Wspólne liczenie wybranych funkcji rozkładu EW w jednym przebiegu
+
+    (x/β)^α i exp(...) są liczone raz na porcję danych, a log(1 - e^(-z))
+    i 1 - F przez log1p/expm1, więc ogon rozkładu nie ucieka do 0 ani inf.
+
+    Parametry:
+    ----------
+    x : array-like
+        Punkty, w których liczymy funkcje
+    alpha, beta, gamma : float
+        Parametry rozkładu EW
+    wyjscia : sekwencja str
+        Podzbiór WYJSCIA_EW
+    out : dict, opcjonalnie
+        Bufory wyjściowe {nazwa: np.ndarray} o kształcie x; brakujące są tworzone
+    dtype : np.dtype, opcjonalnie
+        float32 lub float64; domyślnie float32 dla wejścia float32, inaczej float64
+    porcja : int
+        Liczba elementów przetwarzanych naraz (rozmiar rzędu pamięci podręcznej)
+    watki : int, opcjonalnie
+        Liczba wątków dla dużych wejść; domyślnie liczba rdzeni
+
+    Zwraca:
+    -------
+    dict : {nazwa: np.ndarray} dla każdej pozycji z wyjscia
+    """
+    x = np.asarray(x)
+    if dtype is None:
+        dtype = np.float32 if x.dtype == np.float32 else np.float64
+    dtype = np.dtype(dtype)
+    nieznane = set(wyjscia) - set(WYJSCIA_EW)
+    if nieznane:
+        raise ValueError(f"Nieznane wyjścia: {sorted(nieznane)}")
+
+    out = dict(out or {})
+    for nazwa in wyjscia:
+        if nazwa not in out:
+            out[nazwa] = np.empty(x.shape, dtype=dtype)
+        elif out[nazwa].shape != x.shape or not out[nazwa].flags.c_contiguous:
+            raise ValueError(f"Bufor '{nazwa}' musi być ciągły i mieć kształt {x.shape}")
+    wynik = {nazwa: out[nazwa] for nazwa in wyjscia}
+
+    plaskie_x = np.ascontiguousarray(x, dtype=dtype).reshape(-1)
+    plaskie = {nazwa: b.reshape(-1) for nazwa, b in wynik.items()}
+    # Stałe liczone raz na wywołanie, nie na porcję
+    parametry = tuple(dtype.type(p) for p in (alpha, beta, gamma,
+                                               np.log(beta), np.log(alpha * gamma / beta)))
+    if plaskie_x.size <= porcja:
+        # Jedna porcja: bez puli i bez dzielenia buforów
+        _EW_porcja(plaskie_x, *parametry, plaskie)
+        return wynik
+
+    granice = [(s, min(s + porcja, plaskie_x.size)) for s in range(0, plaskie_x.size, porcja)]
+
+    def licz(zakresy):
+        for s, e in zakresy:
+            _EW_porcja(plaskie_x[s:e], *parametry, {n: b[s:e] for n, b in plaskie.items()})
+
+    if watki is None:
+        watki = _rdzenie()
+    watki = min(watki, len(granice))
+    if watki > 1:
+        # Ufunc-i NumPy zwalniają GIL, więc wątki liczą porcje równolegle;
+        # każdy wątek dostaje co watki-tą porcję
+        list(_pula_watkow().map(licz, [granice[i::watki] for i in range(watki)]))
+    else:
+        licz(granice)
+    return wynik
+
+
+_PULA = None
+
+
+def _rdzenie():
+    """Liczba rdzeni dostępnych dla procesu (z uwzględnieniem przypisania do CPU)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _pula_watkow():
+    """Jedna pula wątków na cały moduł, tworzona przy pierwszym użyciu"""
+    global _PULA
+    if _PULA is None:
+        _PULA = ThreadPoolExecutor(max_workers=_rdzenie())
+    return _PULA
+
+
+# Wyjścia liczone wprost, bez logarytmów
+_WPROST = frozenset({'pdf', 'cdf', 'sf', 'hazard'})
+
+
+def _EW_porcja(x, alpha, beta, gamma, log_beta, log_stala, out):
+    """
+    Liczy wyjścia EW_kernel dla jednej porcji i zapisuje je do buforów out
+
+    pdf, cdf, sf i hazard są liczone wprost: z = (x/β)^α, 1 - e^(-z) przez
+    expm1, f = αγ/β·(x/β)^(α-1)·e^(-z)·(1 - e^(-z))^(γ-1). S = 1 - F jest
+    poprawiane przez expm1/log1p tylko w ogonie (S < 2^-10), a elementy,
+    gdzie S ginie w niedomiarze albo x <= 0, są liczone w skali log.
+    """
+    if not _WPROST.issuperset(out):
+        _EW_porcja_log(x, alpha, beta, gamma, log_beta, log_stala, out)
+        return
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+        u = x / beta
+        # Operator ** ma szybką ścieżkę dla wykładnika 2 (np.square), np.power nie
+        z = u**alpha
+        u_a1 = np.divide(z, u, out=u)
+        mz = np.negative(z, out=z)
+        e = np.exp(mz)
+        w = np.expm1(mz)
+        np.negative(w, out=w)
+        # w^(γ-1), potem F = w^γ
+        F = w**(gamma - 1)
+        if 'pdf' in out or 'hazard' in out:
+            f = np.multiply(u_a1, alpha * gamma / beta, out=out.get('pdf', u_a1))
+            f *= e
+            f *= F
+        F = np.multiply(F, w, out=out.get('cdf', F))
+        if 'sf' in out or 'hazard' in out:
+            # Błąd względny 1 - F to około eps/S, więc wystarczy poprawić ogon
+            S = np.subtract(1, F, out=out.get('sf', w))
+            if S.min() < 2**-10:
+                ogon = np.flatnonzero(S < 2**-10)
+                # S = 1 - (1 - e^(-z))^γ = -expm1(γ·log1p(-e^(-z)))
+                S[ogon] = -np.expm1(gamma * np.log1p(-e[ogon]))
+            if 'hazard' in out:
+                np.divide(f, S, out=out['hazard'])
+
+        # x <= 0 i S w niedomiarze (min daje nan, gdy jest nan) - w skali log
+        if not x.min() > 0 or ('hazard' in out and not S.min() > 1e-290):
+            zle = ~(x > 0)
+            if 'hazard' in out:
+                zle |= ~(S > 1e-290)
+            zle = np.flatnonzero(zle)
+            czesc = {n: np.empty(zle.size, dtype=b.dtype) for n, b in out.items()}
+            _EW_porcja_log(x[zle], alpha, beta, gamma, log_beta, log_stala, czesc)
+            for n, b in czesc.items():
+                out[n][zle] = b
+
+
+def _EW_porcja_log(x, alpha, beta, gamma, log_beta, log_stala, out):
+    """
+    Wyjścia EW_kernel w skali log dla jednej porcji
+
+    log(1 - e^(-z)) i log(1 - F) są liczone przez log1p, a tylko elementy,
+    gdzie odejmowana wartość przekracza 1/2 (tam log1p traci dokładność),
+    są poprawiane przez log(-expm1(...)) na indeksach, bez pełnych masek.
+    """
+    potrzebne = set(out)
+    gestosc = potrzebne & {'pdf', 'logpdf', 'hazard', 'loghazard'}
+    przezycie = potrzebne & {'sf', 'logsf', 'hazard', 'loghazard'}
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        lx = np.log(x)
+        lx -= log_beta
+        # mz = -(x/β)^α
+        mz = np.multiply(lx, alpha)
+        np.exp(mz, out=mz)
+        np.negative(mz, out=mz)
+        log_w = np.exp(mz)
+        male = np.flatnonzero(log_w > 0.5)
+        np.negative(log_w, out=log_w)
+        np.log1p(log_w, out=log_w)
+        if male.size:
+            log_w[male] = np.log(-np.expm1(mz[male]))
+        log_F = np.multiply(log_w, gamma)
+        niedodatnie = not (x > 0).all()
+        if niedodatnie:
+            log_F[~(x > 0)] = -np.inf
+
+        if 'cdf' in out or przezycie:
+            F = np.exp(log_F, out=out.get('cdf'))
+        if 'logcdf' in out:
+            out['logcdf'][...] = log_F
+        if przezycie:
+            # log S = log1p(-F); dla F > 1/2 dokładniej log(-expm1(log F))
+            duze = np.flatnonzero(F > 0.5)
+            log_S = np.negative(F)
+            np.log1p(log_S, out=log_S)
+            if duze.size:
+                log_S[duze] = np.log(-np.expm1(log_F[duze]))
+            # Gdy γ·e^(-z) < eps, S = γ·e^(-z) z dokładnością do eps; e^(-z)
+            # może już być w niedomiarze, a log S = log γ - z nadal jest skończony
+            prog = np.log(np.finfo(x.dtype).eps / gamma)
+            # fmin pomija nan (x < 0)
+            if np.fmin.reduce(mz) < prog:
+                ogon = np.flatnonzero(mz < prog)
+                log_S[ogon] = np.log(gamma) + mz[ogon]
+            if 'logsf' in out:
+                out['logsf'][...] = log_S
+            if 'sf' in out:
+                np.exp(log_S, out=out['sf'])
+        if gestosc:
+            log_f = lx
+            log_f *= alpha - 1
+            log_f += log_stala
+            log_f += mz
+            log_w *= gamma - 1
+            log_f += log_w
+            if niedodatnie:
+                # Granica w zerze: f(x) ~ x^(αγ - 1); poza nośnikiem gęstość 0
+                wykladnik = alpha * gamma - 1
+                granica = np.inf if wykladnik < 0 else (-np.inf if wykladnik > 0 else -log_beta)
+                log_f[x == 0] = granica
+                log_f[x < 0] = -np.inf
+            if 'logpdf' in out:
+                out['logpdf'][...] = log_f
+            if 'pdf' in out:
+                np.exp(log_f, out=out['pdf'])
+            if 'hazard' in out or 'loghazard' in out:
+                log_f -= log_S
+                if 'loghazard' in out:
+                    out['loghazard'][...] = log_f
+                if 'hazard' in out:
+                    np.exp(log_f, out=out['hazard'])
+
+
+def _qEW_w_miejscu(p, alpha, beta, gamma):
+    # qEW liczone w tym samym buforze, bez tablic tymczasowych
+    np.power(p, 1 / gamma, out=p)
+    np.negative(p, out=p)
+    np.log1p(p, out=p)
+    np.negative(p, out=p)
+    np.power(p, 1 / alpha, out=p)
+    p *= beta
+    return p
+
+
+def rEW(size, alpha, beta, gamma, rng=None, out=None, porcja=1 << 20):
+    """
+    Próba z rozkładu EW metodą odwrotnej dystrybuanty
+
+    Parametry:
+    ----------
+    size : int lub tuple
+        Rozmiar próby (może być None, gdy podano out)
+    alpha, beta, gamma : float
+        Parametry rozkładu EW
+    rng : np.random.Generator lub int, opcjonalnie
+        Generator (albo ziarno) liczb losowych
+    out : np.ndarray, opcjonalnie
+        Ciągły bufor float64, który zostanie wypełniony próbą
+    porcja : int
+        Liczba wartości losowanych naraz
+
+    Zwraca:
+    -------
+    np.ndarray : Próba (ten sam obiekt co out, jeśli podano)
+    """
+    rng = np.random.default_rng(rng)
+    if out is None:
+        out = np.empty(size, dtype=np.float64)
+    elif out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError("Bufor out musi być ciągłą tablicą float64")
+    elif size is not None and out.shape != tuple(np.atleast_1d(size)):
+        raise ValueError(f"Bufor ma kształt {out.shape}, a oczekiwano {size}")
+    plaski = out.reshape(-1)
+    for s in range(0, plaski.size, porcja):
+        kawalek = plaski[s:s + porcja]
+        rng.random(out=kawalek)
+        _qEW_w_miejscu(kawalek, alpha, beta, gamma)
+    return out
+
+
+def rEW_porcje(size, alpha, beta, gamma, rng=None, porcja=1 << 20):
+    """
+    Próba z rozkładu EW zwracana porcjami (iterator)
+
+    Kolejne porcje pochodzą z tego samego strumienia generatora co rEW,
+    więc złączone dają tę samą próbę, a w pamięci jest tylko jedna porcja.
+
+    Parametry:
+    ----------
+    size : int
+        Łączny rozmiar próby
+    alpha, beta, gamma : float
+        Parametry rozkładu EW
+    rng : np.random.Generator lub int, opcjonalnie
+        Generator (albo ziarno) liczb losowych
+    porcja : int
+        Rozmiar jednej porcji
 
-def rEW(size, alpha, beta, gamma):
-    samples = np.random.uniform(0, 1, size=100)
-    return pEW(samples, alpha, beta, gamma)
+    Zwraca:
+    -------
+    iterator np.ndarray : Kolejne porcje (ostatnia może być krótsza)
+    """
+    rng = np.random.default_rng(rng)
+    for s in range(0, size, porcja):
+        kawalek = rng.random(min(porcja, size - s))
+        yield _qEW_w_miejscu(kawalek, alpha, beta, gamma)
@@ -1,43 +1,206 @@
+"""
+Symulacje prób z cenzurowaniem typu I, typu II i losowym
+Zgodność wyników generatorów z dawnym kodem:
+- first_type_error i second_type_error zwracają, jak dawniej, listy czasów,
+  a first_type_sample i second_type_sample te same czasy jako SurvivalSample;
+- random_type_error zwraca SurvivalSample, którego iteracja daje pary
+  (czas, flaga) jak dawna lista par, więc istniejące pętle działają bez zmian;
+- funkcje stats_* przyjmują zarówno listy, jak i SurvivalSample
+"""
+
 import numpy as np
 from numpy import random
 
-def dexp(lambdaa, alpha):
-    t = random.rand()
+class SurvivalSample:
+    """
+    Próba danych przeżycia: czasy (float64) i flagi cenzurowania (uint8,
+    1 = obserwacja cenzurowana), czyli 9 bajtów na obserwację
+
+    Iteracja daje pary (czas, flaga) jak dawna lista z random_type_error,
+    indeks całkowity - jedną parę, a wycinek lub maska - nową próbę
+    (dla wycinka bez kopiowania tablic). Tablice mogą być widokami np.memmap,
+    np. kolumnami z dane_przezycia.otworz_kolumny.
+    """
+
+    __slots__ = ('time', 'censored')
+
+    def __init__(self, time, censored=None):
+        self.time = np.asarray(time, dtype=np.float64)
+        if censored is None:
+            censored = np.zeros(self.time.shape, dtype=np.uint8)
+        self.censored = np.asarray(censored, dtype=np.uint8)
+        if self.time.ndim != 1 or self.time.shape != self.censored.shape:
+            raise ValueError("time i censored muszą być jednowymiarowe i tej samej długości")
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Próba z listy par (czas, flaga)"""
+        pairs = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    @classmethod
+    def concat(cls, samples):
+        """Łączy kilka prób w jedną (jedna alokacja na kolumnę)"""
+        samples = list(samples)
+        return cls(np.concatenate([s.time for s in samples]),
+                   np.concatenate([s.censored for s in samples]))
+
+    def __len__(self):
+        return self.time.shape[0]
+
+    def __iter__(self):
+        return zip(self.time.tolist(), self.censored.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return float(self.time[key]), int(self.censored[key])
+        return SurvivalSample(self.time[key], self.censored[key])
+
+    def __add__(self, other):
+        return SurvivalSample.concat((self, other))
+
+    def __repr__(self):
+        return f"SurvivalSample(n={len(self)}, n_censored={int(self.censored.sum())})"
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + self.censored.nbytes
+
+    @property
+    def complete_mask(self):
+        return self.censored == 0
+
+    @property
+    def censored_mask(self):
+        return self.censored == 1
+
+    @property
+    def complete(self):
+        """Czasy obserwacji pełnych"""
+        return self.time[self.complete_mask]
+
+    @property
+    def censored_times(self):
+        """Czasy obserwacji cenzurowanych"""
+        return self.time[self.censored_mask]
+
+    def stats_type1(self, t0=None):
+        """
+        Te same klucze co stats_type1; obserwacje pełne to czasy < t0,
+        a bez t0 - obserwacje z flagą 0
+        """
+        complete = self.complete if t0 is None else self.time[self.time < t0]
+        return {
+            'n': len(self),
+            'n_complete': len(complete),
+            'mean': np.mean(complete),
+            'median': np.median(complete),
+            'std': np.std(complete, ddof=1)
+        }
+
+    def stats_type2(self, m=None):
+        """Te same klucze co stats_type2; m domyślnie to liczba obserwacji pełnych"""
+        if m is None:
+            m = len(self) - int(self.censored.sum())
+        complete = self.time[:m]
+        return {
+            'n': len(self),
+            'n_complete': m,
+            'censoring_value': self.time[m] if m < len(self) else np.nan,
+            'mean': np.mean(complete),
+            'median': np.median(complete),
+            'std': np.std(complete, ddof=1)
+        }
+
+    def stats_random(self):
+        """Te same klucze co stats_random"""
+        return stats_random(self.time, self.censored)
+
+
+def dexp(lambdaa, alpha, size=None):
+    t = random.random_sample(size)
     return -(1/lambdaa) * np.log(1 - t**(1/alpha))
 
+# Generatory losują z globalnego np.random w tej samej kolejności co dawne
+# pętle po dexp, więc po np.random.seed dają te same wartości (z dokładnością
+# do ostatniego bitu - wektorowy logarytm może zaokrąglać inaczej niż skalarny)
+
+def first_type_sample(t0, n = 10, lambdaa = 1, alpha = 1):
+    ext = dexp(lambdaa, alpha, n)
+    return SurvivalSample(np.minimum(ext, t0), ext > t0)
+
 def first_type_error(t0, n = 10, lambdaa = 1, alpha = 1):
-    ext = [dexp(lambdaa, alpha) for _ in range(n)]
-    for i in range(len(ext)):
-        if ext[i] > t0:
-            ext[i] = t0
-    return ext
+    return first_type_sample(t0, n, lambdaa, alpha).time.tolist()
 
 #print(first_type_error(1))
 
+def second_type_sample(m, n = 10, lambdaa = 1, alpha = 1):
+    ext = np.sort(dexp(lambdaa, alpha, n))
+    # Obserwacje od m-tej dalej są cenzurowane wartością m-tej statystyki pozycyjnej
+    ext[m:] = ext[m - 1]
+    censored = np.zeros(n, dtype=np.uint8)
+    censored[m:] = 1
+    return SurvivalSample(ext, censored)
+
 def second_type_error(m, n = 10, lambdaa = 1, alpha = 1):
-    ext = [dexp(lambdaa, alpha) for _ in range(n)]
-    ext.sort()
-    ext = ext[:m]
-    ext += [max(ext) for _ in range(n - m)]
-    return ext
+    return second_type_sample(m, n, lambdaa, alpha).time.tolist()
 
 #print(second_type_error(5))
 
 def random_type_error(eta, n = 10, lambdaa = 1, alpha = 1):
-    ext = [dexp(lambdaa, alpha) for _ in range(n)]
-    ext2 = [np.random.exponential(scale=eta) for _ in range(n)]
-    ext3 = []
-    for i in range(len(ext)):
-        if ext[i] > ext2[i]:
-            ext3.append((ext[i], 1))
-        else:
-            ext3.append((ext2[i], 0))
-    return ext3
+    ext = dexp(lambdaa, alpha, n)
+    ext2 = np.random.exponential(scale=eta, size=n)
+    flags = ext > ext2
+    return SurvivalSample(np.where(flags, ext, ext2), flags)
 
 #print(random_type_error(1))
 
+# Wersje wsadowe: cała macierz (replications, n) w jednym wywołaniu.
+# Flagi mają tę samą konwencję co w random_type_error: 1 = obserwacja cenzurowana.
+
+def dexp_batch(size, lambdaa=1, alpha=1, rng=None):
+    rng = np.random.default_rng(rng)
+    t = rng.random(size)
+    return -(1/lambdaa) * np.log(1 - t**(1/alpha))
+
+def first_type_batch(t0, n=10, replications=1, lambdaa=1, alpha=1, rng=None):
+    ext = dexp_batch((replications, n), lambdaa, alpha, rng)
+    flags = ext > t0
+    np.minimum(ext, t0, out=ext)
+    return ext, flags.astype(np.uint8)
+
+def random_type_batch(eta, n=10, replications=1, lambdaa=1, alpha=1, rng=None):
+    rng = np.random.default_rng(rng)
+    ext = dexp_batch((replications, n), lambdaa, alpha, rng)
+    ext2 = rng.exponential(scale=eta, size=(replications, n))
+    flags = ext > ext2
+    times = np.where(flags, ext, ext2)
+    return times, flags.astype(np.uint8)
+
+def second_type_batch(m, n=10, replications=1, lambdaa=1, alpha=1, rng=None):
+    # Pierwsze m statystyk pozycyjnych bez losowania i sortowania całej próby:
+    # k-ta najmniejsza z n zmiennych Exp(1) to suma E_i / (n - i + 1), i = 1..k
+    # (odstępy Rényiego), a dalej ta sama funkcja kwantylowa co w dexp.
+    rng = np.random.default_rng(rng)
+    spacings = rng.standard_exponential((replications, m))
+    spacings /= np.arange(n, n - m, -1)
+    z = np.cumsum(spacings, axis=1)
+    t = -np.expm1(-z)
+    ext = -(1/lambdaa) * np.log(1 - t**(1/alpha))
+    # Wartość cenzurująca to m-ta statystyka pozycyjna, czyli data[m]
+    # w próbie uzupełnionej przez second_type_error
+    return ext, ext[:, m - 1].copy()
+
+#times, flags = first_type_batch(1, n=20, replications=1000, rng=42)
+
+# Funkcje stats_* przyjmują listy, tablice NumPy i widoki np.memmap
+# (np. kolumny z dane_przezycia.otworz_kolumny) bez kopiowania do list
+
 def stats_type1(data, t0):
-    complete = [x for x in data if x < t0]
+    if isinstance(data, SurvivalSample):
+        return data.stats_type1(t0)
+    data = np.asarray(data)
+    complete = data[data < t0]
     return {
         'n': len(data),
         'n_complete': len(complete),
@@ -47,6 +210,8 @@ def stats_type1(data, t0):
     }
 
 def stats_type2(data, m):
+    if isinstance(data, SurvivalSample):
+        return data.stats_type2(m)
     complete = data[:m]
     return {
         'n': len(data),
@@ -57,13 +222,20 @@ def stats_type2(data, m):
         'std': np.std(complete, ddof=1)
     }
 
-def stats_random(data):
-    times = np.array([x[0] for x in data])
-    complete = [x[0] for x in data if x[1] == 0]
-    censored = [x[0] for x in data if x[1] == 1]
+def stats_random(data, flags=None):
+    # data: SurvivalSample, lista par (czas, flaga) albo - gdy podano flags - tablica czasów
+    if isinstance(data, SurvivalSample):
+        times, flags = data.time, data.censored
+    elif flags is None:
+        pairs = np.asarray(data, dtype=float).reshape(-1, 2)
+        times, flags = pairs[:, 0], pairs[:, 1]
+    else:
+        times, flags = np.asarray(data), np.asarray(flags)
+    complete = times[flags == 0]
+    censored = times[flags == 1]
     
     stats = {
-        'n': len(data),
+        'n': len(times),
         'n_complete': len(complete),
         'n_censored': len(censored),
         'min_time': np.min(times),
@@ -80,28 +252,89 @@ def stats_random(data):
     
     return stats
 
-# Generowanie danych
-np.random.seed(42)
-n = 20
-lambdaa = 1.5
-alpha = 2.0
+# Statystyki wsadowe: te same klucze co wyżej, ale każda wartość jest tablicą
+# o długości replications. Brak obserwacji danego rodzaju daje nan.
 
-# Typ I
-t0 = 1.5
-data1 = first_type_error(t0, n=n, lambdaa=lambdaa, alpha=alpha)
-stats1 = stats_type1(data1, t0)
+def stats_type1_batch(times, t0):
+    times = np.sort(times, axis=1)
+    complete = times < t0
+    k = complete.sum(axis=1)
+    rows = np.arange(times.shape[0])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(complete, times, 0).sum(axis=1) / k
+        dev = np.where(complete, times - mean[:, None], 0)
+        std = np.sqrt((dev**2).sum(axis=1) / (k - 1))
+    # Obserwacje pełne to k najmniejszych wartości w posortowanym wierszu
+    lo = times[rows, np.maximum(k - 1, 0) // 2]
+    hi = times[rows, k // 2]
+    median = np.where(k > 0, (lo + hi) / 2, np.nan)
+    return {
+        'n': np.full(times.shape[0], times.shape[1]),
+        'n_complete': k,
+        'mean': mean,
+        'median': median,
+        'std': np.where(k > 1, std, np.nan)
+    }
 
-# Typ II
-m = 12
-data2 = second_type_error(m, n=n, lambdaa=lambdaa, alpha=alpha)
-stats2 = stats_type2(data2, m)
+def stats_type2_batch(times, censoring_value, n):
+    m = times.shape[1]
+    return {
+        'n': np.full(times.shape[0], n),
+        'n_complete': np.full(times.shape[0], m),
+        'censoring_value': censoring_value,
+        'mean': np.mean(times, axis=1),
+        'median': np.median(times, axis=1),
+        'std': np.std(times, axis=1, ddof=1)
+    }
 
-# Losowe
-eta = 1.0
-data3 = random_type_error(eta, n=n, lambdaa=lambdaa, alpha=alpha)
-stats3 = stats_random(data3)
+def stats_random_batch(times, flags):
+    censored = flags.astype(bool)
+    n_censored = censored.sum(axis=1)
+    n_complete = times.shape[1] - n_censored
+    stats = {
+        'n': np.full(times.shape[0], times.shape[1]),
+        'n_complete': n_complete,
+        'n_censored': n_censored,
+        'min_time': np.min(times, axis=1),
+        'max_time': np.max(times, axis=1),
+        'median_time': np.median(times, axis=1)
+    }
+    for name, mask, count in (('complete', ~censored, n_complete),
+                              ('censored', censored, n_censored)):
+        stats['min_' + name] = np.where(count > 0, np.where(mask, times, np.inf).min(axis=1), np.nan)
+        stats['max_' + name] = np.where(count > 0, np.where(mask, times, -np.inf).max(axis=1), np.nan)
+    return stats
 
-import numpy as np
+def przyklad(seed=42, n=20, lambdaa=1.5, alpha=2.0):
+    """
+    Przykładowe dane i statystyki dla trzech schematów cenzurowania
+
+    Ustawia globalne ziarno np.random (funkcje skalarne losują z globalnego
+    generatora), dlatego nie jest wywoływana przy imporcie modułu.
+
+    Zwraca:
+    -------
+    dict : 'data1'..'data3' oraz 'stats1'..'stats3' (typ I, typ II, losowe)
+    """
+    np.random.seed(seed)
+
+    # Typ I
+    t0 = 1.5
+    data1 = first_type_error(t0, n=n, lambdaa=lambdaa, alpha=alpha)
+    stats1 = stats_type1(data1, t0)
+
+    # Typ II
+    m = 12
+    data2 = second_type_error(m, n=n, lambdaa=lambdaa, alpha=alpha)
+    stats2 = stats_type2(data2, m)
+
+    # Losowe
+    eta = 1.0
+    data3 = random_type_error(eta, n=n, lambdaa=lambdaa, alpha=alpha)
+    stats3 = stats_random(data3)
+
+    return {'data1': data1, 'data2': data2, 'data3': data3,
+            'stats1': stats1, 'stats2': stats2, 'stats3': stats3}
 
 # --- Dane dla leku A ---
 # 10 pacjentów z remisją:
@@ -144,3 +377,17 @@ bez_remisji_B = np.array([
     1.0, 1.0, 1.0, 1.0, 1.0,
     1.0, 1.0, 1.0, 1.0, 1.0
 ])
+
+
+if __name__ == "__main__":
+    wyniki = przyklad()
+    for klucz in ('stats1', 'stats2', 'stats3'):
+        print(klucz, wyniki[klucz])
+
+    # Próba typu I: statystyki zależą od progu t0 tak samo dla listy i SurvivalSample
+    np.random.seed(42)
+    proba = first_type_sample(1.5, n=20, lambdaa=1.5, alpha=2.0)
+    for t0 in (0.5, 1.0):
+        z_proby, z_listy = stats_type1(proba, t0), stats_type1(proba.time.tolist(), t0)
+        print(f"t0 = {t0}: {z_proby['n_complete']} pełnych (lista: {z_listy['n_complete']}), "
+              f"średnia {z_proby['mean']:.4f}")
@@ -0,0 +1,192 @@
+"""
+Statystyki opisowe liczone w jednym przebiegu po danych
+Momenty metodą Welforda (w wersji dla porcji), kwantyle ze szkicu KLL;
+częściowe wyniki z wielu procesów można łączyć metodą polacz()
+"""
+
+import math
+
+import numpy as np
+
+
+class SzkicKwantyli:
+    """
+    Łączony szkic kwantyli (KLL) z błędem rangi rzędu eps * n
+
+    Dopóki liczba wartości nie przekroczy pojemności k, szkic przechowuje
+    wszystkie dane i kwantyle są dokładne (jak np.percentile). Stałe
+    domyślne ziarno sprawia, że kompresja, a więc i wynik, jest powtarzalna.
+    """
+
+    __slots__ = ('k', 'poziomy', 'n', '_rng')
+
+    def __init__(self, eps=0.01, seed=0):
+        self.k = max(8, math.ceil(2 / eps))
+        self.poziomy = [[]]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _pojemnosc(self, h):
+        H = len(self.poziomy)
+        return max(2, math.ceil(self.k * (2 / 3) ** (H - 1 - h)))
+
+    def _poziom(self, h):
+        """Scala porcje poziomu h w jedną tablicę"""
+        porcje = self.poziomy[h]
+        if len(porcje) > 1:
+            self.poziomy[h] = [np.concatenate(porcje)]
+        return self.poziomy[h][0] if self.poziomy[h] else np.empty(0)
+
+    def _kompresuj(self):
+        h = 0
+        while h < len(self.poziomy):
+            if sum(p.size for p in self.poziomy[h]) > self._pojemnosc(h):
+                wartosci = np.sort(self._poziom(h))
+                # Przy nieparzystej liczbie jedna wartość zostaje na poziomie
+                zostaje = wartosci[-1:] if wartosci.size % 2 else wartosci[:0]
+                wartosci = wartosci[:wartosci.size - zostaje.size]
+                if h + 1 == len(self.poziomy):
+                    self.poziomy.append([])
+                self.poziomy[h + 1].append(wartosci[self._rng.integers(2)::2])
+                self.poziomy[h] = [zostaje] if zostaje.size else []
+                h = 0
+            else:
+                h += 1
+
+    def dodaj(self, dane):
+        # Kopia: wywołujący może ponownie użyć bufora porcji
+        dane = np.array(dane, dtype=float).ravel()
+        if dane.size:
+            self.poziomy[0].append(dane)
+            self.n += dane.size
+            self._kompresuj()
+        return self
+
+    def polacz(self, inny):
+        while len(self.poziomy) < len(inny.poziomy):
+            self.poziomy.append([])
+        for h, porcje in enumerate(inny.poziomy):
+            self.poziomy[h].extend(porcje)
+        self.n += inny.n
+        self._kompresuj()
+        return self
+
+    def kwantyl(self, q):
+        """Kwantyl rzędu q (dokładny, jeśli szkic jeszcze niczego nie skompresował)"""
+        if self.n == 0:
+            return np.nan
+        if len(self.poziomy) == 1:
+            return np.percentile(self._poziom(0), 100 * q)
+        wartosci = np.concatenate([self._poziom(h) for h in range(len(self.poziomy))])
+        wagi = np.concatenate([np.full(self._poziom(h).size, 2.0 ** h)
+                               for h in range(len(self.poziomy))])
+        kolejnosc = np.argsort(wartosci)
+        skumulowane = np.cumsum(wagi[kolejnosc])
+        indeks = np.searchsorted(skumulowane, q * skumulowane[-1])
+        return wartosci[kolejnosc[min(indeks, kolejnosc.size - 1)]]
+
+
+class Statystyki:
+    """
+    Akumulator statystyk opisowych dla danych podawanych porcjami
+
+    Przykład:
+    ---------
+    >>> s = Statystyki()
+    >>> for porcja in porcje:
+    ...     s.dodaj(porcja)
+    >>> s.wynik()['median']
+    """
+
+    __slots__ = ('n', 'srednia', 'm2', 'minimum', 'maksimum', 'szkic')
+
+    def __init__(self, eps=0.01, seed=0):
+        self.n = 0
+        self.srednia = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maksimum = -np.inf
+        self.szkic = SzkicKwantyli(eps, seed)
+
+    def _dolacz_momenty(self, n, srednia, m2):
+        # Łączenie średnich i sum kwadratów odchyleń (Chan i in.)
+        razem = self.n + n
+        delta = srednia - self.srednia
+        self.srednia += delta * n / razem
+        self.m2 += m2 + delta**2 * self.n * n / razem
+        self.n = razem
+
+    def dodaj(self, dane):
+        dane = np.asarray(dane, dtype=float).ravel()
+        if dane.size == 0:
+            return self
+        srednia = dane.mean()
+        self._dolacz_momenty(dane.size, srednia, np.sum((dane - srednia)**2))
+        self.minimum = min(self.minimum, dane.min())
+        self.maksimum = max(self.maksimum, dane.max())
+        self.szkic.dodaj(dane)
+        return self
+
+    def polacz(self, inny):
+        if inny.n:
+            self._dolacz_momenty(inny.n, inny.srednia, inny.m2)
+            self.minimum = min(self.minimum, inny.minimum)
+            self.maksimum = max(self.maksimum, inny.maksimum)
+            self.szkic.polacz(inny.szkic)
+        return self
+
+    def wynik(self):
+        """
+        Zwraca:
+        -------
+        dict : mean, median, std, q1, q3, iqr, min, max, range
+        """
+        q1 = self.szkic.kwantyl(0.25)
+        q3 = self.szkic.kwantyl(0.75)
+        return {
+            'mean': self.srednia if self.n else np.nan,
+            'median': self.szkic.kwantyl(0.5),
+            'std': np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan,
+            'q1': q1, 'q3': q3, 'iqr': q3 - q1,
+            'min': self.minimum, 'max': self.maksimum,
+            'range': self.maksimum - self.minimum
+        }
+
+
+def opisz_probki(probki, eps=0.01, porcja=1 << 20, seed=0):
+    """
+    Statystyki opisowe dla kilku prób w układzie używanym przez raport
+
+    Dla tablic w pamięci kwantyle są liczone dokładnie (np.percentile);
+    szkic przybliża je tylko dla np.memmap i iteratorów porcji.
+
+    Parametry:
+    ----------
+    probki : sekwencja
+        Próby jako tablice (także np.memmap) albo iteratory porcji
+    eps : float
+        Dopuszczalny względny błąd rangi kwantyli dla dużych prób
+    porcja : int
+        Rozmiar porcji, na które dzielone są tablice
+    seed : int
+        Ziarno losowania w szkicu kwantyli
+
+    Zwraca:
+    -------
+    dict : {'sample1': {...}, ..., 'sampleN': {...}}
+    """
+    wynik = {}
+    for i, probka in enumerate(probki, start=1):
+        s = Statystyki(eps, seed)
+        if isinstance(probka, np.ndarray):
+            plaska = probka.reshape(-1)
+            for start in range(0, plaska.size, porcja):
+                s.dodaj(plaska[start:start + porcja])
+        else:
+            for kawalek in probka:
+                s.dodaj(kawalek)
+        wynik[f'sample{i}'] = s.wynik()
+        if isinstance(probka, np.ndarray) and not isinstance(probka, np.memmap) and plaska.size:
+            q1, mediana, q3 = np.percentile(plaska, [25, 50, 75])
+            wynik[f'sample{i}'].update(median=mediana, q1=q1, q3=q3, iqr=q3 - q1)
+    return wynik
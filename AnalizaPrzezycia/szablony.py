@@ -0,0 +1,82 @@
+"""
+Prosty silnik szablonów HTML z placeholderami {{NAZWA}}
+Szablon jest raz dzielony na literały i miejsca na wartości (z pamięcią
+podręczną według ścieżki i czasu modyfikacji), a wypełnienie to jedno join
+"""
+
+import os
+import re
+
+
+WZORZEC_PLACEHOLDERA = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}')
+
+# sciezka -> (czas modyfikacji, SkompilowanySzablon)
+_pamiec = {}
+
+
+class SkompilowanySzablon:
+    """Szablon podzielony na literały i nazwy placeholderów między nimi"""
+
+    __slots__ = ('literaly', 'nazwy')
+
+    def __init__(self, tekst):
+        czesci = WZORZEC_PLACEHOLDERA.split(tekst)
+        # split z grupą daje naprzemiennie literał, nazwa, literał, ...
+        self.literaly = tuple(czesci[0::2])
+        self.nazwy = tuple(czesci[1::2])
+
+    def wypelnij(self, wartosci, scisle=False):
+        """
+        Wstawia wartości w miejsca placeholderów
+
+        Parametry:
+        ----------
+        wartosci : dict
+            Słownik {NAZWA: wartość}; wartości są zamieniane na str
+        scisle : bool
+            Czy nadmiarowe klucze (bez placeholdera w szablonie) są błędem;
+            domyślnie są tylko zgłaszane ostrzeżeniem
+
+        Zwraca:
+        -------
+        str : Wypełniony dokument
+        """
+        brakujace = sorted(set(self.nazwy) - set(wartosci))
+        if brakujace:
+            raise KeyError(f"Brak wartości dla placeholderów: {', '.join(brakujace)}")
+        nieznane = sorted(set(wartosci) - set(self.nazwy))
+        if nieznane:
+            if scisle:
+                raise KeyError(f"Szablon nie zawiera placeholderów: {', '.join(nieznane)}")
+            print(f"⚠ Szablon nie zawiera placeholderów: {', '.join(nieznane)}")
+
+        czesci = [None] * (2 * len(self.literaly) - 1)
+        czesci[0::2] = self.literaly
+        czesci[1::2] = [str(wartosci[nazwa]) for nazwa in self.nazwy]
+        return ''.join(czesci)
+
+
+def wczytaj_szablon(sciezka, encoding='utf-8'):
+    """
+    Zwraca skompilowany szablon, czytając plik tylko gdy się zmienił
+
+    Parametry:
+    ----------
+    sciezka : str
+        Ścieżka do pliku szablonu
+    encoding : str
+        Kodowanie pliku
+
+    Zwraca:
+    -------
+    SkompilowanySzablon
+    """
+    klucz = os.path.abspath(sciezka)
+    czas = os.stat(klucz).st_mtime_ns
+    zapamietany = _pamiec.get(klucz)
+    if zapamietany is not None and zapamietany[0] == czas:
+        return zapamietany[1]
+    with open(klucz, 'r', encoding=encoding) as f:
+        szablon = SkompilowanySzablon(f.read())
+    _pamiec[klucz] = (czas, szablon)
+    return szablon
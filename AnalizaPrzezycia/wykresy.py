@@ -3,14 +3,86 @@ Moduł do tworzenia wykresów i obsługi LaTeX
 Zawiera funkcje generujące różne typy wizualizacji
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
+import atexit
 import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 
-np.random.seed(422)
+from pamiec_podreczna import domyslna, klucz
+from profilowanie import aktywny, etap, profiluj_zadanie
+from statystyki import opisz_probki
 
-def wykres_do_base64(fig):
+# Pamięć podręczna rysunków na dysku (None, gdy wyłączona przez ANALIZA_PAMIEC="")
+PAMIEC = domyslna()
+
+# Próby pokazywane w raporcie: (n, α, β, γ); pierwsza i trzecia wyznaczają
+# rozkłady, dla których podawane są wartości teoretyczne
+PROBY_DOMYSLNE = ((50, 2, 4, 3), (100, 2, 4, 3), (50, 2, 2, 1), (100, 2, 2, 1))
+
+# Parametry (α, β, γ) krzywych na wykresie funkcji hazardu
+HAZARDY_DOMYSLNE = ((1.4, 2, 2), (1, 2, 2), (0.8, 1, 2))
+
+# Pula procesów rysujących: (liczba procesów, pula), patrz _pula_procesow
+_PULA = None
+
+def _plt():
+    """Import pyplot dopiero przy pierwszym rysowaniu (trafienia w pamięć go nie potrzebują)"""
+    import matplotlib.pyplot as plt
+    return plt
+
+def _obraz(fig, dpi=150, format='png'):
+    """Zapisuje figurę do bajtów PNG lub SVG i ją zamyka"""
+    buf = BytesIO()
+    fig.savefig(buf, format=format, dpi=dpi, bbox_inches='tight')
+    _plt().close(fig)
+    return buf.getvalue()
+
+def _data_uri(dane, format='png'):
+    typ = 'image/svg+xml' if format == 'svg' else f'image/{format}'
+    return f"data:{typ};base64,{base64.b64encode(dane).decode('utf-8')}"
+
+def _z_pamieci(czesci_klucza, rysuj, format='png', katalog=None):
+    """
+    Zwraca rysunek z pamięci podręcznej albo z rysuj()
+    
+    Parametry:
+    ----------
+    czesci_klucza : tuple
+        Wszystko, od czego zależy rysunek (dane, dpi, funkcja rysująca)
+    rysuj : callable
+        Funkcja bez argumentów zwracająca bajty obrazu
+    format : str
+        Format bajtów zwracanych przez rysuj ('png' lub 'svg')
+    katalog : str, opcjonalnie
+        Katalog na pliki obrazów; wtedy zamiast data URI zwracana jest
+        nazwa pliku (adres względny wobec katalogu)
+    
+    Zwraca:
+    -------
+    str : data URI albo nazwa pliku w katalogu
+    """
+    k = klucz(format, *czesci_klucza)
+    if katalog is not None:
+        # Nazwa pliku z klucza: ten sam rysunek nie jest zapisywany drugi raz,
+        # a równoległe raporty w jednym katalogu sobie nie przeszkadzają
+        nazwa = f'{k[:20]}.{format}'
+        sciezka = os.path.join(katalog, nazwa)
+        if not os.path.exists(sciezka):
+            dane = rysuj() if PAMIEC is None else PAMIEC.pobierz_lub_utworz(k, rysuj)
+            os.makedirs(katalog, exist_ok=True)
+            tymczasowa = f'{sciezka}.{os.getpid()}.tmp'
+            with open(tymczasowa, 'wb') as f:
+                f.write(dane)
+            os.replace(tymczasowa, sciezka)
+        return nazwa
+    if PAMIEC is None:
+        return _data_uri(rysuj(), format)
+    return _data_uri(PAMIEC.pobierz_lub_utworz(k, rysuj), format)
+
+def wykres_do_base64(fig, dpi=150):
     """
     Konwertuje wykres matplotlib do formatu base64
     
@@ -18,19 +90,16 @@ def wykres_do_base64(fig):
     ----------
     fig : matplotlib.figure.Figure
         Obiekt figury matplotlib
+    dpi : int
+        Rozdzielczość obrazu
         
     Zwraca:
     -------
     str : String z obrazem zakodowanym w base64
     """
-    buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    return f"data:image/png;base64,{img_base64}"
+    return _data_uri(_obraz(fig, dpi))
 
-def wzor_do_base64(wzor_latex, tytul_wzoru):
+def wzor_do_base64(wzor_latex, tytul_wzoru, dpi=150, format='png', katalog=None):
     """
     Konwertuje wzór LaTeX do obrazu PNG zakodowanego w base64.
     
@@ -40,36 +109,63 @@ def wzor_do_base64(wzor_latex, tytul_wzoru):
         String z wzorem w formacie LaTeX (np. r'$y = \alpha x + \beta$')
     tytul_wzoru : str
         Krótki opis do wydruku w konsoli
+    dpi : int
+        Rozdzielczość obrazu
+    format : str
+        'png' albo 'svg'
+    katalog : str, opcjonalnie
+        Katalog, do którego obraz trafia jako plik (zamiast data URI)
         
     Zwraca:
     -------
-    str : String z obrazem zakodowanym w base64 (data:image/png;...)
+    str : String z obrazem zakodowanym w base64 (data:image/png;... lub data:image/svg+xml;...)
+          albo nazwa pliku w katalogu
     """
     print(f"   📐 Wzór: {tytul_wzoru}...")
-    fig, ax = plt.subplots(figsize=(8, 1)) # Mały rozmiar, tylko na wzór
+    return _z_pamieci(('wzor', _rysuj_wzor, wzor_latex, dpi),
+                      lambda: _rysuj_wzor(wzor_latex, dpi, format), format, katalog)
+
+@lru_cache(maxsize=None)
+def _parser_wzorow(wyjscie):
+    """Jeden parser mathtext na proces (ma też własną pamięć sparsowanych wzorów)"""
+    from matplotlib.mathtext import MathTextParser
+    return MathTextParser(wyjscie)
+
+def _rysuj_wzor(wzor_latex, dpi, format='png'):
+    """
+    Rysuje wzór bezpośrednio parserem mathtext, bez figury pyplot
+    
+    Zwraca:
+    -------
+    bytes : Obraz PNG (biały margines 0.1 cala) albo dokument SVG
+    """
+    from matplotlib.font_manager import FontProperties
     
-    # Renderowanie tekstu LaTeX
     # fontsize=18 dla lepszej czytelności w raporcie
     wzor_do_renderowania = r'$' + wzor_latex + r'$'
+    czcionka = FontProperties(size=18)
+    buf = BytesIO()
     
-    fig, ax = plt.subplots(figsize=(8, 1)) # Mały rozmiar
+    if format == 'svg':
+        from matplotlib.mathtext import math_to_image
+        math_to_image(wzor_do_renderowania, buf, prop=czcionka, dpi=dpi, format='svg')
+        return buf.getvalue()
     
-    # Renderowanie tekstu LaTeX
-    # fontsize=18 dla lepszej czytelności w raporcie
-    ax.text(0.5, 0.5, wzor_do_renderowania, 
-            horizontalalignment='center', 
-            verticalalignment='center', 
-            fontsize=18, 
-            color='black',
-            transform=ax.transAxes)
-            
-    ax.axis('off') # Ukryj osie i ramki
-    ax.set_title('')
-    plt.tight_layout(pad=0.1) # Minimalne marginesy
-
-    return wykres_do_base64(fig)
-
-def wykres_liniowy():
+    from PIL import Image
+    maska = np.asarray(_parser_wzorow('agg').parse(wzor_do_renderowania, dpi=dpi, prop=czcionka).image)
+    margines = round(0.1 * dpi)
+    obraz = np.full((maska.shape[0] + 2 * margines, maska.shape[1] + 2 * margines), 255, dtype=np.uint8)
+    # Czarny tekst na białym tle: jasność = 255 - pokrycie piksela
+    obraz[margines:-margines, margines:-margines] -= maska
+    Image.fromarray(obraz, 'L').save(buf, format='PNG', dpi=(dpi, dpi))
+    return buf.getvalue()
+
+def wykres_liniowy(dpi=150, format='png', katalog=None, hazardy=HAZARDY_DOMYSLNE):
+    return _z_pamieci(('wykres_liniowy', _rysuj_liniowy, hazardy, dpi),
+                      lambda: _rysuj_liniowy(dpi, format, hazardy), format, katalog)
+
+def _rysuj_liniowy(dpi, format='png', hazardy=HAZARDY_DOMYSLNE):
+    plt = _plt()
     
     def dEW(x, alpha, beta, gamma):
         weibull_cdf = 1 - np.exp(-(x / beta)**alpha)
@@ -97,13 +193,10 @@ def wykres_liniowy():
     fig, ax = plt.subplots(figsize=(8, 5))
     
     x = np.linspace(0, 20, 100)
-    y1 = hazard_EW(x, 1.4, 2, 2)
-    y2 = hazard_EW(x, 1, 2, 2)
-    y3 = hazard_EW(x, 0.8, 1, 2)
-    
-    ax.plot(x, y1, label='(1.4,2,2)', linewidth=2, color='red')
-    ax.plot(x, y2, label='(1,2,2)', linewidth=2, color='blue')
-    ax.plot(x, y3, label='(1,1,2)', linewidth=2, color='green')
+    kolory = ('red', 'blue', 'green', 'orange', 'purple', 'brown')
+    for i, (alpha, beta, gamma) in enumerate(hazardy):
+        ax.plot(x, hazard_EW(x, alpha, beta, gamma), label=f'({alpha:g},{beta:g},{gamma:g})',
+                linewidth=2, color=kolory[i % len(kolory)])
     
     ax.set_xlabel('X', fontsize=11)
     ax.set_ylabel('Y', fontsize=11)
@@ -111,24 +204,103 @@ def wykres_liniowy():
     ax.legend(fontsize=10)
     ax.grid(True, alpha=0.3, linestyle='--')
     
-    return wykres_do_base64(fig)
+    return _obraz(fig, dpi, format)
+
+def wykres_hazardu(wynik, parametry=None, dpi=150, format='png', katalog=None):
+    """
+    Wygładzony hazard z bootstrap_nelson_aalen na tle teoretycznej funkcji hazardu
 
+    Parametry:
+    ----------
+    wynik : dict
+        Wynik nelson_aalen.bootstrap_nelson_aalen
+    parametry : tuple, opcjonalnie
+        (α, β, γ) rozkładu EW, którego hazard_EW rysujemy na tej samej siatce
+
+    Zwraca:
+    -------
+    str : Data URI obrazu (albo nazwa pliku, gdy podano katalog)
+    """
+    pasma = tuple(wynik[f'hazard_{k}'] for k in ('dolna', 'gorna', 'dolna_jednoczesna',
+                                                 'gorna_jednoczesna'))
+    return _z_pamieci(('wykres_hazardu', _rysuj_hazard, wynik['siatka'], wynik['hazard'], pasma,
+                       wynik['szerokosc'], parametry, dpi),
+                      lambda: _rysuj_hazard(wynik, parametry, dpi, format), format, katalog)
+
+def _rysuj_hazard(wynik, parametry, dpi, format='png'):
+    from raporcik1 import hazard_EW
+    plt = _plt()
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    x = wynik['siatka']
+    ax.fill_between(x, wynik['hazard_dolna_jednoczesna'], wynik['hazard_gorna_jednoczesna'],
+                    color='blue', alpha=0.12, label='pasmo jednoczesne')
+    ax.fill_between(x, wynik['hazard_dolna'], wynik['hazard_gorna'],
+                    color='blue', alpha=0.25, label='pasmo punktowe')
+    ax.plot(x, wynik['hazard'], color='blue', linewidth=2,
+            label=f"estymator jądrowy (b={wynik['szerokosc']:.3g})")
+    if parametry is not None:
+        alpha, beta, gamma = parametry
+        ax.plot(x, hazard_EW(x, alpha, beta, gamma), color='red', linewidth=2, linestyle='--',
+                label=f'hazard EW ({alpha:g},{beta:g},{gamma:g})')
+
+    ax.set_xlabel('t', fontsize=11)
+    ax.set_ylabel('h(t)', fontsize=11)
+    ax.set_title('Hazard z danych cenzurowanych', fontsize=13, fontweight='bold')
+    ax.legend(fontsize=10)
+    ax.grid(True, alpha=0.3, linestyle='--')
+
+    return _obraz(fig, dpi, format)
 
-np.random.seed(42)
 
 def qEW(p, alpha, beta, gamma):
     return beta * (-np.log(1 - p**(1/gamma)))**(1/alpha)
 
-def rEW(count, alpha, beta, gamma):
-    uniform_samples = np.random.uniform(0, 1, size=count)
+def rEW(count, alpha, beta, gamma, rng=None):
+    uniform_samples = (np.random if rng is None else rng).uniform(0, 1, size=count)
     return qEW(uniform_samples, alpha, beta, gamma)
 
-data1 = rEW(50, 2, 4, 3)
-data2 = rEW(100, 2, 4, 3)
-data3 = rEW(50, 2, 2, 1)
-data4 = rEW(100, 2, 2, 1)
+def generuj_dane(seed=42, proby=PROBY_DOMYSLNE):
+    """
+    Cztery próby z rozkładu EW pokazywane w raporcie
+    
+    Parametry:
+    ----------
+    seed : int lub np.random.SeedSequence
+        Ziarno własnego generatora (globalny stan np.random nie jest zmieniany);
+        dla liczby 42 próby są takie same jak dawniej po np.random.seed(42),
+        a SeedSequence (np. jedno z .spawn dla serii konfiguracji) daje
+        niezależny strumień np.random.Generator
+    proby : sekwencja
+        Krotki (n, α, β, γ), po jednej na próbę
+    
+    Zwraca:
+    -------
+    tuple : (data1, data2, data3, data4)
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        rng = np.random.default_rng(seed)
+    else:
+        rng = np.random.RandomState(seed)
+    return tuple(rEW(n, alpha, beta, gamma, rng) for n, alpha, beta, gamma in proby)
+
+def proby_konfiguracji(alpha, beta, gamma, n):
+    """
+    Próby raportu dla jednej konfiguracji serii: EW(α, β, γ) o licznościach
+    n i 2n oraz rozkład odniesienia EW(2, 2, 1) o tych samych licznościach;
+    konfiguracja (2, 4, 3, 50) daje próby domyślnego raportu
+    """
+    return ((n, alpha, beta, gamma), (2 * n, alpha, beta, gamma),
+            (n, 2, 2, 1), (2 * n, 2, 2, 1))
+
+def wykres_slupkowy(dpi=150, format='png', katalog=None, dane=None, proby=PROBY_DOMYSLNE):
+    if dane is None:
+        dane = generuj_dane(proby=proby)
+    return _z_pamieci(('wykres_slupkowy', _rysuj_slupkowy, *dane, proby, dpi),
+                      lambda: _rysuj_slupkowy(dane, dpi, format, proby), format, katalog)
 
-def wykres_slupkowy():
+def _rysuj_slupkowy(dane, dpi, format='png', proby=PROBY_DOMYSLNE):
+    plt = _plt()
 
     def dEW(x, alpha, beta, gamma):
         weibull_cdf = 1 - np.exp(-(x / beta)**alpha)
@@ -154,202 +326,174 @@ def wykres_slupkowy():
         width = bin_edges[1] - bin_edges[0]
         ax.bar(bin_centers, counts, width=width, alpha=0.6, color=color, edgecolor='black', label=label)
 
-    ax1 = axes[0, 0]
-    plot_scaled_hist(ax1, data1, bins=20, color='skyblue', label='Histogram')
-    x1 = np.linspace(0.01, data1.max()*1.1, 200)
-    y1 = dEW(x1, 2, 4, 3)
-    y1 = y1 / y1.max()  * 0.8
-    ax1.plot(x1, y1, 'r-', linewidth=2, label='Gęstość teoretyczna')
-    ax1.set_title('Rozkład EW(α=2, β=4, γ=3) — n=50', fontweight='bold')
-    ax1.set_xlabel('x')
-    ax1.set_ylabel('Przeskalowana gęstość')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
-    ax2 = axes[0, 1]
-    plot_scaled_hist(ax2, data2, bins=25, color='lightgreen', label='Histogram')
-    x2 = np.linspace(0.01, data2.max()*1.1, 200)
-    y2 = dEW(x2, 2, 4, 3)
-    y2 = y2 / y2.max() * 0.8
-    ax2.plot(x2, y2, 'b-', linewidth=2, label='Gęstość teoretyczna')
-    ax2.set_title('Rozkład EW(α=2, β=4, γ=3) — n=100', fontweight='bold')
-    ax2.set_xlabel('x')
-    ax2.set_ylabel('Przeskalowana gęstość')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
-
-    ax3 = axes[1, 0]
-    plot_scaled_hist(ax3, data3, bins=20, color='salmon', label='Histogram')
-    x3 = np.linspace(0.01, data3.max()*1.1, 200)
-    y3 = dEW(x3, 2, 2, 1)
-    y3 = y3 / y3.max() * 0.8
-    ax3.plot(x3, y3, 'purple', linewidth=2, label='Gęstość teoretyczna')
-    ax3.set_title('Rozkład EW(α=2, β=2, γ=1) — n=50', fontweight='bold')
-    ax3.set_xlabel('x')
-    ax3.set_ylabel('Przeskalowana gęstość')
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
-
-    ax4 = axes[1, 1]
-    plot_scaled_hist(ax4, data4, bins=25, color='gold', label='Histogram')
-    x4 = np.linspace(0.01, data4.max()*1.1, 200)
-    y4 = dEW(x4, 2, 2, 1)
-    y4 = y4 / y4.max() * 0.8
-    ax4.plot(x4, y4, 'darkgreen', linewidth=2, label='Gęstość teoretyczna')
-    ax4.set_title('Rozkład EW(α=2, β=2, γ=1) — n=100', fontweight='bold')
-    ax4.set_xlabel('x')
-    ax4.set_ylabel('Przeskalowana gęstość')
-    ax4.legend()
-    ax4.grid(True, alpha=0.3)
-
-    
-    return wykres_do_base64(fig)
-
-def wykres_kolowy():
+    styl = (('skyblue', 'r-'), ('lightgreen', 'b-'), ('salmon', 'purple'), ('gold', 'darkgreen'))
+    for ax, data, (n, alpha, beta, gamma), (kolor, linia) in zip(axes.flat, dane, proby, styl):
+        plot_scaled_hist(ax, data, bins=20 if n < 100 else 25, color=kolor, label='Histogram')
+        x = np.linspace(0.01, data.max()*1.1, 200)
+        y = dEW(x, alpha, beta, gamma)
+        y = y / y.max() * 0.8
+        ax.plot(x, y, linia, linewidth=2, label='Gęstość teoretyczna')
+        ax.set_title(f'Rozkład EW(α={alpha:g}, β={beta:g}, γ={gamma:g}) — n={n}', fontweight='bold')
+        ax.set_xlabel('x')
+        ax.set_ylabel('Przeskalowana gęstość')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    return _obraz(fig, dpi, format)
+
+def wykres_kolowy(dane=None, proby=PROBY_DOMYSLNE):
     def qEW(p, alpha, beta, gamma):
         return beta * (-np.log(1 - p**(1/gamma)))**(1/alpha)
 
-    # Statystyki dla próby 1
-    mean1 = np.mean(data1)
-    median1 = np.median(data1)
-    std1 = np.std(data1, ddof=1)
-    q1_1 = np.percentile(data1, 25)
-    q3_1 = np.percentile(data1, 75)
-    iqr1 = q3_1 - q1_1
-    min1 = np.min(data1)
-    max1 = np.max(data1)
-    range1 = max1 - min1
-    
-    # Statystyki dla próby 2
-    mean2 = np.mean(data2)
-    median2 = np.median(data2)
-    std2 = np.std(data2, ddof=1)
-    q1_2 = np.percentile(data2, 25)
-    q3_2 = np.percentile(data2, 75)
-    iqr2 = q3_2 - q1_2
-    min2 = np.min(data2)
-    max2 = np.max(data2)
-    range2 = max2 - min2
+    # Statystyki prób w jednym przebiegu (średnia/odchylenie Welforda, kwantyle ze szkicu)
+    if dane is None:
+        dane = generuj_dane(proby=proby)
+    dane = opisz_probki(dane)
     
-    # Statystyki dla próby 3
-    mean3 = np.mean(data3)
-    median3 = np.median(data3)
-    std3 = np.std(data3, ddof=1)
-    q1_3 = np.percentile(data3, 25)
-    q3_3 = np.percentile(data3, 75)
-    iqr3 = q3_3 - q1_3
-    min3 = np.min(data3)
-    max3 = np.max(data3)
-    range3 = max3 - min3
-    
-    # Statystyki dla próby 4
-    mean4 = np.mean(data4)
-    median4 = np.median(data4)
-    std4 = np.std(data4, ddof=1)
-    q1_4 = np.percentile(data4, 25)
-    q3_4 = np.percentile(data4, 75)
-    iqr4 = q3_4 - q1_4
-    min4 = np.min(data4)
-    max4 = np.max(data4)
-    range4 = max4 - min4
-    
-    # Wartości teoretyczne dla EW(2,4,3)
-    median_theo_243 = qEW(0.5, 2, 4, 3)
-    q1_theo_243 = qEW(0.25, 2, 4, 3)
-    q3_theo_243 = qEW(0.75, 2, 4, 3)
-    iqr_theo_243 = q3_theo_243 - q1_theo_243
-    
-    # Wartości teoretyczne dla EW(2,2,1)
-    median_theo_221 = qEW(0.5, 2, 2, 1)
-    q1_theo_221 = qEW(0.25, 2, 2, 1)
-    q3_theo_221 = qEW(0.75, 2, 2, 1)
-    iqr_theo_221 = q3_theo_221 - q1_theo_221
-
-    return {
-        'sample1': {
-            'mean': mean1, 'median': median1, 'std': std1,
-            'q1': q1_1, 'q3': q3_1, 'iqr': iqr1,
-            'min': min1, 'max': max1, 'range': range1
-        },
-        'sample2': {
-            'mean': mean2, 'median': median2, 'std': std2,
-            'q1': q1_2, 'q3': q3_2, 'iqr': iqr2,
-            'min': min2, 'max': max2, 'range': range2
-        },
-        'sample3': {
-            'mean': mean3, 'median': median3, 'std': std3,
-            'q1': q1_3, 'q3': q3_3, 'iqr': iqr3,
-            'min': min3, 'max': max3, 'range': range3
-        },
-        'sample4': {
-            'mean': mean4, 'median': median4, 'std': std4,
-            'q1': q1_4, 'q3': q3_4, 'iqr': iqr4,
-            'min': min4, 'max': max4, 'range': range4
-        },
-        'theoretical_EW_243': {
-            'median': median_theo_243,
-            'q1': q1_theo_243,
-            'q3': q3_theo_243,
-            'iqr': iqr_theo_243
-        },
-        'theoretical_EW_221': {
-            'median': median_theo_221,
-            'q1': q1_theo_221,
-            'q3': q3_theo_221,
-            'iqr': iqr_theo_221
+    # Wartości teoretyczne dla rozkładów prób 1-2 i 3-4
+    for i, (_, alpha, beta, gamma) in enumerate((proby[0], proby[2]), start=1):
+        q1, mediana, q3 = (qEW(p, alpha, beta, gamma) for p in (0.25, 0.5, 0.75))
+        dane[f'theoretical_EW_{i}'] = {
+            'parametry': (alpha, beta, gamma),
+            'median': mediana,
+            'q1': q1,
+            'q3': q3,
+            'iqr': q3 - q1
         }
-    }
+    return dane
 
 
 
 
-def stworz_wykresy():
+def _rozgrzej_backend():
     """
-    Główna funkcja tworząca wszystkie wykresy
-    
-    Zwraca:
-    -------
-    dict : Słownik z wykresami zakodowanymi w base64
+    Inicjalizacja procesu roboczego: backend Agg oraz jedno rysowanie tekstu
+    i wzoru, żeby czcionki i mathtext były gotowe przed pierwszym zadaniem
     """
-    print("   📈 Wykres 1: Funkcje trygonometryczne...")
-    wykres1 = wykres_liniowy()
-    
-    print("   📊 Wykres 2: Sprzedaż miesięczna...")
-    wykres2 = wykres_slupkowy()
+    plt = _plt()
+    plt.switch_backend('Agg')
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.text(0.5, 0.5, r'$\alpha$')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _pula_procesow(procesy):
+    """
+    Jedna pula procesów na cały moduł, tworzona przy pierwszym użyciu
+
+    Rozgrzane procesy służą kolejnym wywołaniom stworz_wykresy; pula jest
+    tworzona od nowa tylko przy zmianie liczby procesów.
+    """
+    global _PULA
+    if _PULA is None or _PULA[0] != procesy:
+        if _PULA is None:
+            atexit.register(_zamknij_pule)
+        else:
+            _PULA[1].shutdown()
+        _PULA = (procesy, ProcessPoolExecutor(max_workers=procesy, initializer=_rozgrzej_backend))
+    return _PULA[1]
 
-    dane = wykres_kolowy()
-    print(dane.keys())
-    
 
+def _zamknij_pule():
+    global _PULA
+    if _PULA is not None:
+        _PULA[1].shutdown()
+        _PULA = None
 
-    print("\n✍️ Generowanie wzorów matematycznych:")
+
+def stworz_wykresy(rownolegle=False, procesy=None, format='png', katalog=None, dane=None,
+                   proby=PROBY_DOMYSLNE, hazardy=HAZARDY_DOMYSLNE):
+    """
+    Główna funkcja tworząca wszystkie wykresy
+    
+    Parametry:
+    ----------
+    rownolegle : bool
+        Czy rysować wykresy i wzory jednocześnie w puli procesów
+    procesy : int, opcjonalnie
+        Liczba procesów (domyślnie tyle, ile rysunków, ale nie więcej niż rdzeni)
+    format : str
+        'png' (raster 150 dpi) albo 'svg' (tylko grafika wektorowa)
+    katalog : str, opcjonalnie
+        Katalog na pliki obrazów; wtedy słownik zawiera ich nazwy (adresy
+        względne) zamiast obrazów wstawionych jako base64
+    dane : tuple, opcjonalnie
+        Cztery próby do histogramów i statystyk; domyślnie generuj_dane(proby=proby)
+    proby : sekwencja
+        Krotki (n, α, β, γ) opisujące próby (np. z proby_konfiguracji)
+    hazardy : sekwencja
+        Krotki (α, β, γ) krzywych na wykresie funkcji hazardu
     
+    Zwraca:
+    -------
+    dict : Słownik z wykresami zakodowanymi w base64 (albo nazwami plików),
+           statystykami prób ('dane') i ich opisem ('proby')
+    """
     # Funkcja gęstości (PDF)
     wzor_pdf_latex = r'f(x) = \gamma \frac{\alpha}{\beta} \left(\frac{x}{\beta}\right)^{\alpha-1} (1-e^{-\left(\frac{x}{\beta}\right)^\alpha})^{\gamma -1}, \quad x \geq \gamma'
-    wzor_pdf = wzor_do_base64(wzor_pdf_latex, "Funkcja gęstości (PDF)")
     
     # Dystrybuanta (CDF)
     wzor_cdf_latex = r'F(x) = (1 - e^{-\left(\frac{x}{\beta}\right)^\alpha})^\gamma, \quad x \geq \gamma'
-    wzor_cdf = wzor_do_base64(wzor_cdf_latex, "Dystrybuanta (CDF)")
     
     # Funkcja kwantylowa
-     
     wzor_kwantyl_latex = r'Q(p) = \beta \left( - \ln(1 - p^{\frac{1}{\gamma}}) \right)^{\frac{1}{\alpha}}, \quad 0 \leq p < 1'
-    wzor_kwantyl = wzor_do_base64(wzor_kwantyl_latex, "Funkcja kwantylowa")
     
     # Funkcja hazardu
     wzor_hazard_latex = r'h(x) = \frac{\alpha \cdot \frac{k}{\lambda} \left(\frac{x}{\lambda}\right)^{k - 1} e^{-\left(\frac{x}{\lambda}\right)^k} \left[1 - e^{-\left(\frac{x}{\lambda}\right)^k}\right]^{\alpha - 1}}{1 - \left[1 - e^{-\left(\frac{x}{\lambda}\right)^k}\right]^\alpha}, \quad x \geq 0'
-    wzor_hazard = wzor_do_base64(wzor_hazard_latex, "Funkcja hazardu")
-    
-    
-    return {
-        'wykres1': wykres1,
-        'wykres2': wykres2,
-        'WZOR_PDF': wzor_pdf,
-        'WZOR_CDF': wzor_cdf,
-        'WZOR_KWANTYL': wzor_kwantyl,
-        'WZOR_HAZARD': wzor_hazard,
-        'dane': dane,
-    }
 
+    # Próby losujemy raz: trafiają do histogramów (także w innym procesie) i statystyk
+    if dane is None:
+        with etap('generuj_dane'):
+            dane = generuj_dane(proby=proby)
+
+    # Rysunki są od siebie niezależne: klucz wyniku -> (funkcja, argumenty)
+    zadania = {
+        'wykres1': (wykres_liniowy, (150, format, katalog, hazardy)),
+        'wykres2': (wykres_slupkowy, (150, format, katalog, dane, proby)),
+        'WZOR_PDF': (wzor_do_base64, (wzor_pdf_latex, "Funkcja gęstości (PDF)", 150, format, katalog)),
+        'WZOR_CDF': (wzor_do_base64, (wzor_cdf_latex, "Dystrybuanta (CDF)", 150, format, katalog)),
+        'WZOR_KWANTYL': (wzor_do_base64, (wzor_kwantyl_latex, "Funkcja kwantylowa", 150, format, katalog)),
+        'WZOR_HAZARD': (wzor_do_base64, (wzor_hazard_latex, "Funkcja hazardu", 150, format, katalog)),
+    }
 
+    if rownolegle:
+        print("   🧵 Rysowanie wykresów i wzorów w puli procesów...")
+        if procesy is None:
+            procesy = min(len(zadania), os.cpu_count() or 1)
+        profiler = aktywny()
+        pula = _pula_procesow(procesy)
+        if profiler is None:
+            przyszle = {klucz: pula.submit(funkcja, *argumenty)
+                        for klucz, (funkcja, argumenty) in zadania.items()}
+            wynik = {klucz: p.result() for klucz, p in przyszle.items()}
+        else:
+            # Etapy mierzone w procesach roboczych wracają razem z wynikiem
+            przyszle = {klucz: pula.submit(profiluj_zadanie, profiler.pamiec, klucz, funkcja, *argumenty)
+                        for klucz, (funkcja, argumenty) in zadania.items()}
+            wynik = {}
+            for klucz, p in przyszle.items():
+                wynik[klucz], zdarzenia = p.result()
+                profiler.dolacz(zdarzenia)
+    else:
+        print("   📈 Wykres 1: Funkcje trygonometryczne...")
+        with etap('wykres1'):
+            wynik = {'wykres1': wykres_liniowy(150, format, katalog, hazardy)}
+        
+        print("   📊 Wykres 2: Sprzedaż miesięczna...")
+        with etap('wykres2'):
+            wynik['wykres2'] = wykres_slupkowy(150, format, katalog, dane, proby)
+
+        print("\n✍️ Generowanie wzorów matematycznych:")
+        for klucz in ('WZOR_PDF', 'WZOR_CDF', 'WZOR_KWANTYL', 'WZOR_HAZARD'):
+            funkcja, argumenty = zadania[klucz]
+            with etap(klucz):
+                wynik[klucz] = funkcja(*argumenty)
+
+    with etap('statystyki'):
+        dane = wykres_kolowy(dane, proby)
+    print(dane.keys())
+    wynik['dane'] = dane
+    wynik['proby'] = tuple(proby)
+    
+    return wynik
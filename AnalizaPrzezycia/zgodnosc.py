@@ -0,0 +1,215 @@
+"""
+Testy zgodności z rozkładem EW: Kołmogorowa-Smirnowa, Craméra-von Misesa
+i Andersona-Darlinga z p-wartościami z bootstrapu parametrycznego
+Parametry są estymowane z próby, więc rozkład statystyk pod H0 zależy od
+dopasowania: każda replikacja to próba z EW(α̂, β̂, γ̂) (qEW), ponowne
+dopasowanie i statystyka. Porcja replikacji to jedna macierz (R, n)
+i jedno wektorowe dopasowanie dopasuj_EW_batch.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from estymacja import _log_w, dopasuj_EW, dopasuj_EW_batch
+from raporcik1 import _qEW_w_miejscu
+
+
+STATYSTYKI = ('KS', 'CvM', 'AD')
+
+# Najmniejszy logarytm prawdopodobieństwa (chroni AD przed log(0))
+_LOG_MIN = np.log(np.finfo(float).tiny)
+
+
+def statystyki_zgodnosci(posortowane, alpha, beta, gamma):
+    """
+    Statystyki KS, CvM i AD względem pEW, osobno dla każdego wiersza
+
+    Parametry:
+    ----------
+    posortowane : np.ndarray
+        Macierz (R, n) prób posortowanych w każdym wierszu
+    alpha, beta, gamma : float lub np.ndarray
+        Parametry EW (skalary albo tablice (R,))
+
+    Zwraca:
+    -------
+    dict : 'KS', 'CvM', 'AD' - tablice (R,)
+    """
+    x = np.atleast_2d(posortowane)
+    n = x.shape[1]
+    alpha, beta, gamma = (np.reshape(p, (-1, 1)) for p in (alpha, beta, gamma))
+    # log F = γ·log(1 - e^(-z)), log S = log(1 - F); bez utraty dokładności w ogonach
+    log_F = np.maximum(gamma * _log_w((x / beta)**alpha), _LOG_MIN)
+    log_S = np.maximum(np.log(-np.expm1(log_F)), _LOG_MIN)
+    F = np.exp(log_F)
+
+    i = np.arange(1, n + 1)
+    KS = np.maximum((i / n - F).max(axis=1), (F - (i - 1) / n).max(axis=1))
+    CvM = 1 / (12 * n) + np.sum((F - (2 * i - 1) / (2 * n))**2, axis=1)
+    AD = -n - np.sum((2 * i - 1) * (log_F + log_S[:, ::-1]), axis=1) / n
+    return {'KS': KS, 'CvM': CvM, 'AD': AD}
+
+
+def _porcja_bootstrap(n, parametry, obserwowane, rozmiar, ziarno):
+    """
+    Liczba replikacji z porcji, w których statystyka jest co najmniej taka
+    jak obserwowana, oraz liczba niezbieżnych dopasowań
+
+    Statystyki pozycyjne U(0, 1) to skumulowane odstępy wykładnicze przez
+    ich sumę, a qEW jest rosnąca, więc próby są od razu posortowane.
+    """
+    rng = np.random.default_rng(ziarno)
+    x = rng.standard_exponential((rozmiar, n + 1))
+    np.cumsum(x, axis=1, out=x)
+    x = np.divide(x[:, :n], x[:, n:])
+    _qEW_w_miejscu(x, *parametry)
+    # Próbne kroki BFGS mogą wyjść poza obszar, gdzie log-wiarygodność jest skończona
+    with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+        dopasowanie = dopasuj_EW_batch(x, start=parametry)
+    statystyki = statystyki_zgodnosci(x, dopasowanie['alpha'], dopasowanie['beta'],
+                                      dopasowanie['gamma'])
+    przekroczenia = {k: int(np.count_nonzero(statystyki[k] >= obserwowane[k])) for k in STATYSTYKI}
+    return przekroczenia, int(np.count_nonzero(~dopasowanie['zbiezne']))
+
+
+def _rozstrzygniete(przekroczenia, wykonane, B, poziom):
+    """
+    Czy decyzja na poziomie poziom jest już przesądzona dla każdej statystyki:
+    p-wartość po wszystkich B replikacjach mieści się między (k + 1)/(B + 1)
+    a (k + B - wykonane + 1)/(B + 1), gdzie k to dotychczasowe przekroczenia
+    """
+    pozostalo = B - wykonane
+    for k in przekroczenia.values():
+        najmniejsza = (k + 1) / (B + 1)
+        najwieksza = (k + pozostalo + 1) / (B + 1)
+        if (najmniejsza <= poziom) != (najwieksza <= poziom):
+            return False
+    return True
+
+
+def test_zgodnosci_EW(czasy, B=999, poziom=0.05, seed=None, procesy=1, rozmiar_porcji=100,
+                      wczesne_zatrzymanie=True):
+    """
+    Testy KS, CvM i AD dla EW z parametrami estymowanymi z próby
+
+    Parametry:
+    ----------
+    czasy : array-like
+        Próba (pełna, bez cenzurowania)
+    B : int
+        Liczba replikacji bootstrapowych
+    poziom : float
+        Poziom istotności decyzji (używany przy wczesnym zatrzymaniu)
+    seed : int, opcjonalnie
+        Ziarno; porcje mają stały rozmiar i osobne ziarna (SeedSequence.spawn),
+        a wyniki są zbierane w kolejności porcji, więc wynik nie zależy
+        od liczby procesów
+    procesy : int, opcjonalnie
+        Liczba procesów; None = liczba rdzeni, 1 = bez puli
+    rozmiar_porcji : int
+        Liczba replikacji w jednej porcji
+    wczesne_zatrzymanie : bool
+        Kończy, gdy żadna z pozostałych replikacji nie może zmienić decyzji
+        którejkolwiek statystyki; decyzje są wtedy takie jak po B replikacjach,
+        a p-wartości liczone z wykonanych replikacji
+
+    Zwraca:
+    -------
+    dict : 'alpha', 'beta', 'gamma' (dopasowanie), 'statystyki', 'p' i 'odrzucamy'
+           (słowniki po KS/CvM/AD), 'replikacje' (wykonane), 'B', 'niezbiezne'
+           (niezbieżne dopasowania w bootstrapie) i 'czas_s'
+    """
+    start = time.perf_counter()
+    x = np.sort(np.asarray(czasy, dtype=float))
+    n = x.size
+    dopasowanie = dopasuj_EW(x)
+    parametry = (dopasowanie['alpha'], dopasowanie['beta'], dopasowanie['gamma'])
+    obserwowane = {k: float(v[0]) for k, v in statystyki_zgodnosci(x[None, :], *parametry).items()}
+
+    rozmiary = [min(rozmiar_porcji, B - s) for s in range(0, B, rozmiar_porcji)]
+    ziarna = np.random.SeedSequence(seed).spawn(len(rozmiary))
+    przekroczenia = dict.fromkeys(STATYSTYKI, 0)
+    wykonane = niezbiezne = 0
+
+    def dolicz(wynik, rozmiar):
+        nonlocal wykonane, niezbiezne
+        for k, v in wynik[0].items():
+            przekroczenia[k] += v
+        niezbiezne += wynik[1]
+        wykonane += rozmiar
+        return wczesne_zatrzymanie and _rozstrzygniete(przekroczenia, wykonane, B, poziom)
+
+    if procesy is None:
+        procesy = os.cpu_count() or 1
+    if procesy > 1 and len(rozmiary) > 1:
+        # Najwyżej 2·procesy porcji w kolejce; wyniki są dołączane po kolei,
+        # a porcje policzone za punktem zatrzymania są pomijane
+        with ProcessPoolExecutor(max_workers=procesy) as pula:
+            kolejka = []
+            nastepna = 0
+            for i, rozmiar in enumerate(rozmiary):
+                while nastepna < len(rozmiary) and nastepna < i + 2 * procesy:
+                    kolejka.append(pula.submit(_porcja_bootstrap, n, parametry, obserwowane,
+                                               rozmiary[nastepna], ziarna[nastepna]))
+                    nastepna += 1
+                if dolicz(kolejka[i].result(), rozmiar):
+                    for zadanie in kolejka[i + 1:]:
+                        zadanie.cancel()
+                    break
+    else:
+        for rozmiar, ziarno in zip(rozmiary, ziarna):
+            if dolicz(_porcja_bootstrap(n, parametry, obserwowane, rozmiar, ziarno), rozmiar):
+                break
+
+    p = {k: (przekroczenia[k] + 1) / (wykonane + 1) for k in STATYSTYKI}
+    return {
+        'alpha': parametry[0],
+        'beta': parametry[1],
+        'gamma': parametry[2],
+        'statystyki': obserwowane,
+        'p': p,
+        'odrzucamy': {k: bool(p[k] <= poziom) for k in STATYSTYKI},
+        'replikacje': wykonane,
+        'B': B,
+        'niezbiezne': niezbiezne,
+        'czas_s': time.perf_counter() - start
+    }
+
+
+def testy_prob(dane, proby, B=999, poziom=0.05, seed=42, procesy=1):
+    """
+    Testy zgodności dla prób raportu (np. wyniku wykresy.generuj_dane)
+
+    Parametry:
+    ----------
+    dane : sekwencja np.ndarray
+        Próby
+    proby : sekwencja
+        Krotki (n, α, β, γ), z których wylosowano próby (dopisywane do wyniku)
+
+    Zwraca:
+    -------
+    list : Wyniki test_zgodnosci_EW z kluczem 'proba' (n, α, β, γ)
+    """
+    wyniki = []
+    for i, (x, proba) in enumerate(zip(dane, proby)):
+        wynik = test_zgodnosci_EW(x, B, poziom, None if seed is None else seed + i, procesy)
+        wynik['proba'] = list(proba)
+        wyniki.append(wynik)
+    return wyniki
+
+
+if __name__ == "__main__":
+    from wykresy import PROBY_DOMYSLNE, generuj_dane
+
+    for wynik in testy_prob(generuj_dane(), PROBY_DOMYSLNE, procesy=None):
+        n, alpha, beta, gamma = wynik['proba']
+        print(f"EW({alpha:g}, {beta:g}, {gamma:g}), n={n}: "
+              f"α̂={wynik['alpha']:.3f}, β̂={wynik['beta']:.3f}, γ̂={wynik['gamma']:.3f}, "
+              f"{wynik['replikacje']}/{wynik['B']} replikacji w {wynik['czas_s']:.2f} s")
+        for k in STATYSTYKI:
+            print(f"   {k:<4} {wynik['statystyki'][k]:8.4f}  p = {wynik['p'][k]:.3f}"
+                  f"{'  ❌' if wynik['odrzucamy'][k] else ''}")